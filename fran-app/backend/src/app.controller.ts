@@ -1,4 +1,4 @@
-import { Body, Controller, Get, Post } from '@nestjs/common';
+import { Body, Controller, Get, Post, Query } from '@nestjs/common';
 import { AppService } from './app.service';
 
 @Controller()
@@ -11,12 +11,16 @@ export class AppController {
   }
 
   @Post('/postdata')
-  postDataFetch(@Body() dataFromDesktop: Record<string, unknown>): Record<string, unknown> {
+  postDataFetch(
+    @Body() dataFromDesktop: Record<string, unknown> | Buffer,
+  ): Record<string, unknown> {
     return this.appService.postDataFetch(dataFromDesktop);
   }
 
+  // Sem parâmetros: linhas por tabela. Com ?table=&size=&from=&to=:
+  // hashes por intervalo de chaves, usados na reconciliação
   @Get('/data')
-  getDataFetch(): string {
-    return this.appService.getDataFetch();
+  getDataFetch(@Query() query: Record<string, string>): Record<string, unknown> {
+    return this.appService.getDataFetch(query);
   }
 }
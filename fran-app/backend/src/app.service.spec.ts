@@ -0,0 +1,51 @@
+import { createHash } from 'crypto';
+import { encode } from '@msgpack/msgpack';
+import { AppService } from './app.service';
+
+describe('AppService', () => {
+  const batch = {
+    version: 1,
+    table: 'product',
+    key: 'product_id',
+    count: 2,
+    types: { product_id: 'int', name: 'str', price: 'money' },
+    columns: {
+      product_id: [1, 2],
+      name: ['Bolo', 'Suco'],
+      price: [3000, 850],
+    },
+  };
+
+  it('decodifica um lote colunar em linhas', () => {
+    const service = new AppService();
+    expect(service.decodeBatch(batch as never)).toEqual([
+      { product_id: 1, name: 'Bolo', price: 30 },
+      { product_id: 2, name: 'Suco', price: 8.5 },
+    ]);
+  });
+
+  it('aceita o mesmo lote em MessagePack', () => {
+    const service = new AppService();
+    const body = Buffer.from(encode(batch));
+    expect(service.postDataFetch(body)).toEqual({
+      table: 'product',
+      accepted: 2,
+    });
+  });
+
+  it('recusa versões desconhecidas', () => {
+    const service = new AppService();
+    expect(() => service.decodeBatch({ ...batch, version: 2 })).toThrow();
+  });
+
+  it('calcula os mesmos hashes de intervalo que o desktop', () => {
+    const service = new AppService();
+    service.storeBatch(batch as never);
+    const row = '{"name":"Bolo","price":3000,"product_id":1}';
+    const rowDigest = createHash('sha256').update(row).digest('hex');
+    const rangeDigest = createHash('sha256').update(rowDigest).digest('hex');
+    expect(service.getDigests('product', 2, 0, 1)).toEqual({
+      '0': rangeDigest,
+    });
+  });
+});
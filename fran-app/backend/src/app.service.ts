@@ -1,19 +1,169 @@
+import { createHash } from 'crypto';
 import { Injectable } from '@nestjs/common';
-import { ok } from 'assert';
-import { query } from 'express';
+import { decode } from '@msgpack/msgpack';
+
+// Versão do formato dos lotes enviados pelo desktop
+export const WIRE_VERSION = 1;
+
+type FieldType = 'money' | 'epoch' | 'date' | 'int' | 'float' | 'str';
+
+// Lote colunar: um array de valores por campo
+export interface ColumnarBatch {
+  version: number;
+  table: string;
+  key: string;
+  count: number;
+  // Intervalo de chaves (inclusivo) substituído pelo lote, na reconciliação
+  range?: [number, number];
+  types: Record<string, FieldType>;
+  columns: Record<string, unknown[]>;
+}
 
 @Injectable()
 export class AppService {
+  // Chaves de idempotência dos eventos da outbox já recebidos
+  private readonly processedKeys = new Set<string>();
+
+  // Cópia das tabelas sincronizadas: linhas nos valores de envio, por chave
+  private readonly tables = new Map<string, Map<number, Record<string, unknown>>>();
+
   getStatus(): string {
     return 'STATUS: OK';
   }
 
-  postDataFetch(dataFromDesktop): Record<string,unknown> {
-    console.log(dataFromDesktop);
-    return dataFromDesktop;
+  postDataFetch(dataFromDesktop): Record<string, unknown> {
+    // Corpos em MessagePack chegam como Buffer (body-parser raw)
+    const payload = Buffer.isBuffer(dataFromDesktop)
+      ? decode(dataFromDesktop)
+      : dataFromDesktop;
+
+    if (Array.isArray(payload?.events)) {
+      const events = payload.events.filter(
+        (event) => !this.processedKeys.has(event.idempotency_key),
+      );
+      events.forEach((event) => this.processedKeys.add(event.idempotency_key));
+      console.log(events);
+      return { accepted: events.length };
+    }
+
+    if (payload?.columns) {
+      const batch = payload as ColumnarBatch;
+      this.storeBatch(batch);
+      const rows = this.decodeBatch(batch);
+      console.log(batch.table, rows);
+      return { table: batch.table, accepted: rows.length };
+    }
+
+    console.log(payload);
+    return payload;
+  }
+
+  // Converte um lote colunar em linhas: dinheiro em reais (a partir dos
+  // centavos) e datas em ISO 8601
+  decodeBatch(batch: ColumnarBatch): Record<string, unknown>[] {
+    if (batch.version !== WIRE_VERSION) {
+      throw new Error(`Versão do formato não suportada: ${batch.version}`);
+    }
+    const fields = Object.entries(batch.types);
+    const rows: Record<string, unknown>[] = [];
+    for (let index = 0; index < batch.count; index++) {
+      const row: Record<string, unknown> = {};
+      for (const [name, type] of fields) {
+        row[name] = this.fromWire(batch.columns[name][index], type);
+      }
+      rows.push(row);
+    }
+    return rows;
+  }
+
+  // Grava as linhas do lote; com "range", o intervalo é substituído
+  storeBatch(batch: ColumnarBatch): void {
+    if (!this.tables.has(batch.table)) {
+      this.tables.set(batch.table, new Map());
+    }
+    const rows = this.tables.get(batch.table);
+    if (batch.range) {
+      const [start, end] = batch.range;
+      for (const key of [...rows.keys()]) {
+        if (key >= start && key <= end) {
+          rows.delete(key);
+        }
+      }
+    }
+    const names = Object.keys(batch.types);
+    for (let index = 0; index < batch.count; index++) {
+      const row: Record<string, unknown> = {};
+      for (const name of names) {
+        row[name] = batch.columns[name][index];
+      }
+      rows.set(Number(row[batch.key]), row);
+    }
+  }
+
+  // Hashes por intervalo de `size` chaves, iguais aos calculados pelo
+  // Reconciler do desktop: SHA-256 da concatenação dos hashes das linhas,
+  // cada um sobre o JSON com as chaves em ordem alfabética
+  getDigests(
+    table: string,
+    size: number,
+    start = -Infinity,
+    end = Infinity,
+  ): Record<string, string> {
+    const rows = this.tables.get(table) ?? new Map();
+    const keys = [...rows.keys()]
+      .filter((key) => key >= start && key <= end)
+      .sort((a, b) => a - b);
+    const hashers = new Map<number, ReturnType<typeof createHash>>();
+    for (const key of keys) {
+      const bucket = Math.floor(key / size);
+      if (!hashers.has(bucket)) {
+        hashers.set(bucket, createHash('sha256'));
+      }
+      hashers.get(bucket).update(this.rowDigest(rows.get(key)), 'ascii');
+    }
+    const digests: Record<string, string> = {};
+    hashers.forEach((hasher, bucket) => {
+      digests[String(bucket)] = hasher.digest('hex');
+    });
+    return digests;
+  }
+
+  private rowDigest(row: Record<string, unknown>): string {
+    const canonical: Record<string, unknown> = {};
+    for (const name of Object.keys(row).sort()) {
+      canonical[name] = row[name];
+    }
+    return createHash('sha256')
+      .update(JSON.stringify(canonical), 'utf8')
+      .digest('hex');
+  }
+
+  private fromWire(value: unknown, type: FieldType): unknown {
+    if (value === null || value === undefined) {
+      return null;
+    }
+    if (type === 'money') {
+      return Number(value) / 100;
+    }
+    if (type === 'epoch') {
+      return new Date(Number(value) * 1000).toISOString();
+    }
+    return value;
   }
 
-  getDataFetch(): string {
-    return 'Data fetched successfully';
+  getDataFetch(query: Record<string, string> = {}): Record<string, unknown> {
+    if (!query.table) {
+      const counts: Record<string, number> = {};
+      this.tables.forEach((rows, table) => (counts[table] = rows.size));
+      return { tables: counts };
+    }
+    const size = Number(query.size ?? 256);
+    const start = query.from !== undefined ? Number(query.from) : -Infinity;
+    const end = query.to !== undefined ? Number(query.to) : Infinity;
+    return {
+      table: query.table,
+      size,
+      digests: this.getDigests(query.table, size, start, end),
+    };
   }
 }
@@ -1,9 +1,16 @@
 import { NestFactory } from '@nestjs/core';
+import { NestExpressApplication } from '@nestjs/platform-express';
 import { SwaggerModule, DocumentBuilder } from '@nestjs/swagger';
 import { AppModule } from './app.module';
 
 async function bootstrap() {
-  const app = await NestFactory.create(AppModule);
+  const app = await NestFactory.create<NestExpressApplication>(AppModule);
+
+  // Lotes da sincronização chegam com gzip (descomprimidos pelo body-parser)
+  // e podem passar do limite padrão de 100 KB
+  app.useBodyParser('json', { limit: '10mb' });
+  // Lotes em MessagePack são decodificados pelo AppService
+  app.useBodyParser('raw', { type: 'application/msgpack', limit: '10mb' });
 
   // Setup para documentação de endpoints com Swagger
   const config = new DocumentBuilder()
@@ -1,28 +1,19 @@
-import os
-
 import streamlit as st
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
 from Controllers.ProductController import ProductController
-from models import table_registry
-
-# Obtém o diretório onde o arquivo Python está localizado (no caso, dentro de 'src')
-base_dir = os.path.dirname(os.path.abspath(__file__))
-
-# Construa o caminho completo para o banco de dados dentro da pasta 'src'
-db_path = os.path.join(base_dir, 'test.db')
+from database import get_session, release_session
+from instrumentation import instrumentation
 
-# Crie a conexão com o banco de dados SQLite
-engine = create_engine(f'sqlite:///{db_path}')
-
-table_registry.metadata.create_all(engine)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-db = SessionLocal()
+release_session()
+db = get_session()
 
 # Teste de criação de produtos no banco de dados local
 
 productController = ProductController(session=db)
+# Instrumentação opcional (FRAN_INSTRUMENTATION=1): consultas por método
+page_stats = instrumentation.begin_page(
+    'Home', db.get_bind(), productController
+)
 
 # productController.create_product(name='Suco',
 #                                  description='descrição do suco',
@@ -71,3 +62,6 @@ st.set_page_config(
 
 # if __name__ == '__main__':
 #     test_create_product()
+
+instrumentation.end_page(page_stats)
+release_session()
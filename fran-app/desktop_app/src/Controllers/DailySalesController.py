@@ -0,0 +1,138 @@
+# Daily Sales Controller
+import datetime as dt
+from decimal import Decimal
+
+from sqlalchemy import Integer, delete, func, insert, select, type_coerce
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from Controllers.StorageController import average_cost_query
+from models import (
+    VOIDED_PAYMENT_STATUSES,
+    DailyProductSales,
+    ItemSale,
+    Product,
+    Sale,
+)
+
+
+def sold_cost_cents(average_cost):
+    """
+    Custo, em centavos, das unidades vendidas agregadas: cada item usa o
+    custo gravado na venda e, se não tiver, o custo médio atual.
+    :param average_cost: Subconsulta de average_cost_query, juntada aos itens.
+    :return: Expressão SQL agregada.
+    """
+    return func.round(
+        func.sum(
+            ItemSale.quantityItem
+            * func.coalesce(
+                type_coerce(ItemSale.unit_cost, Integer),
+                average_cost.c.unit_cost,
+                0,
+            )
+        )
+    )
+
+
+def daily_sales_backfill():
+    """
+    Monta o INSERT ... SELECT que consolida todo o histórico de itens
+    vendidos na tabela daily_product_sales.
+    :return: Instrução insert do SQLAlchemy.
+    """
+    average_cost = average_cost_query().subquery()
+    day = func.date(
+        type_coerce(Sale.datetime, Integer), 'unixepoch', 'localtime'
+    )
+    units = func.sum(ItemSale.quantityItem)
+    # Itens sem preço registrado usam o preço atual do produto
+    revenue = func.sum(
+        ItemSale.quantityItem
+        * func.coalesce(
+            type_coerce(ItemSale.unit_price, Integer),
+            type_coerce(Product.price, Integer),
+        )
+    )
+    cost = sold_cost_cents(average_cost)
+    history = (
+        select(day, ItemSale.product_id, units, revenue, cost)
+        .join(Sale, Sale.sale_id == ItemSale.sale_id)
+        .join(Product, Product.product_id == ItemSale.product_id)
+        .outerjoin(
+            average_cost, average_cost.c.product_id == ItemSale.product_id
+        )
+        .where(Sale.payment_status.not_in(VOIDED_PAYMENT_STATUSES))
+        .group_by(day, ItemSale.product_id)
+    )
+    return insert(DailyProductSales).from_select(
+        ['day', 'product_id', 'units', 'revenue', 'cost'], history
+    )
+
+
+class DailySalesController:
+    def __init__(self, session: Session):
+        """
+        Inicializa o controlador com uma sessão SQLAlchemy.
+        :param session: Instância de Session do SQLAlchemy.
+        """
+        self.session = session
+
+    def add_sale(
+        self, day: dt.date, lines: list[tuple[int, int, Decimal, Decimal]]
+    ) -> None:
+        """
+        Soma os itens de uma venda ao consolidado do dia (quantidades
+        negativas descontam um estorno). Não faz commit: é chamado dentro da
+        transação do checkout ou do estorno.
+        :param day: Dia da venda (horário local).
+        :param lines: Lista de tuplas (product_id, quantidade, preço
+            unitário, custo unitário gravados no item).
+        """
+        if not lines:
+            return
+
+        rows = [
+            {
+                'day': day,
+                'product_id': product_id,
+                'units': units,
+                'revenue': (unit_price or 0) * units,
+                'cost': (unit_cost or 0) * units,
+            }
+            for product_id, units, unit_price, unit_cost in lines
+        ]
+
+        statement = sqlite_insert(DailyProductSales)
+        self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[
+                    DailyProductSales.day,
+                    DailyProductSales.product_id,
+                ],
+                set_={
+                    'units': DailyProductSales.units
+                    + statement.excluded.units,
+                    'revenue': DailyProductSales.revenue
+                    + statement.excluded.revenue,
+                    'cost': DailyProductSales.cost + statement.excluded.cost,
+                },
+            ),
+            rows,
+        )
+
+    def rebuild(self) -> int:
+        """
+        Recalcula todo o consolidado diário a partir do histórico de vendas.
+        :return: Quantidade de linhas (dia, produto) geradas.
+        """
+        try:
+            self.session.execute(delete(DailyProductSales))
+            self.session.execute(daily_sales_backfill())
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return self.session.scalar(
+            select(func.count()).select_from(DailyProductSales)
+        )
@@ -0,0 +1,82 @@
+# Outbox Controller
+import json
+import time
+import uuid
+
+from sqlalchemy.orm import Session
+
+from models import Outbox
+
+
+class OutboxController:
+    def __init__(self, session: Session):
+        """
+        Inicializa o controlador com uma sessão SQLAlchemy.
+        :param session: Instância de Session do SQLAlchemy.
+        """
+        self.session = session
+
+    def enqueue(self, event_type: str, payload: dict) -> Outbox:
+        """
+        Registra um evento pendente de envio ao servidor.
+        Não faz commit: o evento é gravado na mesma transação da alteração
+        que o originou.
+        :param event_type: Tipo do evento (ex.: 'sale.created').
+        :param payload: Dados do evento.
+        :return: O evento criado.
+        """
+        event = Outbox(
+            event_type=event_type,
+            payload=json.dumps(payload, default=str),
+            idempotency_key=uuid.uuid4().hex,
+        )
+        self.session.add(event)
+        return event
+
+    def list_pending(self, limit: int = 100) -> list[Outbox]:
+        """
+        Lista os eventos cujo próximo envio já está liberado.
+        :param limit: Quantidade máxima de eventos.
+        :return: Lista de eventos em ordem de criação.
+        """
+        return (
+            self.session.query(Outbox)
+            .filter(Outbox.next_attempt_at <= time.time())
+            .order_by(Outbox.outbox_id)
+            .limit(limit)
+            .all()
+        )
+
+    def mark_sent(self, outbox_ids: list[int]) -> None:
+        """
+        Remove da fila os eventos confirmados pelo servidor.
+        :param outbox_ids: IDs dos eventos enviados com sucesso.
+        """
+        self.session.query(Outbox).filter(
+            Outbox.outbox_id.in_(outbox_ids)
+        ).delete(synchronize_session=False)
+        self.session.commit()
+
+    def mark_failed(self, outbox_ids: list[int], delay: float) -> None:
+        """
+        Adia uma nova tentativa de envio dos eventos.
+        :param outbox_ids: IDs dos eventos cujo envio falhou.
+        :param delay: Segundos até a próxima tentativa.
+        """
+        self.session.query(Outbox).filter(
+            Outbox.outbox_id.in_(outbox_ids)
+        ).update(
+            {
+                Outbox.attempts: Outbox.attempts + 1,
+                Outbox.next_attempt_at: time.time() + delay,
+            },
+            synchronize_session=False,
+        )
+        self.session.commit()
+
+    def count_pending(self) -> int:
+        """
+        Retorna a quantidade de eventos ainda não enviados.
+        :return: Tamanho da fila.
+        """
+        return self.session.query(Outbox).count()
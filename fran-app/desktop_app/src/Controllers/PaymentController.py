@@ -0,0 +1,203 @@
+# Payment Controller
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from Controllers.OutboxController import OutboxController
+from Controllers.SaleController import SaleController
+from Controllers.StorageController import StorageController
+from models import (
+    PAYMENT_APPROVED,
+    PAYMENT_PENDING,
+    PAYMENT_STATUSES,
+    VOIDED_PAYMENT_STATUSES,
+    Sale,
+    Storage,
+)
+
+# Observação gravada na venda estornada cuja cobrança o PSP aprovou depois
+REFUND_REQUIRED_MESSAGE = (
+    'Pagamento aprovado pelo PSP após o estorno da venda; '
+    'estorne a cobrança no PSP.'
+)
+
+
+class PaymentController:
+    def __init__(self, session: Session):
+        """
+        Inicializa o controlador com uma sessão SQLAlchemy.
+        :param session: Instância de Session do SQLAlchemy.
+        """
+        self.session = session
+        self.outbox_controller = OutboxController(session)
+        self.storage_controller = StorageController(session)
+        self.sale_controller = SaleController(session, self.storage_controller)
+
+    def get_payment(self, sale_id: int) -> dict:
+        """
+        Consulta a situação do pagamento de uma venda.
+        :param sale_id: ID da venda.
+        :return: Dicionário com sale_id, total_sale, status, method, key e
+            message.
+        :raises: ValueError se a venda não existir.
+        """
+        row = self.session.execute(
+            select(
+                Sale.sale_id,
+                Sale.total_sale,
+                Sale.payment_status,
+                Sale.payment_method,
+                Sale.payment_key,
+                Sale.payment_message,
+            ).where(Sale.sale_id == sale_id)
+        ).one_or_none()
+        if row is None:
+            raise ValueError(f'Venda com ID {sale_id} não encontrada.')
+        return {
+            'sale_id': row.sale_id,
+            'total_sale': row.total_sale,
+            'status': row.payment_status,
+            'method': row.payment_method,
+            'key': row.payment_key,
+            'message': row.payment_message,
+        }
+
+    def list_pending(self) -> list[dict]:
+        """
+        Lista as vendas com pagamento pendente, da mais antiga para a mais
+        recente (ex.: para retomar as consultas ao PSP após um reinício).
+        :return: Lista de dicionários no formato de get_payment.
+        """
+        sale_ids = self.session.scalars(
+            select(Sale.sale_id)
+            .where(Sale.payment_status == PAYMENT_PENDING)
+            .order_by(Sale.sale_id)
+        ).all()
+        return [self.get_payment(sale_id) for sale_id in sale_ids]
+
+    def record_attempt(self, sale_id: int, message: str) -> bool:
+        """
+        Registra uma observação sobre a cobrança de uma venda ainda pendente
+        (ex.: PSP sem resposta), sem alterar sua situação.
+        :param sale_id: ID da venda.
+        :param message: Observação exibida ao operador.
+        :return: True se a venda ainda estava pendente.
+        """
+        result = self.session.execute(
+            update(Sale)
+            .where(
+                Sale.sale_id == sale_id,
+                Sale.payment_status == PAYMENT_PENDING,
+            )
+            .values(payment_message=message)
+        )
+        self.session.commit()
+        return result.rowcount == 1
+
+    def settle(self, sale_id: int, status: str, message: str = None) -> bool:
+        """
+        Define a situação final do pagamento de uma venda pendente. Vendas
+        recusadas ou canceladas são estornadas na mesma transação: o estoque
+        volta ao saldo e o consolidado diário é descontado. Só a primeira
+        resposta vale; chamadas para vendas já resolvidas não fazem nada,
+        exceto uma aprovação que chega depois do estorno: a venda recebe uma
+        observação e o evento 'sale.refund_required' é enfileirado para que
+        a cobrança seja estornada no PSP.
+        :param sale_id: ID da venda.
+        :param status: Nova situação (aprovado, recusado ou cancelado).
+        :param message: Mensagem do PSP ou do operador (opcional).
+        :return: True se a situação foi alterada.
+        :raises: ValueError se a situação for inválida ou ocorrer erro na
+            gravação.
+        """
+        if status == PAYMENT_PENDING or status not in PAYMENT_STATUSES:
+            raise ValueError('Situação final de pagamento inválida.')
+
+        try:
+            changed = self._update_status(sale_id, status, message)
+            if not changed and status == PAYMENT_APPROVED:
+                self._flag_refund(sale_id, message)
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            raise ValueError(f'Erro ao atualizar o pagamento: {str(e)}')
+        return changed
+
+    def _update_status(
+        self, sale_id: int, status: str, message: str = None
+    ) -> bool:
+        """
+        Grava a situação final de uma venda pendente, estornando-a se
+        recusada ou cancelada, sem fazer commit.
+        :param sale_id: ID da venda.
+        :param status: Nova situação.
+        :param message: Mensagem do PSP ou do operador (opcional).
+        :return: True se a venda estava pendente.
+        """
+        result = self.session.execute(
+            update(Sale)
+            .where(
+                Sale.sale_id == sale_id,
+                Sale.payment_status == PAYMENT_PENDING,
+            )
+            .values(payment_status=status, payment_message=message)
+        )
+        if result.rowcount == 0:
+            return False
+
+        if status in VOIDED_PAYMENT_STATUSES:
+            self._void(sale_id)
+
+        self.outbox_controller.enqueue(
+            'sale.payment_updated',
+            {
+                'sale_id': sale_id,
+                'payment_status': status,
+                'payment_message': message,
+            },
+        )
+        return True
+
+    def _flag_refund(self, sale_id: int, message: str = None) -> None:
+        """
+        Marca uma venda já estornada cuja cobrança foi aprovada, sem fazer
+        commit.
+        :param sale_id: ID da venda.
+        :param message: Mensagem do PSP (opcional).
+        """
+        result = self.session.execute(
+            update(Sale)
+            .where(
+                Sale.sale_id == sale_id,
+                Sale.payment_status.in_(VOIDED_PAYMENT_STATUSES),
+                # Aprovações repetidas não geram outro evento
+                Sale.payment_message.is_distinct_from(REFUND_REQUIRED_MESSAGE),
+            )
+            .values(payment_message=REFUND_REQUIRED_MESSAGE)
+        )
+        if result.rowcount == 1:
+            self.outbox_controller.enqueue(
+                'sale.refund_required',
+                {'sale_id': sale_id, 'payment_message': message},
+            )
+
+    def _void(self, sale_id: int) -> None:
+        """
+        Devolve ao estoque os itens de uma venda, registrando o estorno no
+        livro de estoque pelo mesmo custo da baixa, e os desconta do
+        consolidado diário pelo preço e custo gravados nos itens, sem fazer
+        commit.
+        :param sale_id: ID da venda.
+        """
+        self.sale_controller.restore_items(sale_id)
+        movements = self.session.execute(
+            select(Storage.product_id, Storage.quantity, Storage.cost).where(
+                Storage.sale_id == sale_id
+            )
+        ).all()
+        self.storage_controller.add_movements(
+            [
+                (product_id, -quantity, cost)
+                for product_id, quantity, cost in movements
+            ],
+            sale_id,
+        )
@@ -1,8 +1,93 @@
+import threading
+import weakref
+from bisect import bisect_right
+from decimal import Decimal
+
+from sqlalchemy import (
+    and_,
+    inspect,
+    literal_column,
+    or_,
+    select,
+    table,
+    text,
+)
 from sqlalchemy.orm import Session
 
 from models import Product
 
 
+class CatalogCache:
+    """
+    Cache do catálogo compartilhado por todas as sessões do Streamlit no
+    processo. Cada banco (engine) tem um número de versão local,
+    incrementado a cada escrita deste processo; a lista só é recarregada
+    quando ela ou a versão gravada no banco (escritas de outros processos)
+    muda.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = weakref.WeakKeyDictionary()
+
+    def _entry(self, bind) -> dict:
+        return self._entries.setdefault(
+            bind, {'version': 0, 'loaded_key': None, 'products': []}
+        )
+
+    def get(self, bind, loader, db_version: int = None) -> list[dict]:
+        """
+        Retorna o catálogo do banco, recarregando-o se estiver desatualizado.
+        :param bind: Engine do banco.
+        :param loader: Função que lê o catálogo do banco.
+        :param db_version: Versão do catálogo gravada no banco (opcional).
+        :return: Cópia da lista (os dicionários são compartilhados).
+        """
+        with self._lock:
+            entry = self._entry(bind)
+            key = (entry['version'], db_version)
+            if entry['loaded_key'] != key:
+                entry['products'] = loader()
+                entry['loaded_key'] = key
+            return list(entry['products'])
+
+    def invalidate(self, bind) -> None:
+        """
+        Marca o catálogo do banco como desatualizado.
+        :param bind: Engine do banco.
+        """
+        with self._lock:
+            self._entry(bind)['version'] += 1
+
+    def version(self, bind) -> int:
+        """
+        Retorna a versão atual do catálogo do banco.
+        :param bind: Engine do banco.
+        """
+        with self._lock:
+            return self._entry(bind)['version']
+
+
+catalog_cache = CatalogCache()
+
+# Categorias oferecidas nos formulários e filtros das páginas
+PRODUCT_CATEGORIES = ('Sobremesa', 'Bebidas', 'Salgados')
+
+# Colunas lidas nas listagens, na ordem esperada por _row_to_dict
+_LIST_COLUMNS = (
+    Product.product_id,
+    Product.name,
+    Product.description,
+    Product.price,
+    Product.category,
+)
+
+# Bancos (engines) que possuem o índice FTS5 product_fts
+_search_index_available = weakref.WeakKeyDictionary()
+# Engines com a tabela catalog_version (criada pela migração v0009)
+_catalog_version_available = weakref.WeakKeyDictionary()
+
+
 class ProductController:
     def __init__(self, session: Session):
         """
@@ -11,24 +96,40 @@ class ProductController:
         """
         self.session = session
 
-    def create_product(
-        self, name: str, description: str, price: float
-    ) -> Product:
+    @staticmethod
+    def validate_product(name: str, description: str, price: Decimal) -> None:
         """
-        Cria um novo produto no banco de dados.
+        Valida os campos obrigatórios de um produto.
         :param name: Nome do produto.
         :param description: Descrição do produto.
         :param price: Preço do produto.
-        :return: O produto criado.
+        :raises: ValueError se algum campo estiver vazio ou o preço não for
+            positivo.
         """
         if not name or not description or price is None or price <= 0:
             raise ValueError(
                 'Todos os campos obrigatórios devem ser preenchidos corretamente.'
             )
 
-        new_product = Product(name=name, description=description, price=price)
+    def create_product(
+        self, name: str, description: str, price: Decimal, category: str = None
+    ) -> Product:
+        """
+        Cria um novo produto no banco de dados.
+        :param name: Nome do produto.
+        :param description: Descrição do produto.
+        :param price: Preço do produto.
+        :param category: Categoria do produto (opcional).
+        :return: O produto criado.
+        """
+        self.validate_product(name, description, price)
+
+        new_product = Product(
+            name=name, description=description, price=price, category=category
+        )
         self.session.add(new_product)
         self.session.commit()
+        self._invalidate_catalog()
         return new_product
 
     def get_product_by_id(self, product_id: int) -> Product:
@@ -48,7 +149,8 @@ class ProductController:
         product_id: int,
         name: str = None,
         description: str = None,
-        price: float = None,
+        price: Decimal = None,
+        category: str = None,
     ) -> Product:
         """
         Atualiza um produto existente.
@@ -56,13 +158,11 @@ class ProductController:
         :param name: Novo nome (opcional).
         :param description: Nova descrição (opcional).
         :param price: Novo preço (opcional).
+        :param category: Nova categoria (opcional).
         :return: Produto atualizado.
         :raises: NoResultFound se o produto não for encontrado.
         """
-        if not name or not description or price is None or price <= 0:
-            raise ValueError(
-                'Todos os campos obrigatórios devem ser preenchidos corretamente.'
-            )
+        self.validate_product(name, description, price)
 
         product = self.get_product_by_id(product_id)
 
@@ -72,8 +172,11 @@ class ProductController:
             product.description = description
         if price is not None:
             product.price = price
+        if category is not None:
+            product.category = category
 
         self.session.commit()
+        self._invalidate_catalog()
         return product
 
     def delete_product(self, product_id: int) -> None:
@@ -85,6 +188,7 @@ class ProductController:
         product = self.get_product_by_id(product_id)
         self.session.delete(product)
         self.session.commit()
+        self._invalidate_catalog()
 
     def delete_all_products(self) -> None:
         """
@@ -95,23 +199,198 @@ class ProductController:
             # Deleta todos os registros da tabela Product
             self.session.query(Product).delete()
             self.session.commit()
+            self._invalidate_catalog()
             print('Todos os produtos foram deletados com sucesso.')
         except Exception as e:
             self.session.rollback()
             print(f'Erro ao deletar todos os produtos: {e}')
 
-    def list_products(self) -> list[Product]:
-        """
-        Lista todos os produtos no banco de dados.
-        :return: Lista de instâncias de Product.
-        """
-        products = self.session.query(Product).all()
-        return [
-            {
-                'id': product.product_id,
-                'name': product.name,
-                'description': product.description,
-                'price': product.price,
-            }
-            for product in products
-        ]
+    def list_products(
+        self, after_id: int = None, limit: int = None
+    ) -> list[dict]:
+        """
+        Lista os produtos em ordem de ID, servidos pelo cache do processo.
+        Com after_id/limit, retorna uma página por keyset (produtos com ID
+        maior que after_id, no máximo limit), recortada do catálogo em
+        memória.
+        :param after_id: Último ID da página anterior (opcional).
+        :param limit: Tamanho da página (opcional).
+        :return: Lista de dicionários representando cada produto.
+        """
+        products = catalog_cache.get(
+            self.session.get_bind(),
+            self._load_products,
+            self._catalog_version(),
+        )
+        start = 0
+        if after_id is not None:
+            start = bisect_right(
+                products, after_id, key=lambda product: product['id']
+            )
+        end = None if limit is None else start + limit
+        return products[start:end]
+
+    def _load_products(self) -> list[dict]:
+        products = self.session.query(Product).order_by(Product.product_id)
+        return [self._to_dict(product) for product in products]
+
+    @staticmethod
+    def _to_dict(product: Product) -> dict:
+        return {
+            'id': product.product_id,
+            'name': product.name,
+            'description': product.description,
+            'price': product.price,
+            'category': product.category,
+        }
+
+    def search_products(
+        self, text_query: str, limit: int = 50, offset: int = 0
+    ) -> list[dict]:
+        """
+        Busca produtos por nome e descrição, com resultados ordenados por
+        relevância e paginados. Cada palavra é tratada como prefixo.
+        :param text_query: Texto digitado na busca.
+        :param limit: Quantidade máxima de resultados.
+        :param offset: Quantidade de resultados a pular (paginação).
+        :return: Lista de dicionários representando cada produto encontrado.
+        """
+        terms = text_query.split()
+        if not terms:
+            return []
+
+        if self._has_search_index():
+            rows = self.session.execute(
+                text(
+                    'SELECT p.product_id, p.name, p.description, p.price, '
+                    'p.category '
+                    'FROM product_fts '
+                    'JOIN product p ON p.product_id = product_fts.rowid '
+                    'WHERE product_fts MATCH :match '
+                    'ORDER BY bm25(product_fts, 10.0, 1.0) '
+                    'LIMIT :limit OFFSET :offset'
+                ).columns(*_LIST_COLUMNS),
+                {
+                    'match': self._fts_match(terms),
+                    'limit': limit,
+                    'offset': offset,
+                },
+            )
+        else:
+            rows = self.session.execute(
+                select(*_LIST_COLUMNS)
+                .where(self._like_filter(terms))
+                .order_by(Product.name)
+                .limit(limit)
+                .offset(offset)
+            )
+
+        return [self._row_to_dict(row) for row in rows]
+
+    def query_products(  # noqa: PLR0913, PLR0917
+        self,
+        category: str = None,
+        price_min: Decimal = None,
+        price_max: Decimal = None,
+        text: str = None,
+        after_id: int = None,
+        limit: int = None,
+    ) -> list[dict]:
+        """
+        Filtra os produtos no banco, usando o índice (category, price) e o
+        índice de busca textual. Resultados em ordem de ID, paginados por
+        keyset. Sem filtros, a página é recortada do catálogo em cache.
+        :param category: Categoria exata (opcional).
+        :param price_min: Preço mínimo, inclusivo (opcional).
+        :param price_max: Preço máximo, inclusivo (opcional).
+        :param text: Texto buscado em nome e descrição (opcional).
+        :param after_id: Último ID da página anterior (opcional).
+        :param limit: Tamanho da página (opcional).
+        :return: Lista de dicionários representando cada produto encontrado.
+        """
+        terms = text.split() if text else []
+        if category is None and price_min is None and price_max is None:
+            if not terms:
+                return self.list_products(after_id, limit)
+
+        query = select(*_LIST_COLUMNS).order_by(Product.product_id)
+
+        if category is not None:
+            query = query.where(Product.category == category)
+        if price_min is not None:
+            query = query.where(Product.price >= price_min)
+        if price_max is not None:
+            query = query.where(Product.price <= price_max)
+        if terms:
+            if self._has_search_index():
+                query = query.where(
+                    Product.product_id.in_(
+                        select(literal_column('rowid'))
+                        .select_from(table('product_fts'))
+                        .where(
+                            literal_column('product_fts').op('MATCH')(
+                                self._fts_match(terms)
+                            )
+                        )
+                    )
+                )
+            else:
+                query = query.where(self._like_filter(terms))
+        if after_id is not None:
+            query = query.where(Product.product_id > after_id)
+        if limit is not None:
+            query = query.limit(limit)
+
+        return [self._row_to_dict(row) for row in self.session.execute(query)]
+
+    @staticmethod
+    def _fts_match(terms: list[str]) -> str:
+        # Cada palavra vira um prefixo entre aspas, para que o texto
+        # digitado não seja interpretado como sintaxe do FTS5
+        return ' '.join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+    @staticmethod
+    def _like_filter(terms: list[str]):
+        return and_(*[
+            or_(
+                Product.name.ilike(f'%{term}%'),
+                Product.description.ilike(f'%{term}%'),
+            )
+            for term in terms
+        ])
+
+    @staticmethod
+    def _row_to_dict(row) -> dict:
+        product_id, name, description, price, category = row
+        return {
+            'id': product_id,
+            'name': name,
+            'description': description,
+            'price': price,
+            'category': category,
+        }
+
+    def _has_search_index(self) -> bool:
+        # Inspeciona pela conexão da sessão, sem abrir outra transação
+        engine = self.session.get_bind().engine
+        if engine not in _search_index_available:
+            _search_index_available[engine] = inspect(
+                self.session.connection()
+            ).has_table('product_fts')
+        return _search_index_available[engine]
+
+    def _catalog_version(self) -> int | None:
+        # Lida na mesma transação do carregamento, que vê o mesmo instantâneo
+        engine = self.session.get_bind().engine
+        if engine not in _catalog_version_available:
+            _catalog_version_available[engine] = inspect(
+                self.session.connection()
+            ).has_table('catalog_version')
+        if not _catalog_version_available[engine]:
+            return None
+        return self.session.execute(
+            text('SELECT version FROM catalog_version WHERE id = 1')
+        ).scalar()
+
+    def _invalidate_catalog(self) -> None:
+        catalog_cache.invalidate(self.session.get_bind())
@@ -0,0 +1,226 @@
+# Report Controller
+import datetime as dt
+from collections.abc import Iterator
+
+import pandas as pd
+from sqlalchemy import Integer, func, select, type_coerce
+from sqlalchemy.orm import Session
+
+from Controllers.DailySalesController import sold_cost_cents
+from Controllers.StorageController import average_cost_query
+from models import (
+    VOIDED_PAYMENT_STATUSES,
+    DailyProductSales,
+    ItemSale,
+    Product,
+    Sale,
+)
+
+# Formato do strftime do SQLite para cada granularidade de período
+PERIOD_FORMATS = {
+    'hour': '%Y-%m-%d %H:00',
+    'day': '%Y-%m-%d',
+    'month': '%Y-%m',
+}
+
+# Colunas em centavos que viram reais (float) nos DataFrames
+_CENTS_COLUMNS = {
+    'revenue_cents': 'revenue',
+    'cost_cents': 'cost',
+    'margin_cents': 'margin',
+}
+
+
+def _cents(column):
+    # Lê a coluna Money como inteiro, sem converter para Decimal linha a linha
+    return type_coerce(column, Integer)
+
+
+class ReportController:
+    def __init__(self, session: Session):
+        """
+        Inicializa o controlador com uma sessão SQLAlchemy.
+        :param session: Instância de Session do SQLAlchemy.
+        """
+        self.session = session
+
+    def revenue_by_period(
+        self,
+        period: str = 'day',
+        start: dt.datetime = None,
+        end: dt.datetime = None,
+        chunksize: int = None,
+    ) -> pd.DataFrame | Iterator[pd.DataFrame]:
+        """
+        Faturamento agrupado por hora, dia ou mês (horário local).
+        :param period: Granularidade: 'hour', 'day' ou 'month'.
+        :param start: Início do intervalo, inclusivo (opcional).
+        :param end: Fim do intervalo, exclusivo (opcional).
+        :param chunksize: Se informado, retorna um iterador de DataFrames
+            com esse número de linhas.
+        :return: DataFrame com as colunas period, sales e revenue.
+        :raises: ValueError se o período for inválido.
+        """
+        if period not in PERIOD_FORMATS:
+            raise ValueError(f'Período inválido: {period}')
+
+        bucket = func.strftime(
+            PERIOD_FORMATS[period],
+            type_coerce(Sale.datetime, Integer),
+            'unixepoch',
+            'localtime',
+        ).label('period')
+        query = (
+            select(
+                bucket,
+                func.count().label('sales'),
+                func.sum(_cents(Sale.total_sale)).label('revenue_cents'),
+            )
+            .where(*self._period_filter(start, end))
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+        return self._read(query, chunksize)
+
+    def product_sales(
+        self,
+        start: dt.datetime = None,
+        end: dt.datetime = None,
+        limit: int = None,
+        chunksize: int = None,
+    ) -> pd.DataFrame | Iterator[pd.DataFrame]:
+        """
+        Unidades vendidas e faturamento por produto, do maior faturamento
+        para o menor (ex.: limit=10 para os produtos mais vendidos).
+        :param start: Início do intervalo, inclusivo (opcional).
+        :param end: Fim do intervalo, exclusivo (opcional).
+        :param limit: Quantidade máxima de produtos (opcional).
+        :param chunksize: Se informado, retorna um iterador de DataFrames
+            com esse número de linhas.
+        :return: DataFrame com as colunas product_id, name, units e revenue.
+        """
+        units, revenue = self._item_totals()
+        query = (
+            select(Product.product_id, Product.name, units, revenue)
+            .join(ItemSale, ItemSale.product_id == Product.product_id)
+            .join(Sale, Sale.sale_id == ItemSale.sale_id)
+            .where(*self._period_filter(start, end))
+            .group_by(Product.product_id)
+            .order_by(revenue.desc(), Product.product_id)
+            .limit(limit)
+        )
+        return self._read(query, chunksize)
+
+    def product_margin(
+        self,
+        start: dt.datetime = None,
+        end: dt.datetime = None,
+        chunksize: int = None,
+    ) -> pd.DataFrame | Iterator[pd.DataFrame]:
+        """
+        Margem por produto: faturamento menos o custo das unidades vendidas,
+        usando o custo gravado em cada item (ou, nos itens sem custo, o
+        custo médio ponderado das entradas de estoque).
+        :param start: Início do intervalo, inclusivo (opcional).
+        :param end: Fim do intervalo, exclusivo (opcional).
+        :param chunksize: Se informado, retorna um iterador de DataFrames
+            com esse número de linhas.
+        :return: DataFrame com as colunas product_id, name, units, revenue,
+            cost e margin.
+        """
+        average_cost = average_cost_query().subquery()
+        units, revenue = self._item_totals()
+        cost = sold_cost_cents(average_cost)
+        query = (
+            select(
+                Product.product_id,
+                Product.name,
+                units,
+                revenue,
+                cost.label('cost_cents'),
+                (revenue - cost).label('margin_cents'),
+            )
+            .join(ItemSale, ItemSale.product_id == Product.product_id)
+            .join(Sale, Sale.sale_id == ItemSale.sale_id)
+            .outerjoin(
+                average_cost, average_cost.c.product_id == Product.product_id
+            )
+            .where(*self._period_filter(start, end))
+            .group_by(Product.product_id)
+            .order_by(Product.product_id)
+        )
+        return self._read(query, chunksize)
+
+    def daily_sales(
+        self,
+        start: dt.date = None,
+        end: dt.date = None,
+        chunksize: int = None,
+    ) -> pd.DataFrame | Iterator[pd.DataFrame]:
+        """
+        Vendas por dia e produto lidas do consolidado diário, sem percorrer
+        os itens vendidos. Indicado para os painéis.
+        :param start: Primeiro dia, inclusivo (opcional).
+        :param end: Último dia, exclusivo (opcional).
+        :param chunksize: Se informado, retorna um iterador de DataFrames
+            com esse número de linhas.
+        :return: DataFrame com as colunas day, product_id, name, units,
+            revenue, cost e margin.
+        """
+        revenue = _cents(DailyProductSales.revenue)
+        cost = _cents(DailyProductSales.cost)
+        query = (
+            select(
+                DailyProductSales.day,
+                DailyProductSales.product_id,
+                Product.name,
+                DailyProductSales.units,
+                revenue.label('revenue_cents'),
+                cost.label('cost_cents'),
+                (revenue - cost).label('margin_cents'),
+            )
+            .join(Product, Product.product_id == DailyProductSales.product_id)
+            .order_by(DailyProductSales.day, DailyProductSales.product_id)
+        )
+        if start is not None:
+            query = query.where(DailyProductSales.day >= start)
+        if end is not None:
+            query = query.where(DailyProductSales.day < end)
+        return self._read(query, chunksize)
+
+    @staticmethod
+    def _item_totals():
+        # Itens sem preço registrado usam o preço atual do produto
+        units = func.sum(ItemSale.quantityItem)
+        revenue = func.sum(
+            ItemSale.quantityItem
+            * func.coalesce(_cents(ItemSale.unit_price), _cents(Product.price))
+        )
+        return units.label('units'), revenue.label('revenue_cents')
+
+    @staticmethod
+    def _period_filter(start: dt.datetime, end: dt.datetime) -> list:
+        # Comparações feitas sobre o inteiro de época indexado; vendas
+        # estornadas (pagamento recusado ou cancelado) não entram
+        conditions = [Sale.payment_status.not_in(VOIDED_PAYMENT_STATUSES)]
+        if start is not None:
+            conditions.append(Sale.datetime >= start)
+        if end is not None:
+            conditions.append(Sale.datetime < end)
+        return conditions
+
+    def _read(self, query, chunksize: int = None):
+        frames = pd.read_sql(
+            query, self.session.connection(), chunksize=chunksize
+        )
+        if chunksize is None:
+            return self._to_reais(frames)
+        return (self._to_reais(frame) for frame in frames)
+
+    @staticmethod
+    def _to_reais(frame: pd.DataFrame) -> pd.DataFrame:
+        # Soma feita em centavos no banco; conversão só no resultado
+        for cents, reais in _CENTS_COLUMNS.items():
+            if cents in frame:
+                frame[reais] = frame.pop(cents).fillna(0) / 100
+        return frame
@@ -0,0 +1,208 @@
+# Reservation Controller
+import datetime as dt
+
+from sqlalchemy import delete, func, literal, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models import EpochDateTime, StockLevel, StockReservation, current_time
+
+# Validade padrão de uma reserva; renovada a cada alteração do carrinho
+RESERVATION_TTL = dt.timedelta(minutes=15)
+
+
+def reserved_quantity(product_id, now: dt.datetime, cart_id: str = None):
+    """
+    Subconsulta escalar com a soma das reservas vigentes de um produto,
+    exceto as do carrinho informado.
+    :param product_id: Coluna (subconsulta correlacionada) ou ID do produto.
+    :param now: Momento de referência; reservas vencidas não contam.
+    :param cart_id: Carrinho cujas reservas são ignoradas (opcional).
+    :return: Subconsulta escalar (0 se não houver reservas).
+    """
+    query = select(
+        func.coalesce(func.sum(StockReservation.quantity), 0)
+    ).where(
+        StockReservation.product_id == product_id,
+        StockReservation.expires_at > now,
+    )
+    if cart_id is not None:
+        query = query.where(StockReservation.cart_id != cart_id)
+    return query.scalar_subquery()
+
+
+class ReservationController:
+    def __init__(self, session: Session, ttl: dt.timedelta = RESERVATION_TTL):
+        """
+        Inicializa o controlador com uma sessão SQLAlchemy.
+        :param session: Instância de Session do SQLAlchemy.
+        :param ttl: Validade das reservas criadas ou renovadas.
+        """
+        self.session = session
+        self.ttl = ttl
+
+    def reserve(self, cart_id: str, product_id: int, quantity: int) -> int:
+        """
+        Define a quantidade reservada de um produto para um carrinho e
+        renova sua validade. A verificação do saldo (estoque menos as
+        reservas vigentes dos outros carrinhos) e a gravação são uma única
+        instrução, então dois terminais nunca reservam a mesma unidade.
+        :param cart_id: Identificador do carrinho (um por terminal/sessão).
+        :param product_id: ID do produto.
+        :param quantity: Quantidade total desejada no carrinho (0 libera a
+            reserva).
+        :return: Quantidade reservada.
+        :raises: ValueError se o produto não existir no estoque ou o saldo
+            disponível for insuficiente.
+        """
+        if quantity <= 0:
+            self.release(cart_id, product_id)
+            return 0
+
+        now = current_time()
+        # Reservas vencidas do produto deixam de ocupar a chave do carrinho
+        self.session.execute(
+            delete(StockReservation).where(
+                StockReservation.product_id == product_id,
+                StockReservation.expires_at <= now,
+            )
+        )
+        stock = (
+            select(StockLevel.quantity)
+            .where(StockLevel.product_id == product_id)
+            .scalar_subquery()
+        )
+        available = stock - reserved_quantity(product_id, now, cart_id)
+        candidate = select(
+            literal(cart_id),
+            literal(product_id),
+            literal(quantity),
+            literal(now + self.ttl, EpochDateTime),
+        ).where(available >= quantity)
+        statement = sqlite_insert(StockReservation).from_select(
+            ['cart_id', 'product_id', 'quantity', 'expires_at'], candidate
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[
+                StockReservation.cart_id,
+                StockReservation.product_id,
+            ],
+            set_={
+                'quantity': statement.excluded.quantity,
+                'expires_at': statement.excluded.expires_at,
+            },
+        )
+        result = self.session.execute(statement)
+        if result.rowcount == 0:
+            remaining = self.session.scalar(
+                select(stock - reserved_quantity(product_id, now, cart_id))
+            )
+            self.session.rollback()
+            if remaining is None:
+                raise ValueError(
+                    f'Produto com ID {product_id} não encontrado no estoque.'
+                )
+            raise ValueError(
+                f'Estoque insuficiente para o produto ID {product_id}. '
+                f'Quantidade disponível: {max(remaining, 0)}, '
+                f'solicitada: {quantity}.'
+            )
+
+        self.session.commit()
+        return quantity
+
+    def cart_reservations(self, cart_id: str) -> dict[int, int]:
+        """
+        Lista as reservas vigentes de um carrinho.
+        :param cart_id: Identificador do carrinho.
+        :return: Dicionário {product_id: quantidade reservada}.
+        """
+        rows = self.session.execute(
+            select(
+                StockReservation.product_id, StockReservation.quantity
+            ).where(
+                StockReservation.cart_id == cart_id,
+                StockReservation.expires_at > current_time(),
+            )
+        )
+        return {product_id: quantity for product_id, quantity in rows}
+
+    def refresh(self, cart_id: str) -> int:
+        """
+        Renova a validade das reservas vigentes de um carrinho.
+        :param cart_id: Identificador do carrinho.
+        :return: Quantidade de reservas renovadas.
+        """
+        now = current_time()
+        result = self.session.execute(
+            update(StockReservation)
+            .where(
+                StockReservation.cart_id == cart_id,
+                StockReservation.expires_at > now,
+            )
+            .values(expires_at=now + self.ttl)
+        )
+        self.session.commit()
+        return result.rowcount
+
+    def renew_cart(
+        self, cart_id: str, quantities: dict[int, int]
+    ) -> list[int]:
+        """
+        Mantém reservadas as quantidades de um carrinho aberto: renova as
+        reservas vigentes e reserva de novo as que venceram, se ainda houver
+        saldo disponível.
+        :param cart_id: Identificador do carrinho.
+        :param quantities: Dicionário {product_id: quantidade no carrinho}.
+        :return: IDs dos produtos que não puderam ser reservados de novo.
+        """
+        self.refresh(cart_id)
+        reserved = self.cart_reservations(cart_id)
+        lost = []
+        for product_id, quantity in quantities.items():
+            if reserved.get(product_id, 0) >= quantity:
+                continue
+            try:
+                self.reserve(cart_id, product_id, quantity)
+            except ValueError:
+                lost.append(product_id)
+        return lost
+
+    def release(self, cart_id: str, product_id: int = None) -> int:
+        """
+        Libera as reservas de um carrinho (ou só as de um produto).
+        :param cart_id: Identificador do carrinho.
+        :param product_id: ID do produto (opcional).
+        :return: Quantidade de reservas removidas.
+        """
+        count = self.consume(cart_id, product_id)
+        self.session.commit()
+        return count
+
+    def consume(self, cart_id: str, product_id: int = None) -> int:
+        """
+        Remove as reservas de um carrinho sem fazer commit; usado pelo
+        checkout na mesma transação da baixa de estoque.
+        :param cart_id: Identificador do carrinho.
+        :param product_id: ID do produto (opcional).
+        :return: Quantidade de reservas removidas.
+        """
+        query = delete(StockReservation).where(
+            StockReservation.cart_id == cart_id
+        )
+        if product_id is not None:
+            query = query.where(StockReservation.product_id == product_id)
+        return self.session.execute(query).rowcount
+
+    def purge_expired(self) -> int:
+        """
+        Remove as reservas vencidas de todos os carrinhos.
+        :return: Quantidade de reservas removidas.
+        """
+        result = self.session.execute(
+            delete(StockReservation).where(
+                StockReservation.expires_at <= current_time()
+            )
+        )
+        self.session.commit()
+        return result.rowcount
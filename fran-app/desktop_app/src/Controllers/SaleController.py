@@ -1,9 +1,23 @@
-from sqlalchemy.orm import Session
+from decimal import Decimal
 
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.orm import Session, selectinload
+
+from Controllers.DailySalesController import DailySalesController
+from Controllers.OutboxController import OutboxController
+from Controllers.ReservationController import ReservationController
 from Controllers.StorageController import (
     StorageController,  # Importar o controlador de estoque
 )
-from models import ItemSale, Sale
+from models import (
+    PAYMENT_APPROVED,
+    VOIDED_PAYMENT_STATUSES,
+    ItemSale,
+    Product,
+    Sale,
+    StockLevel,
+    Storage,
+)
 
 
 class SaleController:
@@ -17,48 +31,181 @@ class SaleController:
         """
         self.session = session
         self.storage_controller = storage_controller
+        self.outbox_controller = OutboxController(session)
+        self.daily_sales_controller = DailySalesController(session)
+        self.reservation_controller = ReservationController(session)
 
-    def create_sale(
+    def checkout(  # noqa: PLR0913, PLR0917
         self,
-        total_sale: float,
+        total_sale: Decimal,
         item_sales: list[dict],
-        storage_controller: StorageController,
+        cart_id: str = None,
+        payment_method: str = None,
+        payment_status: str = PAYMENT_APPROVED,
+        payment_key: str = None,
     ) -> Sale:
         """
-        Cria uma nova venda no banco de dados e atualiza o estoque.
+        Registra uma venda completa em uma única transação: baixa o estoque
+        de todos os produtos com um lote de UPDATEs condicionais, grava a
+        venda e a baixa no livro de estoque, insere os itens em lote,
+        atualiza o consolidado diário, consome as reservas do carrinho e faz
+        um único commit.
+        Vendas pagas pelo PSP são gravadas como pendentes e depois aprovadas
+        ou estornadas pelo PaymentController.
         :param total_sale: Total da venda.
-        :param item_sales: Lista de dicionários contendo as informações dos itens de venda (product_id, quantityItem).
-        :param storage_controller: Instância do StorageController para manipular o estoque.
+        :param item_sales: Lista de dicionários contendo as informações dos
+            itens de venda (product_id, quantityItem).
+        :param cart_id: Carrinho cujas reservas cobrem a venda (opcional).
+        :param payment_method: Forma de pagamento (opcional).
+        :param payment_status: Situação do pagamento (padrão: aprovado).
+        :param payment_key: Chave de idempotência da cobrança no PSP
+            (opcional).
         :return: A venda criada.
+        :raises: ValueError se o carrinho estiver vazio, o estoque for
+            insuficiente ou ocorrer erro na gravação.
         """
-        try:
-            # Criar a venda
-            new_sale = Sale(total_sale=total_sale)
-            self.session.add(new_sale)
-            self.session.commit()  # Comita para obter o ID da venda
-
-            # Criar registros de ItemSale associados à venda
-            for item in item_sales:
-                product_id = item['product_id']
-                quantity_sold = item['quantityItem']
-
-                # Atualiza o estoque antes de registrar a venda
-                storage_controller.update_stock(product_id, -quantity_sold)
-
-                # Criar item da venda
-                new_item_sale = ItemSale(
-                    sale_id=new_sale.sale_id,
-                    product_id=product_id,
-                    quantityItem=quantity_sold,
-                )
-                self.session.add(new_item_sale)
+        if not item_sales:
+            raise ValueError('A venda precisa ter ao menos um item.')
 
+        # Agrupa linhas repetidas do mesmo produto
+        quantities: dict[int, int] = {}
+        for item in item_sales:
+            product_id = item['product_id']
+            quantities[product_id] = (
+                quantities.get(product_id, 0) + item['quantityItem']
+            )
+
+        new_sale = Sale(
+            total_sale=total_sale,
+            payment_status=payment_status,
+            payment_method=payment_method,
+            payment_key=payment_key,
+        )
+        try:
+            self._write_checkout(new_sale, quantities, cart_id)
             self.session.commit()
             return new_sale
+        except ValueError:
+            self.session.rollback()
+            raise
         except Exception as e:
             self.session.rollback()  # Reverte alterações em caso de erro
             raise ValueError(f'Erro ao criar a venda: {str(e)}')
 
+    def _write_checkout(
+        self, sale: Sale, quantities: dict[int, int], cart_id: str = None
+    ) -> None:
+        """
+        Grava uma venda do checkout sem fazer commit: baixa o estoque,
+        consome as reservas, insere a venda, a baixa no livro de estoque e
+        os itens e atualiza o consolidado diário e a outbox.
+        :param sale: Venda ainda não gravada.
+        :param quantities: Dicionário {product_id: quantidade vendida}.
+        :param cart_id: Carrinho cujas reservas cobrem a venda (opcional).
+        :raises: ValueError se o estoque for insuficiente.
+        """
+        self.storage_controller.decrement_stock_many(
+            list(quantities.items()), cart_id
+        )
+        if cart_id is not None:
+            self.reservation_controller.consume(cart_id)
+
+        # Preço vigente de cada produto, gravado junto do item vendido
+        unit_prices = dict(
+            self.session.execute(
+                select(Product.product_id, Product.price).where(
+                    Product.product_id.in_(quantities)
+                )
+            ).all()
+        )
+
+        self.session.add(sale)
+        self.session.flush()  # Obtém o ID da venda sem comitar
+
+        # Baixa registrada no livro de estoque pelo custo médio atual,
+        # o mesmo gravado nos itens e lançado no consolidado
+        unit_costs = self.storage_controller.unit_costs(list(quantities))
+        self.storage_controller.add_movements(
+            [
+                (product_id, -quantity, unit_costs.get(product_id, 0))
+                for product_id, quantity in quantities.items()
+            ],
+            sale.sale_id,
+        )
+
+        self.session.execute(
+            insert(ItemSale),
+            [
+                {
+                    'sale_id': sale.sale_id,
+                    'product_id': product_id,
+                    'quantityItem': quantity_sold,
+                    'unit_price': unit_prices.get(product_id),
+                    'unit_cost': unit_costs.get(product_id),
+                }
+                for product_id, quantity_sold in quantities.items()
+            ],
+        )
+
+        # Consolidado diário atualizado na mesma transação da venda
+        self.daily_sales_controller.add_sale(
+            sale.datetime.date(),
+            [
+                (
+                    product_id,
+                    quantity,
+                    unit_prices.get(product_id),
+                    unit_costs.get(product_id),
+                )
+                for product_id, quantity in quantities.items()
+            ],
+        )
+
+        # Registra o evento de envio na mesma transação da venda
+        self.outbox_controller.enqueue(
+            'sale.created',
+            {
+                'sale_id': sale.sale_id,
+                'datetime': sale.datetime,
+                'total_sale': sale.total_sale,
+                'payment_status': sale.payment_status,
+                'items': [
+                    {
+                        'product_id': product_id,
+                        'quantityItem': quantity,
+                        'unit_price': unit_prices.get(product_id),
+                    }
+                    for product_id, quantity in quantities.items()
+                ],
+            },
+        )
+
+    def create_sale(
+        self,
+        total_sale: Decimal,
+        item_sales: list[dict],
+        storage_controller: StorageController = None,
+    ) -> Sale:
+        """
+        Cria uma nova venda no banco de dados e atualiza o estoque.
+        :param total_sale: Total da venda.
+        :param item_sales: Lista de dicionários contendo as informações dos
+            itens de venda (product_id, quantityItem).
+        :param storage_controller: Controlador que baixa o estoque (padrão: o
+            da instância).
+        :return: A venda criada.
+        :raises: ValueError se o carrinho estiver vazio ou o estoque for
+            insuficiente.
+        """
+        if (
+            storage_controller is not None
+            and storage_controller is not self.storage_controller
+        ):
+            return SaleController(self.session, storage_controller).checkout(
+                total_sale=total_sale, item_sales=item_sales
+            )
+        return self.checkout(total_sale=total_sale, item_sales=item_sales)
+
     def get_sale_by_id(self, sale_id: int) -> Sale:
         """
         Recupera uma venda pelo ID.
@@ -69,9 +216,10 @@ class SaleController:
         sale = self.session.query(Sale).filter_by(sale_id=sale_id).one()
         return sale
 
-    def update_sale(self, sale_id: int, total_sale: float = None) -> Sale:
+    def update_sale(self, sale_id: int, total_sale: Decimal = None) -> Sale:
         """
-        Atualiza uma venda existente.
+        Atualiza o total de uma venda existente. Os itens não mudam, então
+        o estoque e o consolidado diário (calculado pelos itens) também não.
         :param sale_id: ID da venda.
         :param total_sale: Novo total da venda (opcional).
         :return: Venda atualizada.
@@ -81,19 +229,74 @@ class SaleController:
 
         if total_sale is not None:
             sale.total_sale = total_sale
+            self.outbox_controller.enqueue(
+                'sale.updated',
+                {'sale_id': sale_id, 'total_sale': sale.total_sale},
+            )
 
         self.session.commit()
         return sale
 
     def delete_sale(self, sale_id: int) -> None:
         """
-        Deleta uma venda pelo ID.
+        Deleta uma venda pelo ID. Se ela ainda não foi estornada, os itens
+        voltam ao estoque e saem do consolidado diário pelo preço e custo
+        gravados; as baixas da venda saem do livro de estoque.
         :param sale_id: ID da venda.
         :raises: NoResultFound se a venda não for encontrada.
         """
         sale = self.get_sale_by_id(sale_id)
-        self.session.delete(sale)
-        self.session.commit()
+        self.outbox_controller.enqueue('sale.deleted', {'sale_id': sale_id})
+        try:
+            if sale.payment_status not in VOIDED_PAYMENT_STATUSES:
+                self.restore_items(sale_id)
+            self.session.execute(
+                delete(Storage).where(Storage.sale_id == sale_id)
+            )
+            self.session.delete(sale)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+    def restore_items(self, sale_id: int) -> None:
+        """
+        Devolve ao saldo do estoque os itens de uma venda e os desconta do
+        consolidado diário pelo preço e custo gravados em cada item, sem
+        fazer commit (usado no estorno e na exclusão da venda).
+        :param sale_id: ID da venda.
+        """
+        sale_day = self.session.scalar(
+            select(Sale.datetime).where(Sale.sale_id == sale_id)
+        ).date()
+        lines = self.session.execute(
+            select(
+                ItemSale.product_id,
+                ItemSale.quantityItem,
+                ItemSale.unit_price,
+                ItemSale.unit_cost,
+            ).where(ItemSale.sale_id == sale_id)
+        ).all()
+        if not lines:
+            return
+
+        stock_level = StockLevel.__table__
+        self.session.execute(
+            update(stock_level)
+            .where(stock_level.c.product_id == bindparam('b_product_id'))
+            .values(quantity=stock_level.c.quantity + bindparam('b_quantity')),
+            [
+                {'b_product_id': product_id, 'b_quantity': quantity}
+                for product_id, quantity, _, _ in lines
+            ],
+        )
+        self.daily_sales_controller.add_sale(
+            sale_day,
+            [
+                (product_id, -quantity, unit_price, unit_cost)
+                for product_id, quantity, unit_price, unit_cost in lines
+            ],
+        )
 
     def delete_all_sales(self) -> None:
         """
@@ -109,32 +312,67 @@ class SaleController:
             self.session.rollback()
             print(f'Erro ao deletar todas as vendas: {e}')
 
-    def list_sales(self) -> list[Sale]:
+    def list_sales(self, with_items: bool = False) -> list[Sale]:
         """
         Lista todas as vendas no banco de dados.
+        :param with_items: Se True, carrega também os itens e seus produtos
+            (duas consultas no total).
         :return: Lista de instâncias de Sale.
         """
-        sales = self.session.query(Sale).all()
-        return sales
+        query = self.session.query(Sale).order_by(Sale.sale_id)
+        if with_items:
+            query = query.options(self._items_with_products())
+        return query.all()
+
+    def get_sale_details(self, sale_id: int) -> dict:
+        """
+        Recupera uma venda com seus itens e os nomes dos produtos, em duas
+        consultas (venda; itens com produtos). Itens de produtos já
+        excluídos vêm com o nome None.
+        :param sale_id: ID da venda.
+        :return: Dicionário com os dados da venda e a lista de itens.
+        :raises: NoResultFound se a venda não for encontrada.
+        """
+        sale = (
+            self.session.query(Sale)
+            .options(self._items_with_products())
+            .filter_by(sale_id=sale_id)
+            .one()
+        )
+        return {
+            'sale_id': sale.sale_id,
+            'datetime': sale.datetime,
+            'total_sale': sale.total_sale,
+            'payment_status': sale.payment_status,
+            'items': [
+                {
+                    'product_id': item.product_id,
+                    # Produto excluído depois da venda: o item fica sem nome
+                    'name': item.product.name if item.product else None,
+                    'quantity': item.quantityItem,
+                    'unit_price': item.unit_price,
+                }
+                for item in sale.items
+            ],
+        }
+
+    @staticmethod
+    def _items_with_products():
+        # Itens em uma consulta IN por lote de vendas, já com o produto
+        return selectinload(Sale.items).joinedload(ItemSale.product)
 
-    def process_sale(self, total_sale: float, item_sales: list[dict]) -> Sale:
+    def process_sale(
+        self, total_sale: Decimal, item_sales: list[dict], cart_id: str = None
+    ) -> Sale:
         """
         Processa uma nova venda, ajustando o estoque para os itens vendidos.
         :param total_sale: Total da venda.
-        :param item_sales: Lista de dicionários contendo as informações dos itens de venda (product_id, quantityItem).
+        :param item_sales: Lista de dicionários contendo as informações dos
+            itens de venda (product_id, quantityItem).
+        :param cart_id: Carrinho cujas reservas cobrem a venda (opcional).
         :return: A venda criada.
         :raises: ValueError se houver erro no estoque.
         """
-        # Ajustar o estoque para cada item vendido
-        for item in item_sales:
-            product_id = item['product_id']
-            quantity_sold = item['quantityItem']
-
-            # Chama o método do StorageController para remover os produtos vendidos
-            self.storage_controller.remove_sold_products(
-                product_id=product_id, quantity_sold=quantity_sold
-            )
-
-        # Após ajustar o estoque, cria a venda
-        sale = self.create_sale(total_sale=total_sale, item_sales=item_sales)
-        return sale
+        return self.checkout(
+            total_sale=total_sale, item_sales=item_sales, cart_id=cart_id
+        )
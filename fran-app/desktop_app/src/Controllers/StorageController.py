@@ -1,6 +1,42 @@
+from decimal import Decimal
+
+from sqlalchemy import (
+    Integer,
+    bindparam,
+    func,
+    insert,
+    select,
+    type_coerce,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
-from models import Storage
+from Controllers.OutboxController import OutboxController
+from Controllers.ReservationController import reserved_quantity
+from models import StockLevel, Storage, current_time
+
+
+def average_cost_query():
+    """
+    Consulta do custo unitário médio de cada produto, em centavos, ponderado
+    pela quantidade das entradas. Baixas, ajustes negativos e estornos de
+    vendas não entram.
+    :return: Select com as colunas product_id e unit_cost.
+    """
+    cost_cents = type_coerce(Storage.cost, Integer)
+    return (
+        select(
+            Storage.product_id,
+            (
+                func.sum(cost_cents * Storage.quantity)
+                * 1.0
+                / func.sum(Storage.quantity)
+            ).label('unit_cost'),
+        )
+        .where(Storage.quantity > 0, Storage.sale_id.is_(None))
+        .group_by(Storage.product_id)
+    )
 
 
 class StorageController:
@@ -10,14 +46,16 @@ class StorageController:
         :param session: Instância de Session do SQLAlchemy.
         """
         self.session = session
+        self.outbox_controller = OutboxController(session)
 
     def create_registry(
-        self, product_id: int, quantity: int, cost: float
+        self, product_id: int, quantity: int, cost: Decimal
     ) -> Storage:
         """
-        Cria um novo produto na tabela estoque.
+        Registra uma entrada de um produto no estoque e soma a quantidade
+        ao saldo atual do produto.
         :param product_id: ID do produto.
-        :param quantity: Quantidade inicial do produto.
+        :param quantity: Quantidade que entrou no estoque.
         :param cost: Preço unitário do produto.
         :return: O registro criado no estoque.
         """
@@ -27,17 +65,22 @@ class StorageController:
             cost=cost,
         )
         self.session.add(new_registry)
+        self._add_to_stock_level(product_id, quantity)
+        self.enqueue_stock_updated({product_id: quantity})
         self.session.commit()
         return new_registry
 
     def get_registry_by_id(self, id: int) -> Storage:
         """
-        Recupera um produto registrado na tabela estoque pelo ID.
-        :param id: ID da entrada no estoque.
+        Recupera a entrada mais recente de um produto na tabela estoque.
+        :param id: ID do produto.
         :return: Instância de Storage correspondente.
         """
         storage = (
-            self.session.query(Storage).filter_by(product_id=id).one_or_none()
+            self.session.query(Storage)
+            .filter_by(product_id=id)
+            .order_by(Storage.entry_id.desc())
+            .first()
         )
         if not storage:
             raise ValueError(
@@ -46,47 +89,70 @@ class StorageController:
         return storage
 
     def update_registry(
-        self, product_id: int, quantity: int = None, cost: float = None
+        self, product_id: int, quantity: int = None, cost: Decimal = None
     ) -> Storage:
         """
-        Atualiza um produto existente na tabela estoque.
+        Ajusta um produto existente na tabela estoque. O ajuste é gravado
+        como uma nova entrada com a diferença para o saldo atual. O custo
+        médio vem só das entradas, então o custo informado vale apenas para
+        a entrada de ajuste e não pode ser alterado sozinho.
         :param product_id: ID do produto.
         :param quantity: Nova quantidade (opcional).
-        :param cost: Novo preço unitário (opcional).
-        :return: Registro atualizado.
-        :raises: ValueError se nenhum dado válido for fornecido ou se o produto não existir.
+        :param cost: Custo unitário da entrada de ajuste (opcional).
+        :return: Entrada de ajuste (ou a última, se o saldo não mudou).
+        :raises: ValueError se o produto não existir ou se o custo for
+            informado sem alteração de quantidade.
         """
-        storage = (
+        last_entry = (
             self.session.query(Storage)
             .filter_by(product_id=product_id)
-            .one_or_none()
+            .order_by(Storage.entry_id.desc())
+            .first()
         )
-        if not storage:
+        if not last_entry:
             raise ValueError(
                 f'Produto com ID {product_id} não encontrado no estoque.'
             )
 
+        delta = 0
         if quantity is not None:
-            storage.quantity = quantity
-        if cost is not None and cost > 0:
-            storage.cost = cost
+            delta = quantity - (self._stock_level(product_id) or 0)
+        if delta == 0:
+            # Sem variação de quantidade não há movimento a registrar, e o
+            # custo de uma entrada sem unidades não mudaria o custo médio
+            if cost is not None:
+                raise ValueError(
+                    'O custo só pode ser informado com uma alteração de '
+                    'quantidade.'
+                )
+            return last_entry
 
+        adjustment = Storage(
+            product_id=product_id,
+            quantity=delta,
+            cost=cost if cost is not None and cost > 0 else last_entry.cost,
+        )
+        self.session.add(adjustment)
+        self._add_to_stock_level(product_id, delta)
+        self.enqueue_stock_updated({product_id: delta})
         self.session.commit()
-        return storage
+        return adjustment
 
     def delete_registry(self, id: int) -> None:
         """
-        Deleta um registro na tabela estoque pelo ID.
-        :param id: ID da entrada no estoque.
+        Deleta as entradas e o saldo de um produto na tabela estoque.
+        :param id: ID do produto.
         :raises: ValueError se o registro não for encontrado.
         """
-        storage = self.get_registry_by_id(id)
-        self.session.delete(storage)
+        self.get_registry_by_id(id)
+        self.session.query(Storage).filter_by(product_id=id).delete()
+        self.session.query(StockLevel).filter_by(product_id=id).delete()
+        self.outbox_controller.enqueue('stock.deleted', {'product_id': id})
         self.session.commit()
 
     def list_storage(self) -> list[dict]:
         """
-        Lista todos os registros na tabela estoque.
+        Lista todas as entradas na tabela estoque.
         :return: Lista de dicionários representando cada registro no estoque.
         """
         storage_list = self.session.query(Storage).all()
@@ -101,35 +167,236 @@ class StorageController:
             for storage in storage_list
         ]
 
-    def remove_sold_products(
-        self, product_id: int, quantity_sold: int
-    ) -> Storage:
+    def decrement_stock(self, product_id: int, quantity: int) -> None:
         """
-        Remove a quantidade vendida de um produto no estoque.
+        Baixa a quantidade de um produto com um UPDATE condicional,
+        sem fazer commit (o chamador controla a transação).
         :param product_id: ID do produto.
-        :param quantity_sold: Quantidade a ser removida.
-        :return: Registro atualizado no estoque.
-        :raises: ValueError se o estoque for insuficiente ou o produto não existir.
+        :param quantity: Quantidade a ser removida.
+        :raises: ValueError se o estoque for insuficiente ou o produto não
+            existir.
         """
-        storage = (
-            self.session.query(Storage)
-            .filter_by(product_id=product_id)
-            .one_or_none()
+        self.decrement_stock_many([(product_id, quantity)])
+
+    def get_stock_many(self, product_ids: list[int]) -> dict[int, int]:
+        """
+        Retorna a quantidade disponível de vários produtos com uma única
+        consulta.
+        :param product_ids: IDs dos produtos.
+        :return: Dicionário {product_id: quantidade}; produtos fora do estoque
+            não aparecem.
+        """
+        rows = self.session.execute(
+            select(StockLevel.product_id, StockLevel.quantity).where(
+                StockLevel.product_id.in_(set(product_ids))
+            )
         )
-        if not storage:
-            raise ValueError(
-                f'Produto com ID {product_id} não encontrado no estoque.'
+        return {product_id: quantity for product_id, quantity in rows}
+
+    def get_available_many(
+        self, product_ids: list[int], cart_id: str = None
+    ) -> dict[int, int]:
+        """
+        Retorna o saldo disponível para venda de vários produtos: o estoque
+        menos as reservas vigentes dos outros carrinhos.
+        :param product_ids: IDs dos produtos.
+        :param cart_id: Carrinho cujas reservas contam como disponíveis
+            (opcional).
+        :return: Dicionário {product_id: quantidade}; produtos fora do estoque
+            não aparecem.
+        """
+        reserved = reserved_quantity(
+            StockLevel.product_id, current_time(), cart_id
+        )
+        rows = self.session.execute(
+            select(
+                StockLevel.product_id, StockLevel.quantity - reserved
+            ).where(StockLevel.product_id.in_(set(product_ids)))
+        )
+        return {product_id: quantity for product_id, quantity in rows}
+
+    def check_stock_many(
+        self, items: list[tuple[int, int]], cart_id: str = None
+    ) -> dict[int, dict]:
+        """
+        Verifica a disponibilidade de vários produtos de uma só vez,
+        descontando as reservas dos outros carrinhos.
+        :param items: Lista de pares (product_id, quantidade solicitada).
+        :param cart_id: Carrinho que está comprando (opcional).
+        :return: Dicionário {product_id: {'requested', 'available',
+            'sufficient'}}.
+        """
+        requested = self._group_quantities(items)
+        available = self.get_available_many(list(requested), cart_id)
+        return {
+            product_id: {
+                'requested': quantity,
+                'available': available.get(product_id),
+                'sufficient': available.get(product_id, 0) >= quantity,
+            }
+            for product_id, quantity in requested.items()
+        }
+
+    def decrement_stock_many(
+        self, items: list[tuple[int, int]], cart_id: str = None
+    ) -> None:
+        """
+        Baixa o estoque de vários produtos com um único lote de UPDATEs
+        condicionais (executemany), sem fazer commit. Unidades reservadas
+        por outros carrinhos não podem ser vendidas. Se algum produto não
+        tiver estoque, nenhuma baixa do lote é mantida.
+        :param items: Lista de pares (product_id, quantidade a remover).
+        :param cart_id: Carrinho que está comprando; suas reservas podem ser
+            usadas (opcional).
+        :raises: ValueError se algum produto não existir ou tiver estoque
+            insuficiente.
+        """
+        requested = self._group_quantities(items)
+        if not requested:
+            return
+
+        stock_level = StockLevel.__table__
+        reserved = reserved_quantity(
+            stock_level.c.product_id, current_time(), cart_id
+        )
+        # SAVEPOINT: se algum UPDATE não casar, os que casaram são desfeitos
+        # antes de montar a mensagem, que então aponta o produto que faltou
+        savepoint = self.session.begin_nested()
+        result = self.session.execute(
+            update(stock_level)
+            .where(
+                stock_level.c.product_id == bindparam('b_product_id'),
+                stock_level.c.quantity - reserved >= bindparam('b_quantity'),
             )
+            .values(quantity=stock_level.c.quantity - bindparam('b_quantity')),
+            [
+                {'b_product_id': product_id, 'b_quantity': quantity}
+                for product_id, quantity in requested.items()
+            ],
+        )
+        if result.rowcount == len(requested):
+            savepoint.commit()
+            return
+        savepoint.rollback()
 
-        if storage.quantity < quantity_sold:
-            raise ValueError(
-                f'Estoque insuficiente para o produto ID {product_id}. '
-                f'Quantidade disponível: {storage.quantity}, solicitada: {quantity_sold}.'
+        # Algum UPDATE não casou: monta a mensagem a partir do estoque atual
+        for product_id, status in self.check_stock_many(
+            list(requested.items()), cart_id
+        ).items():
+            if status['available'] is None:
+                raise ValueError(
+                    f'Produto com ID {product_id} não encontrado no estoque.'
+                )
+            if not status['sufficient']:
+                raise ValueError(
+                    f'Estoque insuficiente para o produto ID {product_id}. '
+                    f'Quantidade disponível: {status["available"]}, '
+                    f'solicitada: {status["requested"]}.'
+                )
+        raise ValueError('Não foi possível baixar o estoque dos produtos.')
+
+    def remove_sold_products_many(self, items: list[tuple[int, int]]) -> None:
+        """
+        Remove as quantidades vendidas de vários produtos atomicamente.
+        :param items: Lista de pares (product_id, quantidade vendida).
+        :raises: ValueError se o estoque for insuficiente ou algum produto não
+            existir.
+        """
+        try:
+            self.decrement_stock_many(items)
+        except ValueError:
+            self.session.rollback()
+            raise
+        deltas = {
+            product_id: -quantity
+            for product_id, quantity in self._group_quantities(items).items()
+        }
+        self.add_movements(self._at_average_cost(deltas))
+        self.enqueue_stock_updated(deltas)
+        self.session.commit()
+
+    def unit_costs(self, product_ids: list[int]) -> dict[int, Decimal]:
+        """
+        Retorna o custo unitário médio atual de vários produtos.
+        :param product_ids: IDs dos produtos.
+        :return: Dicionário {product_id: custo} (só produtos com entradas).
+        """
+        rows = self.session.execute(
+            average_cost_query().where(
+                Storage.product_id.in_(set(product_ids))
             )
+        )
+        return {
+            product_id: Decimal(round(cents)).scaleb(-2)
+            for product_id, cents in rows
+        }
 
-        storage.quantity -= quantity_sold
+    def add_movements(
+        self, lines: list[tuple[int, int, Decimal]], sale_id: int = None
+    ) -> None:
+        """
+        Grava movimentos no livro de estoque com um único INSERT em lote,
+        sem alterar o saldo nem fazer commit (o chamador controla ambos).
+        :param lines: Lista de tuplas (product_id, variação, custo).
+        :param sale_id: Venda que originou os movimentos (opcional).
+        """
+        if not lines:
+            return
+
+        self.session.execute(
+            insert(Storage),
+            [
+                {
+                    'product_id': product_id,
+                    'quantity': quantity,
+                    'cost': cost,
+                    'sale_id': sale_id,
+                }
+                for product_id, quantity, cost in lines
+            ],
+        )
+
+    def _at_average_cost(
+        self, deltas: dict[int, int]
+    ) -> list[tuple[int, int, Decimal]]:
+        unit_costs = self.unit_costs(list(deltas))
+        return [
+            (product_id, delta, unit_costs.get(product_id, Decimal(0)))
+            for product_id, delta in deltas.items()
+        ]
+
+    @staticmethod
+    def _group_quantities(items: list[tuple[int, int]]) -> dict[int, int]:
+        """
+        Soma as quantidades de linhas repetidas do mesmo produto.
+        :param items: Lista de pares (product_id, quantidade).
+        :return: Dicionário {product_id: quantidade total}.
+        """
+        grouped: dict[int, int] = {}
+        for product_id, quantity in items:
+            grouped[product_id] = grouped.get(product_id, 0) + quantity
+        return grouped
+
+    def remove_sold_products(
+        self, product_id: int, quantity_sold: int
+    ) -> StockLevel:
+        """
+        Remove a quantidade vendida de um produto no estoque.
+        :param product_id: ID do produto.
+        :param quantity_sold: Quantidade a ser removida.
+        :return: Saldo atualizado do produto.
+        :raises: ValueError se o estoque for insuficiente ou o produto não
+            existir.
+        """
+        try:
+            self.decrement_stock(product_id, quantity_sold)
+        except ValueError:
+            self.session.rollback()
+            raise
+        self.add_movements(self._at_average_cost({product_id: -quantity_sold}))
+        self.enqueue_stock_updated({product_id: -quantity_sold})
         self.session.commit()
-        return storage
+        return self.session.get(StockLevel, product_id, populate_existing=True)
 
     def get_stock(self, product_id: int) -> int:
         """
@@ -138,47 +405,95 @@ class StorageController:
         :return: Quantidade disponível do produto no estoque.
         :raises: ValueError se o produto não for encontrado no estoque.
         """
-        storage = (
-            self.session.query(Storage)
-            .filter_by(product_id=product_id)
-            .one_or_none()
-        )
-        if not storage:
+        quantity = self._stock_level(product_id)
+        if quantity is None:
             raise ValueError(
                 f'Produto com ID {product_id} não encontrado no estoque.'
             )
 
-        return storage.quantity
+        return quantity
 
     def update_stock(self, product_id: int, quantity: int) -> Storage:
         """
-        Atualiza a quantidade de um produto no estoque.
+        Atualiza a quantidade de um produto no estoque, registrando o ajuste
+        como uma nova entrada.
         :param product_id: ID do produto.
         :param quantity: Quantidade a ser adicionada ou subtraída do estoque.
-        :return: O registro atualizado no estoque.
+        :return: A entrada de ajuste criada no estoque.
         :raises: ValueError se o produto não for encontrado no estoque.
         """
-        storage = (
-            self.session.query(Storage)
-            .filter_by(product_id=product_id)
-            .one_or_none()
-        )
-        if not storage:
-            raise ValueError(
-                f'Produto com ID {product_id} não encontrado no estoque.'
-            )
+        last_entry = self.get_registry_by_id(product_id)
 
-        # Atualiza a quantidade do produto
-        storage.quantity += (
-            quantity  # Pode ser negativo para diminuir a quantidade
+        # Pode ser negativo para diminuir a quantidade, sem deixar o saldo < 0
+        stock_level = StockLevel.__table__
+        result = self.session.execute(
+            update(stock_level)
+            .where(
+                stock_level.c.product_id == product_id,
+                stock_level.c.quantity + quantity >= 0,
+            )
+            .values(quantity=stock_level.c.quantity + quantity)
         )
-        if storage.quantity < 0:
+        if result.rowcount == 0:
+            self.session.rollback()
             raise ValueError(
                 f'Estoque insuficiente para o produto ID {product_id}.'
             )
 
+        adjustment = Storage(
+            product_id=product_id, quantity=quantity, cost=last_entry.cost
+        )
+        self.session.add(adjustment)
+        self.enqueue_stock_updated({product_id: quantity})
         self.session.commit()
-        return storage
+        return adjustment
+
+    def enqueue_stock_updated(self, deltas: dict[int, int]) -> None:
+        """
+        Registra um evento 'stock.updated' por produto alterado, com a
+        variação e o saldo resultante. Não faz commit: o evento é gravado na
+        mesma transação da alteração.
+        :param deltas: Dicionário {product_id: variação da quantidade}.
+        """
+        levels = self.get_stock_many(list(deltas))
+        for product_id, delta in deltas.items():
+            self.outbox_controller.enqueue(
+                'stock.updated',
+                {
+                    'product_id': product_id,
+                    'delta': delta,
+                    'quantity': levels.get(product_id),
+                },
+            )
+
+    def _stock_level(self, product_id: int) -> int | None:
+        """
+        Lê o saldo de um produto pela chave primária de stock_level.
+        :param product_id: ID do produto.
+        :return: Quantidade em estoque, ou None se o produto não tiver saldo.
+        """
+        return self.session.scalar(
+            select(StockLevel.quantity).where(
+                StockLevel.product_id == product_id
+            )
+        )
+
+    def _add_to_stock_level(self, product_id: int, quantity: int) -> None:
+        """
+        Soma uma quantidade ao saldo do produto, criando-o se necessário.
+        Não faz commit.
+        :param product_id: ID do produto.
+        :param quantity: Quantidade a somar (pode ser negativa).
+        """
+        statement = sqlite_insert(StockLevel).values(
+            product_id=product_id, quantity=quantity
+        )
+        self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[StockLevel.product_id],
+                set_={'quantity': StockLevel.quantity + quantity},
+            )
+        )
 
     def delete_all_storage(self) -> None:
         """
@@ -189,6 +504,8 @@ class StorageController:
             self.session.query(
                 Storage
             ).delete()  # Deleta todos os registros da tabela Storage
+            self.session.query(StockLevel).delete()
+            self.outbox_controller.enqueue('stock.cleared', {})
             self.session.commit()  # Aplica as mudanças
             print('Todos os registros de Storage foram deletados com sucesso!')
         except Exception as e:
@@ -1,12 +1,18 @@
 # Implementação do 'Facade' Pattern para os controllers da aplicação
+from datetime import datetime
+from decimal import Decimal
+
 from sqlalchemy.orm import Session
 
 from Controllers.ItemSaleController import ItemSaleController
+from Controllers.PaymentController import PaymentController
 from Controllers.ProductController import ProductController
+from Controllers.ReservationController import ReservationController
 from Controllers.SaleController import SaleController
 from Controllers.StorageController import StorageController
 
-from models import ItemSale, Product, Sale, Storage
+from models import PAYMENT_CANCELLED, ItemSale, Product, Sale, Storage
+from Services.Export.DataExporter import DataExporter
 
 
 class IntegrationFacade:
@@ -18,12 +24,15 @@ class IntegrationFacade:
         self.session = session
         self.storage_controller = StorageController(session)
         self.sale_controller = SaleController(session, self.storage_controller)
+        self.reservation_controller = ReservationController(session)
+        self.payment_controller = PaymentController(session)
         self.product_controller = ProductController(session)
         self.item_sale_controller = ItemSaleController(session)
+        self.data_exporter = DataExporter(session)
 
     # Métodos de Produtos
     def create_product(
-        self, name: str, description: str, price: float
+        self, name: str, description: str, price: Decimal
     ) -> Product:
         return self.product_controller.create_product(name, description, price)
 
@@ -50,14 +59,14 @@ class IntegrationFacade:
 
     # Métodos de Estoque
     def add_to_storage(
-        self, product_id: int, quantity: int, cost: float
+        self, product_id: int, quantity: int, cost: Decimal
     ) -> Storage:
         return self.storage_controller.create_registry(
             product_id, quantity, cost
         )
 
     def update_storage(
-        self, product_id: int, quantity: int = None, cost: float = None
+        self, product_id: int, quantity: int = None, cost: Decimal = None
     ) -> Storage:
         return self.storage_controller.update_registry(
             product_id, quantity, cost
@@ -69,24 +78,39 @@ class IntegrationFacade:
     def list_storage(self) -> list[dict]:
         return self.storage_controller.list_storage()
 
+    # Reservas dos carrinhos
+    def reserve_stock(
+        self, cart_id: str, product_id: int, quantity: int
+    ) -> int:
+        return self.reservation_controller.reserve(
+            cart_id, product_id, quantity
+        )
+
+    def release_cart(self, cart_id: str) -> int:
+        return self.reservation_controller.release(cart_id)
+
     # Métodos de Vendas
-    def create_sale(self, total_sale: float, item_sales: list[dict]) -> Sale:
-        return self.sale_controller.process_sale(total_sale, item_sales)
+    def create_sale(
+        self, total_sale: Decimal, item_sales: list[dict], cart_id: str = None
+    ) -> Sale:
+        return self.sale_controller.process_sale(
+            total_sale, item_sales, cart_id
+        )
 
-    def list_sales(self) -> list[Sale]:
-        return self.sale_controller.list_sales()
+    def list_sales(self, with_items: bool = False) -> list[Sale]:
+        return self.sale_controller.list_sales(with_items)
 
     def get_sale_details(self, sale_id: int) -> dict:
-        sale = self.sale_controller.get_sale_by_id(sale_id)
-        items = self.item_sale_controller.get_items_by_sale_id(sale_id)
-        return {
-            'sale_id': sale.sale_id,
-            'total_sale': sale.total_sale,
-            'items': [
-                {'product_id': item.product_id, 'quantity': item.quantityItem}
-                for item in items
-            ],
-        }
+        return self.sale_controller.get_sale_details(sale_id)
+
+    # Métodos de Pagamentos
+    def get_payment(self, sale_id: int) -> dict:
+        return self.payment_controller.get_payment(sale_id)
+
+    def cancel_payment(self, sale_id: int) -> bool:
+        return self.payment_controller.settle(
+            sale_id, PAYMENT_CANCELLED, 'Pagamento cancelado no caixa.'
+        )
 
     # Métodos de Itens de Venda
     def create_item_sale(
@@ -98,3 +122,14 @@ class IntegrationFacade:
 
     def list_all_item_sales(self) -> list[ItemSale]:
         return self.item_sale_controller.list_all_items()
+
+    # Exportação em blocos (CSV, NDJSON ou Parquet)
+    def export_data(
+        self,
+        dataset: str,
+        destination,
+        fmt: str = 'csv',
+        start: datetime = None,
+        end: datetime = None,
+    ) -> int:
+        return self.data_exporter.export(dataset, destination, fmt, start, end)
@@ -0,0 +1,319 @@
+# Medição de desempenho dos caminhos mais usados (catálogo, estoque,
+# checkout, detalhes da venda e montagem dos lotes de sincronização) sobre
+# bancos sintéticos de tamanhos fixos, com resultado em JSON comparável
+# entre execuções
+import datetime as dt
+import platform
+import random
+import sqlite3
+import statistics
+import time
+from decimal import Decimal
+
+import sqlalchemy
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from Controllers.ProductController import ProductController, catalog_cache
+from Controllers.StorageController import StorageController
+from IntegrationFacade import IntegrationFacade
+from models import ItemSale, Product, Sale, StockLevel, Storage
+from Services.Sync.SyncEngine import SYNC_TABLES, SyncEngine
+from Services.Sync.WireFormat import encode_batch, serialize
+
+RESULTS_VERSION = 1
+
+# Tamanhos padrão: quantidade de produtos e de vendas semeadas
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+CATEGORIES = ('Bolos', 'Doces', 'Salgados', 'Bebidas', 'Pães')
+
+# Data de referência das vendas semeadas: fixa, para que o mesmo tamanho e
+# semente gerem sempre o mesmo banco
+REFERENCE_DATE = dt.datetime(2024, 1, 1)
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(samples: list[float]) -> dict:
+    """
+    Resume os tempos de um cenário.
+    :param samples: Tempos de cada repetição, em segundos.
+    :return: Dicionário com repeat, min_ms, median_ms, mean_ms, p95_ms e
+        ops_per_sec.
+    """
+    median = statistics.median(samples)
+    return {
+        'repeat': len(samples),
+        'min_ms': round(min(samples) * 1000, 4),
+        'median_ms': round(median * 1000, 4),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 4),
+        'p95_ms': round(_percentile(samples, 0.95) * 1000, 4),
+        'ops_per_sec': round(1 / median, 2) if median else None,
+    }
+
+
+def compare_results(
+    baseline: dict, current: dict, threshold: float = 0.2
+) -> list[dict]:
+    """
+    Compara duas execuções pela mediana de cada cenário e tamanho.
+    :param baseline: Resultado anterior (mesmo formato de BenchmarkSuite.run).
+    :param current: Resultado atual.
+    :param threshold: Aumento relativo da mediana considerado regressão
+        (0.2 = 20%).
+    :return: Lista de {'name', 'size', 'baseline_ms', 'current_ms',
+        'ratio', 'regression'} dos cenários presentes nos dois.
+    """
+    previous = {
+        (result['name'], result['size']): result
+        for result in baseline['results']
+    }
+    comparison = []
+    for result in current['results']:
+        before = previous.get((result['name'], result['size']))
+        if before is None or not before['median_ms']:
+            continue
+        ratio = result['median_ms'] / before['median_ms']
+        comparison.append({
+            'name': result['name'],
+            'size': result['size'],
+            'baseline_ms': before['median_ms'],
+            'current_ms': result['median_ms'],
+            'ratio': round(ratio, 3),
+            'regression': ratio > 1 + threshold,
+        })
+    return comparison
+
+
+def seed(
+    engine: Engine,
+    size: int,
+    seed_value: int = 42,
+    reference: dt.datetime = REFERENCE_DATE,
+) -> None:
+    """
+    Popula um banco vazio com dados sintéticos e determinísticos: `size`
+    produtos, uma entrada de estoque por produto e `size` vendas de um a
+    três itens espalhadas pelo ano anterior à data de referência.
+    :param engine: Engine de um banco já criado (init_db).
+    :param size: Quantidade de produtos e de vendas.
+    :param seed_value: Semente do gerador aleatório.
+    :param reference: Data de referência (padrão: REFERENCE_DATE).
+    """
+    rng = random.Random(seed_value)
+    now = reference
+    prices = [
+        Decimal(rng.randint(100, 10_000)).scaleb(-2) for _ in range(size)
+    ]
+    # Estoque alto o bastante para todas as vendas medidas
+    stock = 1_000_000
+
+    Session = sessionmaker(bind=engine)
+    with Session() as session:
+        session.execute(
+            insert(Product),
+            [
+                {
+                    'name': f'Produto {i:06d}',
+                    'description': f'Descrição do produto {i}',
+                    'price': prices[i],
+                    'category': CATEGORIES[i % len(CATEGORIES)],
+                }
+                for i in range(size)
+            ],
+        )
+        product_ids = session.scalars(
+            select(Product.product_id).order_by(Product.product_id)
+        ).all()
+        session.execute(
+            insert(Storage),
+            [
+                {
+                    'product_id': product_id,
+                    'quantity': stock,
+                    'cost': prices[i] * Decimal('0.6'),
+                    'datetime': now - dt.timedelta(days=366),
+                }
+                for i, product_id in enumerate(product_ids)
+            ],
+        )
+        session.execute(
+            insert(StockLevel),
+            [
+                {'product_id': product_id, 'quantity': stock}
+                for product_id in product_ids
+            ],
+        )
+
+        sales, items = [], []
+        for sale_id in range(1, size + 1):
+            chosen = rng.sample(range(size), rng.randint(1, 3))
+            lines = [(i, rng.randint(1, 5)) for i in chosen]
+            sales.append({
+                'sale_id': sale_id,
+                'datetime': now
+                - dt.timedelta(seconds=rng.randint(0, 365 * 86400)),
+                'total_sale': sum(prices[i] * qty for i, qty in lines),
+            })
+            items.extend(
+                {
+                    'sale_id': sale_id,
+                    'product_id': product_ids[i],
+                    'quantityItem': qty,
+                    'unit_price': prices[i],
+                }
+                for i, qty in lines
+            )
+        session.execute(insert(Sale), sales)
+        session.execute(insert(ItemSale), items)
+        session.commit()
+
+
+class BenchmarkSuite:
+    def __init__(
+        self,
+        engine: Engine,
+        size: int,
+        repeat: int = 30,
+        warmup: int = 3,
+        seed_value: int = 42,
+    ):
+        """
+        Inicializa a suíte sobre um banco já semeado (ver seed).
+        :param engine: Engine do banco semeado.
+        :param size: Tamanho usado em seed (quantidade de produtos e de
+            vendas).
+        :param repeat: Repetições medidas de cada cenário.
+        :param warmup: Repetições descartadas antes da medição.
+        :param seed_value: Semente do sorteio de IDs usados nos cenários.
+        """
+        self.engine = engine
+        self.size = size
+        self.repeat = repeat
+        self.warmup = warmup
+        self.rng = random.Random(seed_value)
+        self.session = sessionmaker(bind=engine, autoflush=False)()
+        self.facade = IntegrationFacade(self.session)
+
+    def scenarios(self) -> dict:
+        """
+        Cenários medidos, cada um uma função sem argumentos.
+        :return: Dicionário {nome: função}.
+        """
+        return {
+            'list_products': self.list_products,
+            'list_products_cached': self.list_products_cached,
+            'get_stock': self.get_stock,
+            'process_sale': self.process_sale,
+            'get_sale_details': self.get_sale_details,
+            'sync_payload_build': self.sync_payload_build,
+        }
+
+    def run(self, names: list[str] = None) -> list[dict]:
+        """
+        Executa os cenários e resume os tempos de cada um.
+        :param names: Cenários a executar (padrão: todos).
+        :return: Lista de resultados, um por cenário.
+        :raises: ValueError se algum cenário não existir.
+        """
+        scenarios = self.scenarios()
+        names = names or list(scenarios)
+        unknown = set(names) - scenarios.keys()
+        if unknown:
+            raise ValueError(
+                f'Cenários inválidos: {", ".join(sorted(unknown))}'
+            )
+
+        results = []
+        for name in names:
+            samples = self.measure(scenarios[name])
+            results.append({
+                'name': name,
+                'size': self.size,
+                **summarize(samples),
+            })
+        return results
+
+    def measure(self, scenario) -> list[float]:
+        """
+        Mede um cenário, descartando o aquecimento.
+        :param scenario: Função sem argumentos.
+        :return: Tempos de cada repetição, em segundos.
+        """
+        for _ in range(self.warmup):
+            scenario()
+        samples = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            scenario()
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    def close(self) -> None:
+        """
+        Encerra a sessão usada pelos cenários.
+        """
+        self.session.close()
+
+    def _random_id(self) -> int:
+        return self.rng.randint(1, self.size)
+
+    # Cenários
+    def list_products(self) -> None:
+        # Catálogo completo lido do banco (cache invalidado a cada vez)
+        catalog_cache.invalidate(self.engine)
+        ProductController(self.session).list_products()
+        self.session.commit()
+
+    def list_products_cached(self) -> None:
+        ProductController(self.session).list_products()
+
+    def get_stock(self) -> None:
+        StorageController(self.session).get_stock(self._random_id())
+        self.session.commit()
+
+    def process_sale(self) -> None:
+        items = [
+            {'product_id': self._random_id(), 'quantityItem': 1}
+            for _ in range(3)
+        ]
+        self.facade.create_sale(Decimal('30.00'), items)
+
+    def get_sale_details(self) -> None:
+        self.facade.get_sale_details(self._random_id())
+        self.session.commit()
+
+    def sync_payload_build(self) -> None:
+        # Uma página de cada tabela sincronizada por integration.py, lida e
+        # serializada como lá, sem enviar pela rede
+        sync_engine = SyncEngine(
+            session=self.session, endpoint='/postdata', tables=SYNC_TABLES
+        )
+        for model, hwm_column in sync_engine.tables:
+            cursor = sync_engine.get_cursor(model.__tablename__)
+            rows = sync_engine.pending_rows(model, hwm_column, cursor)
+            for batch in sync_engine.split_batches(rows):
+                serialize(encode_batch(model.__table__, batch))
+        self.session.rollback()
+
+
+def environment() -> dict:
+    """
+    Dados do ambiente gravados junto dos resultados.
+    :return: Dicionário com versões do Python, SQLAlchemy e SQLite,
+        plataforma e horário.
+    """
+    return {
+        'python': platform.python_version(),
+        'sqlalchemy': sqlalchemy.__version__,
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'timestamp': dt.datetime.now().replace(microsecond=0).isoformat(),
+    }
@@ -0,0 +1,208 @@
+# Exportação em blocos das vendas, itens vendidos, estoque e produtos
+# (CSV, NDJSON ou Parquet), sem carregar a tabela inteira na memória
+import csv
+import datetime as dt
+import json
+from contextlib import contextmanager
+
+from sqlalchemy import Date, Integer, select
+from sqlalchemy.orm import Session
+
+from models import EpochDateTime, ItemSale, Money, Product, Sale, Storage
+
+EXPORT_FORMATS = ('csv', 'ndjson', 'parquet')
+
+
+def _datasets() -> dict:
+    # Cada conjunto: (consulta ordenada pela PK, coluna do filtro de data)
+    return {
+        'sales': (
+            select(Sale.sale_id, Sale.datetime, Sale.total_sale).order_by(
+                Sale.sale_id
+            ),
+            Sale.datetime,
+        ),
+        'item_sales': (
+            select(
+                ItemSale.itemsale_id,
+                ItemSale.sale_id,
+                Sale.datetime,
+                ItemSale.product_id,
+                Product.name.label('product_name'),
+                ItemSale.quantityItem,
+                ItemSale.unit_price,
+                ItemSale.unit_cost,
+            )
+            .join(Sale, Sale.sale_id == ItemSale.sale_id)
+            .join(Product, Product.product_id == ItemSale.product_id)
+            .order_by(ItemSale.itemsale_id),
+            Sale.datetime,
+        ),
+        'storage': (
+            select(
+                Storage.entry_id,
+                Storage.product_id,
+                Storage.quantity,
+                Storage.datetime,
+                Storage.cost,
+                Storage.sale_id,
+            ).order_by(Storage.entry_id),
+            Storage.datetime,
+        ),
+        'products': (
+            select(
+                Product.product_id,
+                Product.name,
+                Product.description,
+                Product.price,
+                Product.category,
+            ).order_by(Product.product_id),
+            None,
+        ),
+    }
+
+
+class DataExporter:
+    def __init__(self, session: Session, chunk_size: int = 1000):
+        """
+        Inicializa o exportador.
+        :param session: Instância de Session do SQLAlchemy.
+        :param chunk_size: Quantidade de linhas lidas do banco e escritas por
+            vez.
+        """
+        self.session = session
+        self.chunk_size = chunk_size
+
+    def iter_chunks(
+        self,
+        dataset: str,
+        start: dt.datetime = None,
+        end: dt.datetime = None,
+    ):
+        """
+        Lê um conjunto de dados em blocos, usando yield_per para que só um
+        bloco de linhas fique na memória por vez.
+        :param dataset: 'sales', 'item_sales', 'storage' ou 'products'.
+        :param start: Início do intervalo, inclusivo (opcional).
+        :param end: Fim do intervalo, exclusivo (opcional).
+        :return: Gerador de listas de dicionários.
+        :raises: ValueError se o conjunto não existir ou não aceitar filtro de
+            data.
+        """
+        query = self._query(dataset, start, end)
+        result = self.session.execute(
+            query.execution_options(yield_per=self.chunk_size)
+        )
+        for rows in result.partitions():
+            yield [dict(row._mapping) for row in rows]
+
+    def export(
+        self,
+        dataset: str,
+        destination,
+        fmt: str = 'csv',
+        start: dt.datetime = None,
+        end: dt.datetime = None,
+    ) -> int:
+        """
+        Exporta um conjunto de dados para um arquivo.
+        :param dataset: 'sales', 'item_sales', 'storage' ou 'products'.
+        :param destination: Caminho do arquivo ou arquivo já aberto (binário
+            para Parquet).
+        :param fmt: 'csv', 'ndjson' ou 'parquet'.
+        :param start: Início do intervalo, inclusivo (opcional).
+        :param end: Fim do intervalo, exclusivo (opcional).
+        :return: Quantidade de linhas exportadas.
+        :raises: ValueError se o formato ou o conjunto forem inválidos.
+        :raises: ImportError se o formato for Parquet e o pyarrow não estiver
+            instalado.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f'Formato de exportação inválido: {fmt}')
+
+        chunks = self.iter_chunks(dataset, start, end)
+        if fmt == 'parquet':
+            columns = self._query(dataset, start, end).selected_columns
+            return self._write_parquet(chunks, columns, destination)
+        with self._open(destination, 'w') as file:
+            if fmt == 'csv':
+                return self._write_csv(chunks, dataset, file)
+            return self._write_ndjson(chunks, file)
+
+    @staticmethod
+    def _query(dataset: str, start, end):
+        datasets = _datasets()
+        if dataset not in datasets:
+            raise ValueError(f'Conjunto de dados inválido: {dataset}')
+
+        query, date_column = datasets[dataset]
+        if date_column is None and (start is not None or end is not None):
+            raise ValueError(f'{dataset} não aceita filtro de data')
+        if start is not None:
+            query = query.where(date_column >= start)
+        if end is not None:
+            query = query.where(date_column < end)
+        return query
+
+    @staticmethod
+    @contextmanager
+    def _open(destination, mode: str):
+        if hasattr(destination, 'write'):
+            yield destination
+            return
+        newline = '' if 'b' not in mode else None
+        encoding = 'utf-8' if 'b' not in mode else None
+        with open(
+            destination, mode, newline=newline, encoding=encoding
+        ) as file:
+            yield file
+
+    def _write_csv(self, chunks, dataset: str, file) -> int:
+        columns = self._query(dataset, None, None).selected_columns.keys()
+        writer = csv.DictWriter(file, fieldnames=columns)
+        writer.writeheader()
+        total = 0
+        for rows in chunks:
+            writer.writerows(rows)
+            total += len(rows)
+        return total
+
+    @staticmethod
+    def _write_ndjson(chunks, file) -> int:
+        total = 0
+        for rows in chunks:
+            file.writelines(
+                json.dumps(row, default=str, ensure_ascii=False) + '\n'
+                for row in rows
+            )
+            total += len(rows)
+        return total
+
+    def _write_parquet(self, chunks, columns, destination) -> int:
+        # Dependência opcional: só necessária para exportar em Parquet
+        import pyarrow as pa  # noqa: PLC0415
+        import pyarrow.parquet as pq  # noqa: PLC0415
+
+        schema = pa.schema([
+            (column.key, self._arrow_type(pa, column.type))
+            for column in columns
+        ])
+        total = 0
+        with pq.ParquetWriter(destination, schema) as writer:
+            for rows in chunks:
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                total += len(rows)
+        return total
+
+    @staticmethod
+    def _arrow_type(pa, column_type):
+        # Tipos fixos, para que todos os blocos tenham o mesmo esquema
+        if isinstance(column_type, Money):
+            return pa.decimal128(18, 2)
+        if isinstance(column_type, EpochDateTime):
+            return pa.timestamp('s')
+        if isinstance(column_type, Date):
+            return pa.date32()
+        if isinstance(column_type, Integer):
+            return pa.int64()
+        return pa.string()
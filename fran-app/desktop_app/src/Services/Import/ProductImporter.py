@@ -0,0 +1,264 @@
+# Importação em lote de produtos e estoque a partir de CSV ou JSON
+import csv
+import json
+from decimal import InvalidOperation
+from pathlib import Path
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from Controllers.OutboxController import OutboxController
+from Controllers.ProductController import ProductController, catalog_cache
+from Controllers.StorageController import StorageController
+from models import Product, StockLevel, Storage, to_money
+
+IMPORT_FORMATS = ('csv', 'json')
+
+
+class ProductImporter:
+    def __init__(self, session: Session):
+        """
+        Inicializa o importador com uma sessão SQLAlchemy.
+        :param session: Instância de Session do SQLAlchemy.
+        """
+        self.session = session
+        self.outbox_controller = OutboxController(session)
+        self.storage_controller = StorageController(session)
+
+    def import_file(self, path: str, fmt: str = None) -> dict:
+        """
+        Importa produtos de um arquivo CSV ou JSON (lista de objetos).
+        Colunas: name, description, price, category, quantity, cost e
+        product_id (as quatro últimas opcionais).
+        :param path: Caminho do arquivo.
+        :param fmt: 'csv' ou 'json' (padrão: deduzido da extensão).
+        :return: Resumo da importação (ver import_rows).
+        :raises: ValueError se o formato não for suportado ou o JSON não
+            for uma lista.
+        """
+        fmt = fmt or Path(path).suffix.lstrip('.').lower()
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f'Formato de importação inválido: {fmt}')
+
+        with open(path, newline='', encoding='utf-8-sig') as file:
+            if fmt == 'csv':
+                # A primeira linha do arquivo é o cabeçalho
+                return self.import_rows(list(csv.DictReader(file)), 2)
+            rows = json.load(file)
+        if not isinstance(rows, list):
+            raise ValueError('O JSON deve conter uma lista de produtos.')
+        return self.import_rows(rows)
+
+    def import_rows(self, rows: list[dict], first_row: int = 1) -> dict:
+        """
+        Valida as linhas como create_product e grava as válidas em uma única
+        transação: produtos novos em lote, produtos já cadastrados
+        atualizados e o estoque somado ao saldo de cada produto, com os
+        eventos de sincronização correspondentes. Uma linha com product_id
+        atualiza esse produto; sem ele, atualiza o único produto com o mesmo
+        nome (nomes repetidos no cadastro exigem o product_id).
+        Linhas inválidas são relatadas sem interromper as demais.
+        :param rows: Lista de dicionários com os campos de cada produto.
+        :param first_row: Número da primeira linha nos erros (ex.: 2 em um
+            CSV com cabeçalho).
+        :return: Dicionário com created, updated e errors (lista de
+            {'row', 'error'}).
+        """
+        valid, errors = [], []
+        for number, row in enumerate(rows, start=first_row):
+            try:
+                product = self._parse_row(row)
+            except Exception as e:
+                errors.append({'row': number, 'error': str(e)})
+                continue
+            product['row'] = number
+            valid.append(product)
+
+        new, known = self._match_existing(valid, errors)
+        errors.sort(key=lambda error: error['row'])
+        if not new and not known:
+            return {'created': 0, 'updated': 0, 'errors': errors}
+
+        try:
+            self._save(new, known)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        catalog_cache.invalidate(self.session.get_bind())
+
+        return {'created': len(new), 'updated': len(known), 'errors': errors}
+
+    def _save(self, new: list[dict], known: list[dict]) -> None:
+        """
+        Insere os produtos novos e atualiza os existentes em lote, com os
+        eventos e as entradas de estoque, sem fazer commit.
+        :param new: Produtos novos (recebem o product_id criado).
+        :param known: Produtos já cadastrados, com product_id.
+        """
+        if new:
+            created_ids = self.session.scalars(
+                insert(Product).returning(
+                    Product.product_id, sort_by_parameter_order=True
+                ),
+                [self._product_values(p) for p in new],
+            ).all()
+            for product, product_id in zip(new, created_ids):
+                product['product_id'] = product_id
+        if known:
+            self.session.execute(
+                update(Product),
+                [
+                    {
+                        'product_id': p['product_id'],
+                        **self._product_values(p),
+                    }
+                    for p in known
+                ],
+            )
+        self._enqueue_products(new, known)
+        self._add_stock([p for p in new + known if p['quantity']])
+
+    def _match_existing(
+        self, products: list[dict], errors: list[dict]
+    ) -> tuple[list[dict], list[dict]]:
+        """
+        Associa cada produto válido ao cadastro, pelo product_id informado
+        ou pelo nome, quando ele é único. Linhas que não puderem ser
+        associadas (ID inexistente, nome ambíguo, produto repetido no
+        arquivo) entram em errors.
+        :param products: Produtos validados, com o número da linha em 'row'.
+        :param errors: Lista de erros a completar.
+        :return: Tupla (produtos novos, produtos já cadastrados).
+        """
+        ids = {p['product_id'] for p in products if p['product_id']}
+        names = {p['name'] for p in products if not p['product_id']}
+        existing_ids = set(
+            self.session.scalars(
+                select(Product.product_id).where(Product.product_id.in_(ids))
+            )
+        )
+        by_name = {
+            name: (count, product_id)
+            for name, count, product_id in self.session.execute(
+                select(
+                    Product.name,
+                    func.count(),
+                    func.min(Product.product_id),
+                )
+                .where(Product.name.in_(names))
+                .group_by(Product.name)
+            )
+        }
+
+        new, known, seen = [], [], set()
+        for product in products:
+            product_id = product['product_id']
+            count, named_id = by_name.get(product['name'], (0, None))
+            if product_id and product_id not in existing_ids:
+                error = f'Produto com ID {product_id} não encontrado.'
+            elif not product_id and count > 1:
+                error = 'Há mais de um produto com este nome; informe o ID.'
+            elif (product_id or product['name']) in seen or named_id in seen:
+                error = 'Produto repetido no arquivo.'
+            else:
+                error = None
+            if error:
+                errors.append({'row': product['row'], 'error': error})
+                continue
+
+            seen.add(product_id or product['name'])
+            product_id = product_id or named_id
+            if product_id:
+                seen.add(product_id)
+                product['product_id'] = product_id
+                known.append(product)
+            else:
+                new.append(product)
+        return new, known
+
+    def _enqueue_products(self, new: list[dict], known: list[dict]) -> None:
+        for event_type, products in (
+            ('product.created', new),
+            ('product.updated', known),
+        ):
+            for product in products:
+                self.outbox_controller.enqueue(
+                    event_type,
+                    {
+                        'product_id': product['product_id'],
+                        **self._product_values(product),
+                    },
+                )
+
+    def _add_stock(self, products: list[dict]) -> None:
+        if not products:
+            return
+
+        self.session.execute(
+            insert(Storage),
+            [
+                {
+                    'product_id': p['product_id'],
+                    'quantity': p['quantity'],
+                    'cost': p['cost'],
+                }
+                for p in products
+            ],
+        )
+        statement = sqlite_insert(StockLevel)
+        self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[StockLevel.product_id],
+                set_={
+                    'quantity': StockLevel.quantity
+                    + statement.excluded.quantity
+                },
+            ),
+            [
+                {'product_id': p['product_id'], 'quantity': p['quantity']}
+                for p in products
+            ],
+        )
+        self.storage_controller.enqueue_stock_updated({
+            p['product_id']: p['quantity'] for p in products
+        })
+
+    @staticmethod
+    def _product_values(product: dict) -> dict:
+        return {
+            'name': product['name'],
+            'description': product['description'],
+            'price': product['price'],
+            'category': product['category'],
+        }
+
+    @staticmethod
+    def _parse_row(row: dict) -> dict:
+        if not isinstance(row, dict):
+            raise ValueError('A linha deve ser um objeto com os campos.')
+
+        name = str(row.get('name') or '').strip()
+        description = str(row.get('description') or '').strip()
+        try:
+            price = to_money(row['price']) if row.get('price') else None
+            cost = to_money(row['cost']) if row.get('cost') else price
+            quantity = int(row.get('quantity') or 0)
+            product_id = int(row.get('product_id') or 0) or None
+        except (InvalidOperation, TypeError, ValueError):
+            raise ValueError('Preço, custo, quantidade ou ID inválidos.')
+
+        ProductController.validate_product(name, description, price)
+        if quantity < 0:
+            raise ValueError('A quantidade não pode ser negativa.')
+
+        return {
+            'product_id': product_id,
+            'name': name,
+            'description': description,
+            'price': price,
+            'category': row.get('category') or None,
+            'quantity': quantity,
+            'cost': cost,
+        }
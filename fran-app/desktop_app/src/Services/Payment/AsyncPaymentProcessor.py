@@ -0,0 +1,294 @@
+# Processamento dos pagamentos pelo PSP fora da thread da página: um loop
+# asyncio em uma thread própria envia as cobranças, repete as que não
+# tiveram resposta (mesma chave de idempotência), acompanha as pendentes
+# e grava o resultado na venda
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from decimal import Decimal
+
+from sqlalchemy.orm import sessionmaker
+
+from Controllers.PaymentController import PaymentController
+from models import PAYMENT_DECLINED, PAYMENT_PENDING
+from Services.Payment.AsyncPaymentStrategy import (
+    AsyncPaymentStrategy,
+    PaymentResult,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPaymentProcessor:
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        session_factory: sessionmaker,
+        timeout: float = 10.0,
+        attempts: int = 3,
+        base_delay: float = 0.5,
+        poll_interval: float = 2.0,
+        max_wait: float = 600.0,
+    ):
+        """
+        Inicializa o processador e inicia a thread do seu loop de eventos.
+        :param session_factory: Fábrica de sessões (uma sessão própria por
+            gravação).
+        :param timeout: Tempo limite de cada chamada ao PSP, em segundos.
+        :param attempts: Tentativas de cada chamada antes de desistir.
+        :param base_delay: Atraso inicial do backoff exponencial entre
+            tentativas.
+        :param poll_interval: Intervalo entre consultas de uma cobrança
+            pendente.
+        :param max_wait: Tempo máximo acompanhando uma cobrança pendente.
+        """
+        self.session_factory = session_factory
+        self.timeout = timeout
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever,
+            daemon=True,
+            name='payment-processor',
+        )
+        self._thread.start()
+
+    def submit(
+        self,
+        sale_id: int,
+        strategy: AsyncPaymentStrategy,
+        total: Decimal,
+        idempotency_key: str,
+        **kwargs,
+    ) -> Future:
+        """
+        Agenda a cobrança de uma venda pendente e retorna imediatamente.
+        :param sale_id: ID da venda gravada como pendente.
+        :param strategy: Estratégia assíncrona da forma de pagamento.
+        :param total: Valor a cobrar.
+        :param idempotency_key: Chave gravada na venda (a mesma em novas
+            tentativas).
+        :param kwargs: Dados extras repassados à estratégia.
+        :return: Future com o PaymentResult final (ou pendente, se o PSP não
+            respondeu).
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self.process(sale_id, strategy, total, idempotency_key, **kwargs),
+            self._loop,
+        )
+
+    def resume_pending(self, strategy_for) -> list[Future]:
+        """
+        Reenvia as cobranças das vendas ainda pendentes (ex.: após um
+        reinício). A chave de idempotência garante que nenhuma seja cobrada
+        duas vezes.
+        :param strategy_for: Função que recebe a forma de pagamento e retorna a
+            estratégia.
+        :return: Futures das cobranças reenviadas.
+        """
+        session = self.session_factory()
+        try:
+            pending = PaymentController(session).list_pending()
+        finally:
+            session.close()
+        return [
+            self.submit(
+                payment['sale_id'],
+                strategy_for(payment['method']),
+                payment['total_sale'],
+                payment['key'],
+            )
+            for payment in pending
+            if payment['key'] is not None
+        ]
+
+    def cancel(
+        self,
+        sale_id: int,
+        strategy: AsyncPaymentStrategy,
+        idempotency_key: str,
+    ) -> Future:
+        """
+        Agenda o cancelamento da cobrança de uma venda pendente e retorna
+        imediatamente. A venda só é estornada depois que o PSP confirma o
+        cancelamento; sem confirmação, continua pendente com uma observação.
+        :param sale_id: ID da venda.
+        :param strategy: Estratégia assíncrona da forma de pagamento.
+        :param idempotency_key: Chave de idempotência da cobrança.
+        :return: Future com o PaymentResult devolvido pelo PSP.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self.process_cancel(sale_id, strategy, idempotency_key),
+            self._loop,
+        )
+
+    async def process(
+        self,
+        sale_id: int,
+        strategy: AsyncPaymentStrategy,
+        total: Decimal,
+        idempotency_key: str,
+        **kwargs,
+    ) -> PaymentResult:
+        """
+        Cobra a venda, acompanha a cobrança enquanto estiver pendente e
+        grava o resultado. Sem resposta do PSP, ou em caso de erro, a venda
+        continua pendente com uma observação e pode ser reenviada com a
+        mesma chave; se o PSP recusar a requisição ou responder fora do
+        contrato, a cobrança é gravada como recusada.
+        :param sale_id: ID da venda.
+        :param strategy: Estratégia assíncrona da forma de pagamento.
+        :param total: Valor a cobrar.
+        :param idempotency_key: Chave de idempotência da cobrança.
+        :return: Resultado final, ou pendente se o PSP não respondeu.
+        """
+        try:
+            result = await self._charge(
+                strategy, total, idempotency_key, **kwargs
+            )
+            await asyncio.to_thread(self._record, sale_id, result)
+        except Exception as e:
+            logger.exception('Falha no pagamento da venda %d', sale_id)
+            result = PaymentResult(
+                PAYMENT_PENDING, f'Erro ao processar o pagamento: {e}'
+            )
+            await asyncio.to_thread(self._record_error, sale_id, result)
+        return result
+
+    async def process_cancel(
+        self,
+        sale_id: int,
+        strategy: AsyncPaymentStrategy,
+        idempotency_key: str,
+    ) -> PaymentResult:
+        """
+        Pede o cancelamento ao PSP e grava a situação que ele devolver: a
+        venda é estornada se a cobrança foi cancelada (ou recusada) e
+        aprovada se o PSP não a cancelou.
+        :param sale_id: ID da venda.
+        :param strategy: Estratégia assíncrona da forma de pagamento.
+        :param idempotency_key: Chave de idempotência da cobrança.
+        :return: Resultado devolvido pelo PSP, ou pendente se não respondeu.
+        """
+        try:
+            result = await self._cancel(strategy, idempotency_key)
+            await asyncio.to_thread(self._record, sale_id, result)
+        except Exception as e:
+            logger.exception('Falha no cancelamento da venda %d', sale_id)
+            result = PaymentResult(
+                PAYMENT_PENDING, f'Erro ao cancelar o pagamento: {e}'
+            )
+            await asyncio.to_thread(self._record_error, sale_id, result)
+        return result
+
+    def backoff(self, attempts: int) -> float:
+        """
+        Calcula o atraso da próxima tentativa.
+        :param attempts: Tentativas já realizadas.
+        :return: Atraso em segundos.
+        """
+        return self.base_delay * 2**attempts
+
+    def close(self) -> None:
+        """
+        Para o loop de eventos e aguarda o fim da sua thread. Cobranças em
+        andamento são abandonadas e continuam pendentes nas vendas.
+        """
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _charge(
+        self,
+        strategy: AsyncPaymentStrategy,
+        total: Decimal,
+        idempotency_key: str,
+        **kwargs,
+    ) -> PaymentResult:
+        try:
+            return await self._poll(strategy, total, idempotency_key, **kwargs)
+        except ValueError as e:
+            # O PSP recusou a requisição ou respondeu fora do contrato:
+            # repeti-la não muda a resposta, e a venda não fica pendente
+            logger.warning('Cobrança recusada pelo PSP: %s', e)
+            return PaymentResult(PAYMENT_DECLINED, str(e))
+
+    async def _poll(
+        self,
+        strategy: AsyncPaymentStrategy,
+        total: Decimal,
+        idempotency_key: str,
+        **kwargs,
+    ) -> PaymentResult:
+        result = await self._call(
+            strategy.authorize, total, idempotency_key, **kwargs
+        )
+        if result is None:
+            return PaymentResult(
+                PAYMENT_PENDING, 'PSP sem resposta. Tente novamente.'
+            )
+        deadline = self._loop.time() + self.max_wait
+        while (
+            result.status == PAYMENT_PENDING and self._loop.time() < deadline
+        ):
+            await asyncio.sleep(self.poll_interval)
+            result = (
+                await self._call(strategy.status, idempotency_key) or result
+            )
+        return result
+
+    async def _cancel(
+        self, strategy: AsyncPaymentStrategy, idempotency_key: str
+    ) -> PaymentResult:
+        result = await self._call(strategy.cancel, idempotency_key)
+        if result is None:
+            return PaymentResult(
+                PAYMENT_PENDING,
+                'PSP sem resposta ao cancelamento. Tente novamente.',
+            )
+        if result.status == PAYMENT_PENDING:
+            return PaymentResult(
+                PAYMENT_PENDING, 'O PSP ainda não confirmou o cancelamento.'
+            )
+        return result
+
+    async def _call(self, function, *args, **kwargs) -> PaymentResult | None:
+        # Cada tentativa tem seu tempo limite; falhas de rede e respostas
+        # 5xx são repetidas com backoff
+        for attempt in range(self.attempts):
+            try:
+                return await asyncio.wait_for(
+                    function(*args, **kwargs), self.timeout
+                )
+            except (TimeoutError, ConnectionError) as e:
+                logger.warning(
+                    'Tentativa %d de %d falhou: %s',
+                    attempt + 1,
+                    self.attempts,
+                    str(e) or 'tempo esgotado',
+                )
+                if attempt + 1 < self.attempts:
+                    await asyncio.sleep(self.backoff(attempt))
+        return None
+
+    def _record(self, sale_id: int, result: PaymentResult) -> None:
+        session = self.session_factory()
+        try:
+            payments = PaymentController(session)
+            if result.status == PAYMENT_PENDING:
+                payments.record_attempt(sale_id, result.message)
+            else:
+                payments.settle(sale_id, result.status, result.message)
+        finally:
+            session.close()
+
+    def _record_error(self, sale_id: int, result: PaymentResult) -> None:
+        # A observação é só informativa: se nem ela puder ser gravada, o
+        # erro fica no log e a venda segue pendente
+        try:
+            self._record(sale_id, result)
+        except Exception:
+            logger.exception('Falha ao registrar o erro da venda %d', sale_id)
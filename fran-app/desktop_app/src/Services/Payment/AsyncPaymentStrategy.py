@@ -0,0 +1,52 @@
+# Interface assíncrona das formas de pagamento que dependem de um PSP
+# (adquirente do cartão, Pix): a cobrança leva uma chave de idempotência,
+# pode demorar e pode ficar pendente até o PSP confirmá-la
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from decimal import Decimal
+
+
+@dataclass
+class PaymentResult:
+    status: str  # PAYMENT_APPROVED, PAYMENT_DECLINED ou PAYMENT_PENDING
+    message: str = ''
+    reference: str = None  # identificador da transação no PSP
+
+
+class AsyncPaymentStrategy(ABC):
+    # Forma de pagamento gravada com a venda (ex.: 'credit_card', 'pix')
+    method: str = None
+
+    @abstractmethod
+    async def authorize(
+        self, total: Decimal, idempotency_key: str, **kwargs
+    ) -> PaymentResult:
+        """
+        Envia a cobrança ao PSP. Repetir a chamada com a mesma chave não
+        gera uma nova cobrança: o PSP devolve a resposta da primeira.
+        :param total: Valor a cobrar.
+        :param idempotency_key: Chave única da cobrança.
+        :return: Resultado da cobrança (pode estar pendente).
+        :raises: TimeoutError ou ConnectionError se o PSP não responder;
+            ValueError se recusar a requisição ou responder fora do contrato.
+        """
+
+    @abstractmethod
+    async def status(self, idempotency_key: str) -> PaymentResult:
+        """
+        Consulta no PSP a situação de uma cobrança já enviada.
+        :param idempotency_key: Chave usada em authorize.
+        :return: Resultado atual da cobrança.
+        :raises: TimeoutError ou ConnectionError se o PSP não responder.
+        """
+
+    @abstractmethod
+    async def cancel(self, idempotency_key: str) -> PaymentResult:
+        """
+        Pede ao PSP o cancelamento de uma cobrança (estorno, se já
+        aprovada). Cancelar uma cobrança que ainda não chegou ao PSP impede
+        que ela seja aprovada depois.
+        :param idempotency_key: Chave usada em authorize.
+        :return: Resultado após o pedido (cancelado se o PSP confirmou).
+        :raises: TimeoutError ou ConnectionError se o PSP não responder.
+        """
@@ -1,8 +1,13 @@
+from models import to_money
 from Services.Payment.PaymentStrategy import PaymentStrategy
 
+
 class CashPaymentStrategy(PaymentStrategy):
     def process_payment(self, total: float, **kwargs):
-        valor_pago = kwargs.get('valor_pago', 0.0)
+        # Compara em Decimal (centavos exatos), mesmo que o valor venha como
+        # float
+        total = to_money(total)
+        valor_pago = to_money(kwargs.get('valor_pago') or 0)
         if valor_pago < total:
             raise ValueError("Valor pago é insuficiente.")
         troco = valor_pago - total
@@ -0,0 +1,243 @@
+# PSP falso para desenvolvimento e testes: a mesma API usada por
+# PspPaymentStrategy, com latência, recusas e falhas configuráveis.
+# Cobranças repetidas com a mesma chave de idempotência devolvem a
+# resposta da primeira; Pix fica pendente até ser "pago" após pix_delay.
+# Cobranças pendentes ou aprovadas podem ser canceladas; cancelar uma chave
+# ainda desconhecida impede que uma cobrança atrasada com ela seja aprovada.
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from models import (
+    PAYMENT_APPROVED,
+    PAYMENT_CANCELLED,
+    PAYMENT_DECLINED,
+    PAYMENT_PENDING,
+)
+
+
+class FakePspServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        decline_rate: float = 0.0,
+        error_rate: float = 0.0,
+        pix_delay: float = 0.0,
+        failures: int = 0,
+        seed: int = None,
+    ):
+        """
+        Inicializa o servidor (porta 0 escolhe uma porta livre).
+        :param host: Endereço de escuta.
+        :param port: Porta de escuta.
+        :param latency: Atraso de cada resposta, em segundos.
+        :param jitter: Atraso aleatório adicional máximo, em segundos.
+        :param decline_rate: Fração das novas cobranças recusadas (0 a 1).
+        :param error_rate: Fração das requisições respondidas com 503 (0 a 1).
+        :param pix_delay: Segundos até uma cobrança Pix pendente ser aprovada.
+        :param failures: Quantidade das próximas requisições respondidas com
+            503.
+        :param seed: Semente do gerador aleatório.
+        """
+        super().__init__((host, port), FakePspHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.decline_rate = decline_rate
+        self.error_rate = error_rate
+        self.pix_delay = pix_delay
+        self.failures = failures
+        self.rng = random.Random(seed)
+        self.payments: dict[str, dict] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        """
+        URL base do servidor.
+        :return: URL no formato http://host:porta.
+        """
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> threading.Thread:
+        """
+        Atende as requisições em uma thread em segundo plano.
+        :return: Thread do servidor.
+        """
+        thread = threading.Thread(
+            target=self.serve_forever, daemon=True, name='fake-psp'
+        )
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        """
+        Para o servidor e libera a porta.
+        """
+        self.shutdown()
+        self.server_close()
+
+    def should_fail(self) -> bool:
+        """
+        Sorteia (ou consome de failures) uma falha temporária.
+        :return: True se a requisição deve ser respondida com 503.
+        """
+        with self.lock:
+            if self.failures > 0:
+                self.failures -= 1
+                return True
+            return self.rng.random() < self.error_rate
+
+    def charge(self, idempotency_key: str, body: dict) -> dict:
+        """
+        Cria a cobrança de uma chave ou devolve a já existente.
+        :param idempotency_key: Chave de idempotência.
+        :param body: Corpo da requisição (amount_cents, method).
+        :return: Cobrança no formato da resposta.
+        """
+        with self.lock:
+            payment = self.payments.get(idempotency_key)
+            if payment is None:
+                if self.rng.random() < self.decline_rate:
+                    status, message = PAYMENT_DECLINED, 'Pagamento recusado.'
+                elif body.get('method') == 'pix':
+                    status, message = PAYMENT_PENDING, 'Aguardando o Pix.'
+                else:
+                    status, message = PAYMENT_APPROVED, 'Pagamento aprovado.'
+                payment = {
+                    'id': uuid.uuid4().hex,
+                    'idempotency_key': idempotency_key,
+                    'amount_cents': body.get('amount_cents'),
+                    'method': body.get('method'),
+                    'status': status,
+                    'message': message,
+                    'created_at': time.monotonic(),
+                }
+                self.payments[idempotency_key] = payment
+            return self._current(payment)
+
+    def lookup(self, idempotency_key: str) -> dict | None:
+        """
+        Consulta uma cobrança.
+        :param idempotency_key: Chave de idempotência.
+        :return: Cobrança no formato da resposta, ou None se não existir.
+        """
+        with self.lock:
+            payment = self.payments.get(idempotency_key)
+            return self._current(payment) if payment else None
+
+    def cancel(self, idempotency_key: str) -> dict:
+        """
+        Cancela uma cobrança pendente ou aprovada. Recusadas continuam
+        recusadas; uma chave desconhecida é registrada como cancelada.
+        :param idempotency_key: Chave de idempotência.
+        :return: Cobrança no formato da resposta.
+        """
+        with self.lock:
+            payment = self.payments.get(idempotency_key)
+            if payment is None:
+                payment = {
+                    'id': uuid.uuid4().hex,
+                    'idempotency_key': idempotency_key,
+                    'amount_cents': None,
+                    'method': None,
+                    'status': PAYMENT_CANCELLED,
+                    'message': 'Pagamento cancelado.',
+                    'created_at': time.monotonic(),
+                }
+                self.payments[idempotency_key] = payment
+            elif self._current(payment)['status'] != PAYMENT_DECLINED:
+                payment['status'] = PAYMENT_CANCELLED
+                payment['message'] = 'Pagamento cancelado.'
+            return self._current(payment)
+
+    def _current(self, payment: dict) -> dict:
+        # Pix pendente é considerado pago depois de pix_delay segundos
+        if (
+            payment['status'] == PAYMENT_PENDING
+            and time.monotonic() - payment['created_at'] >= self.pix_delay
+        ):
+            payment['status'] = PAYMENT_APPROVED
+            payment['message'] = 'Pix recebido.'
+        return {
+            key: value for key, value in payment.items() if key != 'created_at'
+        }
+
+
+class FakePspHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def delay(self) -> None:
+        server = self.server
+        time.sleep(server.latency + server.rng.uniform(0, server.jitter))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        idempotency_key = self.headers.get('Idempotency-Key')
+        prefix, suffix = '/payments/', '/cancel'
+        if self.path.startswith(prefix) and self.path.endswith(suffix):
+            self.cancel(self.path[len(prefix) : -len(suffix)])
+            return
+        if self.path != '/payments':
+            self.reply(404, {'message': 'Recurso não encontrado.'})
+            return
+        if not idempotency_key:
+            self.reply(
+                400,
+                {
+                    'status': PAYMENT_DECLINED,
+                    'message': 'Cabeçalho Idempotency-Key ausente.',
+                },
+            )
+            return
+
+        # A cobrança é registrada mesmo que o cliente desista de esperar
+        # pela resposta, como em um PSP real
+        self.delay()
+        if self.server.should_fail():
+            self.reply(503, {'message': 'PSP indisponível.'})
+            return
+        self.reply(200, self.server.charge(idempotency_key, body))
+
+    def cancel(self, idempotency_key: str) -> None:
+        self.delay()
+        if self.server.should_fail():
+            self.reply(503, {'message': 'PSP indisponível.'})
+            return
+        self.reply(200, self.server.cancel(idempotency_key))
+
+    def do_GET(self):
+        prefix = '/payments/'
+        if not self.path.startswith(prefix):
+            self.reply(404, {'message': 'Recurso não encontrado.'})
+            return
+
+        self.delay()
+        if self.server.should_fail():
+            self.reply(503, {'message': 'PSP indisponível.'})
+            return
+        payment = self.server.lookup(self.path[len(prefix) :])
+        if payment is None:
+            self.reply(404, {'message': 'Cobrança não encontrada.'})
+            return
+        self.reply(200, payment)
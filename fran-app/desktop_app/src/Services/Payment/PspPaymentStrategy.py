@@ -0,0 +1,131 @@
+# Pagamento por cartão ou Pix através da API HTTP de um PSP
+import asyncio
+import os
+from decimal import Decimal
+
+import requests
+
+from models import PAYMENT_STATUSES, to_money
+from Services.Payment.AsyncPaymentStrategy import (
+    AsyncPaymentStrategy,
+    PaymentResult,
+)
+
+# URL do PSP; sem ela as páginas usam as estratégias síncronas
+PSP_URL = os.environ.get('FRAN_PSP_URL')
+
+# Respostas do PSP que justificam uma nova tentativa com a mesma chave
+# (404: a cobrança consultada ainda não chegou ao PSP)
+RETRY_STATUS = (404, 429, 500, 502, 503, 504)
+
+
+class PspPaymentStrategy(AsyncPaymentStrategy):
+    def __init__(
+        self, base_url: str, method: str, http=None, timeout: float = 10.0
+    ):
+        """
+        Inicializa a estratégia para uma forma de pagamento do PSP.
+        :param base_url: URL base do PSP (ex.: http://localhost:8081).
+        :param method: Forma de pagamento enviada ao PSP ('credit_card' ou
+            'pix').
+        :param http: Cliente HTTP com método request (padrão:
+            requests.Session).
+        :param timeout: Tempo limite de cada requisição, em segundos.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.method = method
+        self.http = http or requests.Session()
+        self.timeout = timeout
+
+    async def authorize(
+        self, total: Decimal, idempotency_key: str, **kwargs
+    ) -> PaymentResult:
+        """
+        Envia a cobrança ao PSP (POST /payments), sem bloquear o loop de
+        eventos: a requisição roda em uma thread auxiliar.
+        :param total: Valor a cobrar.
+        :param idempotency_key: Chave única da cobrança (cabeçalho Idempotency-
+            Key).
+        :param kwargs: Dados extras enviados ao PSP (ex.: sale_id).
+        :return: Resultado da cobrança.
+        :raises: TimeoutError ou ConnectionError se o PSP não responder.
+        """
+        body = {
+            'amount_cents': int(to_money(total) * 100),
+            'method': self.method,
+            **kwargs,
+        }
+        return await asyncio.to_thread(
+            self._request, 'POST', '/payments', idempotency_key, body
+        )
+
+    async def status(self, idempotency_key: str) -> PaymentResult:
+        """
+        Consulta a cobrança no PSP (GET /payments/<chave>).
+        :param idempotency_key: Chave usada em authorize.
+        :return: Resultado atual da cobrança.
+        :raises: TimeoutError ou ConnectionError se o PSP não responder.
+        """
+        return await asyncio.to_thread(
+            self._request,
+            'GET',
+            f'/payments/{idempotency_key}',
+            idempotency_key,
+        )
+
+    async def cancel(self, idempotency_key: str) -> PaymentResult:
+        """
+        Pede o cancelamento da cobrança ao PSP (POST /payments/<chave>/cancel).
+        :param idempotency_key: Chave usada em authorize.
+        :return: Resultado da cobrança após o pedido.
+        :raises: TimeoutError ou ConnectionError se o PSP não responder.
+        """
+        return await asyncio.to_thread(
+            self._request,
+            'POST',
+            f'/payments/{idempotency_key}/cancel',
+            idempotency_key,
+        )
+
+    def _request(
+        self, method: str, path: str, idempotency_key: str, body: dict = None
+    ) -> PaymentResult:
+        try:
+            response = self.http.request(
+                method,
+                f'{self.base_url}{path}',
+                json=body,
+                headers={'Idempotency-Key': idempotency_key},
+                timeout=self.timeout,
+            )
+        except requests.Timeout as e:
+            raise TimeoutError(f'PSP sem resposta: {e}') from e
+        except requests.RequestException as e:
+            raise ConnectionError(
+                f'Falha na comunicação com o PSP: {e}'
+            ) from e
+
+        if response.status_code in RETRY_STATUS:
+            raise ConnectionError(
+                f'PSP respondeu com o status {response.status_code}.'
+            )
+        # Demais erros (ex.: 400, 401, 422) e respostas fora do contrato não
+        # mudam com uma nova tentativa
+        if not response.ok:
+            raise ValueError(
+                f'PSP recusou a requisição com o status '
+                f'{response.status_code}.'
+            )
+        try:
+            data = response.json()
+        except ValueError as e:
+            raise ValueError('Resposta do PSP não é um JSON válido.') from e
+        if not isinstance(data, dict) or data.get('status') not in (
+            PAYMENT_STATUSES
+        ):
+            raise ValueError('Resposta do PSP sem uma situação conhecida.')
+        return PaymentResult(
+            status=data['status'],
+            message=data.get('message', ''),
+            reference=data.get('id'),
+        )
@@ -0,0 +1,130 @@
+# Cliente HTTP da sincronização: conexões reaproveitadas (keep-alive),
+# corpo JSON comprimido com gzip e novas tentativas com backoff exponencial
+import gzip
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Respostas do servidor que justificam uma nova tentativa
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class HttpClient:
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        base_url: str,
+        pool_size: int = 4,
+        retries: int = 5,
+        backoff_factor: float = 0.5,
+        timeout: float = 10.0,
+        compress_min_bytes: int = 1024,
+    ):
+        """
+        Inicializa o cliente com uma sessão e um pool de conexões próprios.
+        :param base_url: URL base do servidor (ex.: http://localhost:3000).
+        :param pool_size: Conexões mantidas abertas (limite de envios
+            simultâneos).
+        :param retries: Novas tentativas em erros de conexão e respostas
+            429/5xx.
+        :param backoff_factor: Fator do backoff exponencial entre
+            tentativas, em segundos.
+        :param timeout: Tempo limite padrão de cada requisição, em segundos.
+        :param compress_min_bytes: Corpos a partir deste tamanho são
+            enviados com gzip.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.compress_min_bytes = compress_min_bytes
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS,
+            # POST também: o servidor descarta eventos repetidos pela chave
+            # de idempotência e as linhas sincronizadas são sobrescritas
+            allowed_methods=None,
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # A consulta de status só informa se o servidor está no ar: sem
+        # novas tentativas, para não prender quem pergunta pelo backoff
+        self.session.mount(
+            self.url('/status'), HTTPAdapter(max_retries=Retry(0, read=False))
+        )
+
+    def url(self, path: str) -> str:
+        """
+        Monta a URL completa de um caminho do servidor.
+        :param path: Caminho (ex.: '/postdata') ou URL completa.
+        :return: URL completa.
+        """
+        if path.startswith(('http://', 'https://')):
+            return path
+        return f'{self.base_url}/{path.lstrip("/")}'
+
+    def check_status(self) -> bool:
+        """
+        Consulta o endpoint /status do servidor, sem novas tentativas.
+        :return: True se o servidor respondeu com sucesso.
+        """
+        try:
+            response = self.session.get(
+                self.url('/status'), timeout=self.timeout
+            )
+            return response.ok
+        except requests.RequestException:
+            return False
+
+    def get(
+        self, url: str, params: dict = None, timeout: float = None
+    ) -> requests.Response:
+        """
+        Envia um GET pela sessão.
+        :param url: Caminho ou URL completa.
+        :param params: Parâmetros da query string.
+        :param timeout: Tempo limite, em segundos (padrão: o do cliente).
+        :return: Resposta do servidor.
+        :raises: requests.RequestException se todas as tentativas falharem.
+        """
+        return self.session.get(
+            self.url(url), params=params, timeout=timeout or self.timeout
+        )
+
+    def post(
+        self, url: str, data=None, headers: dict = None, timeout: float = None
+    ) -> requests.Response:
+        """
+        Envia um POST pela sessão, comprimindo o corpo com gzip quando ele é
+        grande o suficiente. Mesma assinatura usada por SyncEngine e
+        OutboxFlusher.
+        :param url: Caminho ou URL completa.
+        :param data: Corpo da requisição (str ou bytes).
+        :param headers: Cabeçalhos adicionais.
+        :param timeout: Tempo limite, em segundos (padrão: o do cliente).
+        :return: Resposta do servidor.
+        :raises: requests.RequestException se todas as tentativas falharem.
+        """
+        headers = dict(headers or {})
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        if data is not None and len(data) >= self.compress_min_bytes:
+            data = gzip.compress(data, compresslevel=6)
+            headers['Content-Encoding'] = 'gzip'
+        return self.session.post(
+            self.url(url),
+            data=data,
+            headers=headers,
+            timeout=timeout or self.timeout,
+        )
+
+    def close(self) -> None:
+        """
+        Fecha as conexões do pool.
+        """
+        self.session.close()
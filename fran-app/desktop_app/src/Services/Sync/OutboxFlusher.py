@@ -0,0 +1,127 @@
+# Worker em segundo plano que esvazia a outbox para o servidor web
+import json
+import logging
+import threading
+
+import requests
+from sqlalchemy.orm import sessionmaker
+
+from Controllers.OutboxController import OutboxController
+from Services.Sync.WireFormat import WIRE_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxFlusher(threading.Thread):
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        session_factory: sessionmaker,
+        endpoint: str,
+        http=None,
+        batch_size: int = 100,
+        poll_interval: float = 2.0,
+        base_delay: float = 1.0,
+        max_delay: float = 300.0,
+        timeout: float = 10.0,
+    ):
+        """
+        Inicializa o worker da outbox.
+        :param session_factory: Fábrica de sessões (uma por thread).
+        :param endpoint: URL do endpoint /postdata do servidor.
+        :param http: Cliente HTTP com método post (padrão: requests.Session).
+        :param batch_size: Quantidade máxima de eventos por envio.
+        :param poll_interval: Segundos de espera quando a fila está vazia.
+        :param base_delay: Atraso inicial do backoff exponencial.
+        :param max_delay: Atraso máximo do backoff exponencial.
+        :param timeout: Tempo limite de cada requisição, em segundos.
+        """
+        super().__init__(daemon=True, name='outbox-flusher')
+        self.session_factory = session_factory
+        self.endpoint = endpoint
+        self.http = http or requests.Session()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self._stop_event = threading.Event()
+
+    def backoff(self, attempts: int) -> float:
+        """
+        Calcula o atraso da próxima tentativa.
+        :param attempts: Tentativas já realizadas.
+        :return: Atraso em segundos.
+        """
+        return min(self.base_delay * 2**attempts, self.max_delay)
+
+    def flush_once(self) -> int:
+        """
+        Envia um lote de eventos pendentes.
+        :return: Quantidade de eventos confirmados pelo servidor.
+        """
+        session = self.session_factory()
+        try:
+            outbox = OutboxController(session)
+            events = outbox.list_pending(self.batch_size)
+            if not events:
+                session.commit()
+                return 0
+
+            outbox_ids = [event.outbox_id for event in events]
+            attempts = max(event.attempts for event in events)
+            body = json.dumps({
+                'version': WIRE_VERSION,
+                'events': [
+                    {
+                        'idempotency_key': event.idempotency_key,
+                        'event_type': event.event_type,
+                        'created_at': str(event.created_at),
+                        'payload': json.loads(event.payload),
+                    }
+                    for event in events
+                ]
+            })
+            # Libera a transação de leitura antes de usar a rede
+            session.commit()
+
+            try:
+                response = self.http.post(
+                    self.endpoint,
+                    data=body,
+                    headers={'Content-Type': 'application/json'},
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
+            except requests.RequestException as e:
+                outbox.mark_failed(outbox_ids, self.backoff(attempts))
+                logger.warning('Falha ao enviar eventos da outbox: %s', e)
+                return 0
+
+            outbox.mark_sent(outbox_ids)
+            return len(outbox_ids)
+        finally:
+            session.close()
+
+    def run(self):
+        errors = 0
+        while not self._stop_event.is_set():
+            try:
+                sent = self.flush_once()
+            except Exception:
+                # Erros do banco (ex.: 'database is locked') não podem
+                # encerrar a thread: registra e tenta de novo com backoff
+                logger.exception('Erro ao esvaziar a outbox')
+                self._stop_event.wait(self.backoff(errors))
+                errors += 1
+                continue
+            errors = 0
+            if sent < self.batch_size:
+                self._stop_event.wait(self.poll_interval)
+
+    def stop(self, timeout: float = None) -> None:
+        """
+        Sinaliza o encerramento do worker e aguarda a thread terminar.
+        :param timeout: Tempo máximo de espera, em segundos.
+        """
+        self._stop_event.set()
+        self.join(timeout)
@@ -0,0 +1,179 @@
+# Reconciliação entre o banco local e a cópia do servidor por hashes de
+# intervalos de chaves (estilo árvore de Merkle). Cada nível divide o
+# anterior; só os intervalos divergentes são detalhados e reenviados.
+#
+# Hash de uma linha: SHA-256 do JSON canônico (chaves ordenadas, sem
+# espaços) dos valores de envio (ver WireFormat). Hash de um intervalo:
+# SHA-256 da concatenação dos hashes hexadecimais das suas linhas, em ordem
+# de chave. O servidor calcula os mesmos hashes em GET /data.
+import hashlib
+import json
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from Services.Sync.SyncEngine import SyncEngine
+from Services.Sync.WireFormat import table_types, wire_row
+
+# Tamanho dos intervalos de chaves em cada nível, do mais largo ao mais fino
+DIGEST_LEVELS = (4096, 256, 16)
+
+
+def row_digest(values: dict) -> str:
+    """
+    Hash de uma linha já convertida para os valores de envio.
+    :param values: Dicionário {coluna: valor de envio}.
+    :return: SHA-256 em hexadecimal.
+    """
+    canonical = json.dumps(
+        values, sort_keys=True, separators=(',', ':'), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class Reconciler:
+    def __init__(
+        self,
+        session: Session,
+        sync_engine: SyncEngine,
+        endpoint: str = '/data',
+        levels: tuple[int, ...] = DIGEST_LEVELS,
+    ):
+        """
+        Inicializa o reconciliador.
+        :param session: Instância de Session do SQLAlchemy.
+        :param sync_engine: Motor de sincronização usado para reenviar os
+            intervalos (e seu cliente HTTP).
+        :param endpoint: Endpoint do servidor que devolve os hashes.
+        :param levels: Tamanho dos intervalos em cada nível; cada um deve
+            dividir o anterior.
+        """
+        self.session = session
+        self.sync_engine = sync_engine
+        self.endpoint = endpoint
+        self.levels = levels
+
+    def local_digests(
+        self, model, size: int, start: int = None, end: int = None
+    ) -> dict[int, str]:
+        """
+        Calcula os hashes dos intervalos de `size` chaves da tabela local.
+        :param model: Modelo mapeado da tabela.
+        :param size: Quantidade de chaves por intervalo.
+        :param start: Primeira chave considerada, inclusiva (opcional).
+        :param end: Última chave considerada, inclusiva (opcional).
+        :return: Dicionário {índice do intervalo (chave // size): hash}.
+        """
+        table = model.__table__
+        pk = table.primary_key.columns[0]
+        types = table_types(table)
+        query = select(table).order_by(pk)
+        if start is not None:
+            query = query.where(pk >= start)
+        if end is not None:
+            query = query.where(pk <= end)
+
+        digests, bucket, hasher = {}, None, None
+        rows = self.session.execute(query.execution_options(yield_per=1000))
+        for row in rows.mappings():
+            row_bucket = row[pk.name] // size
+            if row_bucket != bucket:
+                if hasher is not None:
+                    digests[bucket] = hasher.hexdigest()
+                bucket, hasher = row_bucket, hashlib.sha256()
+            hasher.update(row_digest(wire_row(types, row)).encode('ascii'))
+        if hasher is not None:
+            digests[bucket] = hasher.hexdigest()
+        self.session.commit()
+        return digests
+
+    def remote_digests(
+        self, table_name: str, size: int, start: int = None, end: int = None
+    ) -> dict[int, str]:
+        """
+        Busca no servidor os hashes dos intervalos da cópia remota.
+        :param table_name: Nome da tabela.
+        :param size: Quantidade de chaves por intervalo.
+        :param start: Primeira chave considerada, inclusiva (opcional).
+        :param end: Última chave considerada, inclusiva (opcional).
+        :return: Dicionário {índice do intervalo: hash}.
+        :raises: requests.RequestException se o servidor não responder.
+        """
+        params = {'table': table_name, 'size': size}
+        if start is not None:
+            params['from'] = start
+        if end is not None:
+            params['to'] = end
+        response = self.sync_engine.http.get(
+            self.endpoint, params=params, timeout=self.sync_engine.timeout
+        )
+        response.raise_for_status()
+        return {
+            int(bucket): digest
+            for bucket, digest in response.json()['digests'].items()
+        }
+
+    def stale_ranges(self, model) -> list[tuple[int, int]]:
+        """
+        Desce pelos níveis de intervalos e lista os que divergem do servidor.
+        Intervalos que só existem de um dos lados não são detalhados.
+        :param model: Modelo mapeado da tabela.
+        :return: Lista de intervalos (primeira chave, última chave),
+            inclusivos.
+        """
+        table_name = model.__tablename__
+        pending, stale = [(None, None, 0)], []
+        while pending:
+            start, end, level = pending.pop()
+            size = self.levels[level]
+            local = self.local_digests(model, size, start, end)
+            remote = self.remote_digests(table_name, size, start, end)
+            for bucket in sorted(local.keys() | remote.keys()):
+                if local.get(bucket) == remote.get(bucket):
+                    continue
+                key_range = (bucket * size, (bucket + 1) * size - 1)
+                if (
+                    bucket not in local
+                    or bucket not in remote
+                    or level == len(self.levels) - 1
+                ):
+                    stale.append(key_range)
+                else:
+                    pending.append((*key_range, level + 1))
+        return sorted(stale)
+
+    def reconcile(self, model) -> int:
+        """
+        Reenvia ao servidor somente os intervalos divergentes de uma tabela;
+        o servidor substitui cada intervalo pelo conteúdo enviado.
+        :param model: Modelo mapeado da tabela.
+        :return: Quantidade de linhas reenviadas.
+        """
+        table = model.__table__
+        pk = table.primary_key.columns[0]
+        sent = 0
+        for start, end in self.stale_ranges(model):
+            rows = [
+                dict(row._mapping)
+                for row in self.session.execute(
+                    select(table).where(pk.between(start, end)).order_by(pk)
+                )
+            ]
+            self.session.commit()
+            batches = list(self.sync_engine.split_batches(rows)) or [[]]
+            # Só o primeiro lote limpa o intervalo; os demais complementam
+            self.sync_engine.send_batch(table.name, batches[0], (start, end))
+            for batch in batches[1:]:
+                self.sync_engine.send_batch(table.name, batch)
+            sent += len(rows)
+        return sent
+
+    def run_once(self) -> dict[str, int]:
+        """
+        Reconcilia todas as tabelas do motor de sincronização.
+        :return: Quantidade de linhas reenviadas por tabela.
+        """
+        return {
+            model.__tablename__: self.reconcile(model)
+            for model, _ in self.sync_engine.tables
+        }
@@ -0,0 +1,221 @@
+# Motor de sincronização incremental entre o banco local e o servidor web
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from models import (
+    ItemSale,
+    Product,
+    Sale,
+    Storage,
+    SyncCursor,
+    table_registry,
+)
+from Services.Sync.WireFormat import encode_batch, serialize
+
+# Tabelas sincronizadas, na ordem de dependência das chaves estrangeiras.
+# Cada entrada: (modelo, coluna de marca d'água ou None para usar só a PK)
+SYNC_TABLES = [
+    (Product, None),
+    (Storage, Storage.datetime),
+    (Sale, Sale.datetime),
+    (ItemSale, None),
+]
+
+
+class SyncEngine:
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        session: Session,
+        endpoint: str,
+        http=None,
+        batch_size: int = 500,
+        max_batch_bytes: int = 256 * 1024,
+        timeout: float = 10.0,
+        tables: list = None,
+        concurrency: int = 1,
+        wire_format: str = 'json',
+    ):
+        """
+        Inicializa o motor de sincronização.
+        :param session: Instância de Session do SQLAlchemy.
+        :param endpoint: URL do endpoint /postdata do servidor.
+        :param http: Cliente HTTP com método post (padrão: requests.Session).
+        :param batch_size: Quantidade máxima de linhas por lote.
+        :param max_batch_bytes: Tamanho máximo do corpo JSON de cada lote.
+        :param timeout: Tempo limite de cada requisição, em segundos.
+        :param tables: Tabelas a sincronizar (padrão: SYNC_TABLES).
+        :param concurrency: Lotes enviados ao mesmo tempo (use com um cliente
+            com pool, como HttpClient).
+        :param wire_format: Serialização dos lotes colunares: 'json' ou
+            'msgpack'.
+        """
+        self.session = session
+        self.endpoint = endpoint
+        self.http = http or requests.Session()
+        self.batch_size = batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self.timeout = timeout
+        self.tables = tables if tables is not None else SYNC_TABLES
+        self.concurrency = concurrency
+        self.wire_format = wire_format
+
+    def get_cursor(self, table_name: str) -> SyncCursor:
+        """
+        Recupera o cursor persistido de uma tabela, criando-o se necessário.
+        :param table_name: Nome da tabela.
+        :return: Instância de SyncCursor.
+        """
+        cursor = self.session.get(SyncCursor, table_name)
+        if cursor is None:
+            cursor = SyncCursor(table_name=table_name)
+            self.session.add(cursor)
+        return cursor
+
+    def pending_rows(self, model, hwm_column, cursor: SyncCursor):
+        """
+        Busca a próxima página de linhas novas ou alteradas após o cursor.
+        :param model: Modelo mapeado da tabela.
+        :param hwm_column: Coluna de marca d'água (ou None).
+        :param cursor: Cursor atual da tabela.
+        :return: Lista de dicionários com as linhas pendentes.
+        """
+        table = model.__table__
+        pk = table.primary_key.columns[0]
+        query = select(table)
+
+        if hwm_column is None:
+            query = query.where(pk > cursor.last_pk).order_by(pk)
+        else:
+            if cursor.last_value is not None:
+                query = query.where(
+                    or_(
+                        hwm_column > cursor.last_value,
+                        and_(
+                            hwm_column == cursor.last_value,
+                            pk > cursor.last_pk,
+                        ),
+                    )
+                )
+            query = query.order_by(hwm_column, pk)
+
+        rows = self.session.execute(query.limit(self.batch_size))
+        return [dict(row._mapping) for row in rows]
+
+    def split_batches(self, rows: list[dict]):
+        """
+        Divide as linhas em lotes limitados por quantidade e por bytes.
+        :param rows: Linhas a serem enviadas.
+        :return: Gerador de listas de linhas.
+        """
+        # Colchetes e vírgulas do array JSON entram na conta do tamanho
+        batch, size = [], 1
+        for row in rows:
+            row_size = len(json.dumps(row, default=str)) + 1
+            if batch and size + row_size > self.max_batch_bytes:
+                yield batch
+                batch, size = [], 1
+            batch.append(row)
+            size += row_size
+        if batch:
+            yield batch
+
+    def send_batch(
+        self,
+        table_name: str,
+        rows: list[dict],
+        key_range: tuple[int, int] = None,
+    ) -> None:
+        """
+        Envia um lote de linhas ao servidor no formato colunar versionado
+        (ver WireFormat).
+        :param table_name: Nome da tabela.
+        :param rows: Linhas do lote.
+        :param key_range: Intervalo de chaves que o servidor deve substituir
+            por este lote (opcional).
+        :raises: requests.HTTPError se o servidor recusar o lote.
+        """
+        batch = encode_batch(
+            table_registry.metadata.tables[table_name], rows, key_range
+        )
+        body, content_type = serialize(batch, self.wire_format)
+        response = self.http.post(
+            self.endpoint,
+            data=body,
+            headers={'Content-Type': content_type},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+    def send_batches(self, table_name: str, rows: list[dict]):
+        """
+        Envia os lotes das linhas, até `concurrency` ao mesmo tempo, e os
+        devolve na ordem original à medida que são confirmados, para que o
+        cursor só avance sobre lotes já aceitos.
+        :param table_name: Nome da tabela.
+        :param rows: Linhas a serem enviadas.
+        :return: Gerador dos lotes confirmados, em ordem.
+        :raises: requests.RequestException no primeiro lote recusado.
+        """
+        batches = self.split_batches(rows)
+        if self.concurrency <= 1:
+            for batch in batches:
+                self.send_batch(table_name, batch)
+                yield batch
+            return
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [
+                (batch, executor.submit(self.send_batch, table_name, batch))
+                for batch in batches
+            ]
+            for batch, future in futures:
+                future.result()
+                yield batch
+
+    def sync_table(self, model, hwm_column) -> int:
+        """
+        Envia todas as linhas pendentes de uma tabela, avançando o cursor
+        a cada lote confirmado pelo servidor.
+        :param model: Modelo mapeado da tabela.
+        :param hwm_column: Coluna de marca d'água (ou None).
+        :return: Quantidade de linhas enviadas.
+        """
+        table = model.__table__
+        pk_name = table.primary_key.columns[0].name
+        hwm_name = hwm_column.name if hwm_column is not None else None
+        cursor = self.get_cursor(table.name)
+        sent = 0
+
+        while True:
+            rows = self.pending_rows(model, hwm_column, cursor)
+            # Libera a transação de leitura antes de usar a rede
+            self.session.commit()
+            if not rows:
+                break
+
+            for batch in self.send_batches(table.name, rows):
+                last = batch[-1]
+                cursor.last_pk = last[pk_name]
+                if hwm_name is not None:
+                    cursor.last_value = last[hwm_name]
+                self.session.commit()
+                sent += len(batch)
+
+            if len(rows) < self.batch_size:
+                break
+
+        return sent
+
+    def run_once(self) -> dict[str, int]:
+        """
+        Executa um ciclo de sincronização para todas as tabelas.
+        :return: Quantidade de linhas enviadas por tabela.
+        """
+        return {
+            model.__tablename__: self.sync_table(model, hwm_column)
+            for model, hwm_column in self.tables
+        }
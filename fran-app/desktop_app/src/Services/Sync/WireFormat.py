@@ -0,0 +1,180 @@
+# Formato dos lotes enviados ao servidor (versão 1): colunar, com um array
+# de valores por campo, em JSON ou MessagePack (opcional). Dinheiro vai em
+# centavos inteiros e datas em segundos desde a época.
+#
+# {
+#     "version": 1,
+#     "table": "product",
+#     "key": "product_id",
+#     "count": 2,
+#     "types": {"product_id": "int", "name": "str", "price": "money", ...},
+#     "columns": {"product_id": [1, 2], "name": ["Bolo", "Suco"], ...}
+# }
+#
+# Lotes de reconciliação trazem também "range": [início, fim] (chaves
+# inclusivas): o servidor descarta o que tinha nesse intervalo antes de
+# gravar as linhas do lote.
+import datetime as dt
+import json
+from decimal import Decimal
+
+from sqlalchemy import Date, Float, Integer, Table
+
+from models import EpochDateTime, Money
+
+WIRE_VERSION = 1
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'msgpack': 'application/msgpack',
+}
+
+
+def field_type(column_type) -> str:
+    """
+    Tipo de um campo no formato de envio.
+    :param column_type: Tipo da coluna no SQLAlchemy.
+    :return: 'money', 'epoch', 'date', 'int', 'float' ou 'str'.
+    """
+    if isinstance(column_type, Money):
+        return 'money'
+    if isinstance(column_type, EpochDateTime):
+        return 'epoch'
+    if isinstance(column_type, Date):
+        return 'date'
+    if isinstance(column_type, Integer):
+        return 'int'
+    if isinstance(column_type, Float):
+        return 'float'
+    return 'str'
+
+
+def _to_wire(value, kind: str):
+    if value is None:
+        return None
+    if kind == 'money':
+        return int(Decimal(value) * 100)
+    if kind == 'epoch':
+        return int(value.timestamp())
+    if kind == 'date':
+        return value.isoformat()
+    return value
+
+
+def _from_wire(value, kind: str):
+    if value is None:
+        return None
+    if kind == 'money':
+        return Decimal(value).scaleb(-2)
+    if kind == 'epoch':
+        return dt.datetime.fromtimestamp(value)
+    if kind == 'date':
+        return dt.date.fromisoformat(value)
+    return value
+
+
+def table_types(table: Table) -> dict[str, str]:
+    """
+    Tipos de envio de cada coluna de uma tabela.
+    :param table: Tabela de origem.
+    :return: Dicionário {coluna: tipo}.
+    """
+    return {column.name: field_type(column.type) for column in table.columns}
+
+
+def wire_row(types: dict[str, str], row: dict) -> dict:
+    """
+    Converte uma linha para os valores usados no envio.
+    :param types: Tipos de envio das colunas (ver table_types).
+    :param row: Linha com os valores lidos do banco.
+    :return: Dicionário {coluna: valor de envio}.
+    """
+    return {name: _to_wire(row[name], kind) for name, kind in types.items()}
+
+
+def encode_batch(
+    table: Table, rows: list[dict], key_range: tuple[int, int] = None
+) -> dict:
+    """
+    Converte linhas de uma tabela para o formato colunar.
+    :param table: Tabela de origem.
+    :param rows: Linhas (dicionários com as colunas da tabela).
+    :param key_range: Intervalo de chaves substituído por este lote (opcional).
+    :return: Lote no formato de envio.
+    """
+    types = table_types(table)
+    batch = {
+        'version': WIRE_VERSION,
+        'table': table.name,
+        'key': table.primary_key.columns[0].name,
+        'count': len(rows),
+        'types': types,
+        'columns': {
+            name: [_to_wire(row[name], kind) for row in rows]
+            for name, kind in types.items()
+        },
+    }
+    if key_range is not None:
+        batch['range'] = list(key_range)
+    return batch
+
+
+def decode_batch(batch: dict) -> list[dict]:
+    """
+    Converte um lote colunar de volta em linhas.
+    :param batch: Lote no formato de envio.
+    :return: Lista de dicionários, um por linha.
+    :raises: ValueError se a versão não for suportada.
+    """
+    if batch.get('version') != WIRE_VERSION:
+        raise ValueError(
+            f'Versão do formato não suportada: {batch.get("version")}'
+        )
+
+    types, columns = batch['types'], batch['columns']
+    return [
+        {
+            name: _from_wire(columns[name][index], kind)
+            for name, kind in types.items()
+        }
+        for index in range(batch['count'])
+    ]
+
+
+def serialize(batch: dict, fmt: str = 'json') -> tuple[bytes, str]:
+    """
+    Serializa um lote em JSON ou MessagePack.
+    :param batch: Lote no formato de envio.
+    :param fmt: 'json' ou 'msgpack'.
+    :return: Tupla (corpo, Content-Type).
+    :raises: ValueError se o formato for inválido.
+    :raises: ImportError se o formato for 'msgpack' e o pacote não estiver
+        instalado.
+    """
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f'Formato de envio inválido: {fmt}')
+
+    if fmt == 'msgpack':
+        # Dependência opcional: só necessária para enviar em MessagePack
+        import msgpack  # noqa: PLC0415
+
+        body = msgpack.packb(batch, use_bin_type=True)
+    else:
+        body = json.dumps(
+            batch, separators=(',', ':'), ensure_ascii=False
+        ).encode('utf-8')
+    return body, CONTENT_TYPES[fmt]
+
+
+def deserialize(body: bytes, content_type: str) -> dict:
+    """
+    Lê um lote serializado por serialize.
+    :param body: Corpo recebido.
+    :param content_type: Content-Type do corpo.
+    :return: Lote no formato de envio.
+    """
+    if content_type == CONTENT_TYPES['msgpack']:
+        import msgpack  # noqa: PLC0415
+
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
@@ -0,0 +1,10 @@
+# Recalcula o consolidado diário de vendas (daily_product_sales) a partir
+# de todo o histórico de vendas
+from Controllers.DailySalesController import DailySalesController
+from database import get_session
+
+db = get_session()
+
+rows = DailySalesController(session=db).rebuild()
+print(f'Consolidado diário reconstruído: {rows} linhas (dia, produto)')
+db.close()
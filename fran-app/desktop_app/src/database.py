@@ -0,0 +1,129 @@
+# Configuração única do banco de dados, compartilhada pelas páginas e scripts
+import os
+from functools import lru_cache
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import migrations
+from models import table_registry
+
+# Diretório deste arquivo (dentro de 'src')
+base_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Pode ser sobrescrito pela variável de ambiente FRAN_DATABASE_URL
+DATABASE_URL = os.environ.get(
+    'FRAN_DATABASE_URL', f'sqlite:///{os.path.join(base_dir, "test.db")}'
+)
+
+# Ajustes aplicados a cada nova conexão SQLite
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',  # leitores não bloqueiam o escritor
+    'synchronous': 'NORMAL',  # seguro com WAL e evita fsync por commit
+    'cache_size': -20000,  # ~20 MB de cache de páginas
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
+
+def enable_sqlite_transactions(engine: Engine) -> None:
+    """
+    Faz o SQLAlchemy emitir o BEGIN de cada transação. Por conta própria,
+    o driver sqlite3 só abre transações antes de INSERT/UPDATE/DELETE, de
+    modo que DDL e PRAGMAs (ex.: nas migrações) eram gravados na hora e
+    não podiam ser desfeitos; também viabiliza SAVEPOINTs. Receita da
+    documentação do dialeto SQLite do SQLAlchemy.
+    :param engine: Engine SQLite, antes de abrir a primeira conexão.
+    """
+
+    @event.listens_for(engine, 'connect')
+    def disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def emit_begin(connection):
+        connection.exec_driver_sql('BEGIN')
+
+
+def init_db(engine: Engine) -> None:
+    """
+    Cria as tabelas que ainda não existem e aplica as migrações pendentes
+    (colunas, índices e backfills de bancos já instalados).
+    :param engine: Engine do SQLAlchemy.
+    """
+    table_registry.metadata.create_all(engine)
+    if engine.dialect.name == 'sqlite':
+        migrations.upgrade(engine)
+
+
+@lru_cache
+def get_engine(url: str = None) -> Engine:
+    """
+    Retorna a engine do banco, criada uma única vez por processo e URL.
+    :param url: URL do banco (padrão: DATABASE_URL).
+    :return: Engine configurada.
+    """
+    url = url or DATABASE_URL
+    if url in {'sqlite://', 'sqlite:///:memory:'}:
+        # Banco em memória precisa de uma única conexão compartilhada
+        engine = create_engine(
+            url,
+            connect_args={'check_same_thread': False},
+            poolclass=StaticPool,
+        )
+    else:
+        engine = create_engine(
+            url,
+            connect_args={'check_same_thread': False},
+            pool_size=5,
+            max_overflow=10,
+        )
+
+    if engine.dialect.name == 'sqlite':
+        enable_sqlite_transactions(engine)
+        event.listen(engine, 'connect', _set_sqlite_pragmas)
+
+    init_db(engine)
+    return engine
+
+
+@lru_cache
+def get_session_factory(url: str = None) -> scoped_session:
+    """
+    Retorna a fábrica de sessões com escopo por thread (uma por execução
+    de página do Streamlit ou por worker).
+    :param url: URL do banco (padrão: DATABASE_URL).
+    :return: Instância de scoped_session.
+    """
+    return scoped_session(
+        sessionmaker(autocommit=False, autoflush=False, bind=get_engine(url))
+    )
+
+
+def get_session(url: str = None) -> Session:
+    """
+    Retorna a sessão da thread atual.
+    :param url: URL do banco (padrão: DATABASE_URL).
+    :return: Instância de Session do SQLAlchemy.
+    """
+    return get_session_factory(url)()
+
+
+def release_session(url: str = None) -> None:
+    """
+    Fecha e descarta a sessão da thread atual, devolvendo sua conexão ao
+    pool. As páginas chamam no início (sessão deixada por uma execução
+    interrompida por st.rerun/st.stop) e no fim de cada execução.
+    :param url: URL do banco (padrão: DATABASE_URL).
+    """
+    get_session_factory(url).remove()
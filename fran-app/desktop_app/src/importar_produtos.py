@@ -0,0 +1,18 @@
+# Importa produtos e estoque em lote a partir de um arquivo CSV ou JSON.
+# Uso: python src/importar_produtos.py caminho/do/arquivo.csv
+import sys
+
+from database import get_session
+from Services.Import.ProductImporter import ProductImporter
+
+db = get_session()
+
+result = ProductImporter(session=db).import_file(sys.argv[1])
+print(
+    f'Produtos criados: {result["created"]}, '
+    f'atualizados: {result["updated"]}, '
+    f'com erro: {len(result["errors"])}'
+)
+for error in result['errors']:
+    print(f'  linha {error["row"]}: {error["error"]}')
+db.close()
@@ -0,0 +1,375 @@
+# Instrumentação opcional dos caminhos quentes: quantidade de instruções
+# SQL, tempo gasto no banco, linhas lidas e commits de cada chamada de
+# método da facade e dos controladores, por página do Streamlit e
+# acumulados no processo (texto no formato do Prometheus).
+# Ativada nas páginas pela variável de ambiente FRAN_INSTRUMENTATION=1.
+import contextvars
+import functools
+import logging
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Escopos abertos na thread atual (página e chamadas de método aninhadas);
+# cada instrução SQL é contada em todos eles
+_active_scopes = contextvars.ContextVar('active_scopes', default=())
+# Página em andamento na thread atual, que recebe o resumo de cada chamada
+_current_request = contextvars.ContextVar('current_request', default=None)
+
+_QUERY_START = 'instrumentation_query_start'
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    sql_seconds: float = 0.0
+    rows: int = 0
+    commits: int = 0
+
+
+@dataclass
+class MethodStats:
+    calls: int = 0
+    statements: int = 0
+    sql_seconds: float = 0.0
+    rows: int = 0
+    commits: int = 0
+    seconds: float = 0.0
+    max_statements: int = 0
+
+    def add_call(self, stats: QueryStats, seconds: float) -> None:
+        self.calls += 1
+        self.statements += stats.statements
+        self.sql_seconds += stats.sql_seconds
+        self.rows += stats.rows
+        self.commits += stats.commits
+        self.seconds += seconds
+        self.max_statements = max(self.max_statements, stats.statements)
+
+
+@dataclass
+class RequestStats:
+    name: str
+    totals: QueryStats = field(default_factory=QueryStats)
+    methods: dict[str, MethodStats] = field(default_factory=dict)
+    started: float = field(default_factory=time.perf_counter)
+    seconds: float = 0.0
+
+    def summary(self) -> dict:
+        """
+        Resumo da página para log ou exibição.
+        :return: Dicionário com name, seconds, os totais e as estatísticas por
+            método.
+        """
+        return {
+            'name': self.name,
+            'seconds': round(self.seconds, 6),
+            **asdict(self.totals),
+            'methods': {
+                name: asdict(stats)
+                for name, stats in sorted(self.methods.items())
+            },
+        }
+
+
+def _add_to_scopes(**values) -> None:
+    for scope in _active_scopes.get():
+        for name, value in values.items():
+            setattr(scope, name, getattr(scope, name) + value)
+
+
+def _count_row(cursor, row):
+    # row_factory do sqlite3: chamada para cada linha lida do banco
+    _add_to_scopes(rows=1)
+    return row
+
+
+def _before_cursor_execute(  # noqa: PLR0913, PLR0917
+    conn, cursor, statement, parameters, context, executemany
+):
+    if _active_scopes.get() and isinstance(cursor, sqlite3.Cursor):
+        cursor.row_factory = _count_row
+    conn.info.setdefault(_QUERY_START, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(  # noqa: PLR0913, PLR0917
+    conn, cursor, statement, parameters, context, executemany
+):
+    started = conn.info[_QUERY_START].pop()
+    # Linhas lidas de SELECTs são contadas pelo row_factory do cursor
+    # (SQLite); as demais instruções contam as linhas alteradas
+    changed = cursor.rowcount if cursor.description is None else 0
+    _add_to_scopes(
+        statements=1,
+        sql_seconds=time.perf_counter() - started,
+        rows=max(changed, 0),
+    )
+
+
+def _on_commit(conn):
+    _add_to_scopes(commits=1)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# (métrica, campo de MethodStats, tipo, descrição) do texto do Prometheus
+PROMETHEUS_METRICS = (
+    ('fran_method_calls_total', 'calls', 'counter', 'Chamadas do método.'),
+    (
+        'fran_method_sql_statements_total',
+        'statements',
+        'counter',
+        'Instruções SQL executadas durante as chamadas.',
+    ),
+    (
+        'fran_method_sql_seconds_total',
+        'sql_seconds',
+        'counter',
+        'Tempo gasto executando SQL durante as chamadas, em segundos.',
+    ),
+    (
+        'fran_method_sql_rows_total',
+        'rows',
+        'counter',
+        'Linhas lidas ou alteradas durante as chamadas.',
+    ),
+    (
+        'fran_method_commits_total',
+        'commits',
+        'counter',
+        'Commits feitos durante as chamadas.',
+    ),
+    (
+        'fran_method_seconds_total',
+        'seconds',
+        'counter',
+        'Tempo total das chamadas, em segundos.',
+    ),
+    (
+        'fran_method_max_sql_statements',
+        'max_statements',
+        'gauge',
+        'Maior quantidade de instruções SQL em uma única chamada.',
+    ),
+)
+
+
+class Instrumentation:
+    def __init__(self, enabled: bool = False):
+        """
+        Inicializa o registro de estatísticas por método.
+        :param enabled: Se as páginas devem instrumentar seus controladores
+            (ver begin_page).
+        """
+        self.enabled = enabled
+        self.methods: dict[str, MethodStats] = {}
+        self._lock = threading.Lock()
+        self._engines = weakref.WeakSet()
+
+    def install(self, engine: Engine) -> None:
+        """
+        Registra os eventos do SQLAlchemy na engine (uma vez por engine).
+        Só são contadas as instruções executadas dentro de um escopo aberto
+        por track, instrument ou begin_page.
+        :param engine: Engine do SQLAlchemy.
+        """
+        if engine in self._engines:
+            return
+        self._engines.add(engine)
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'commit', _on_commit)
+
+    @contextmanager
+    def track(self, name: str):
+        """
+        Conta as instruções, o tempo de SQL, as linhas e os commits de um
+        trecho de código e soma o resultado às estatísticas de `name`.
+        :param name: Nome do método ou trecho (ex.: 'SaleController.checkout').
+        :return: Gerenciador de contexto que entrega o QueryStats do trecho.
+        """
+        stats = QueryStats()
+        token = _active_scopes.set((*_active_scopes.get(), stats))
+        started = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            seconds = time.perf_counter() - started
+            _active_scopes.reset(token)
+            with self._lock:
+                self.methods.setdefault(name, MethodStats()).add_call(
+                    stats, seconds
+                )
+            request = _current_request.get()
+            if request is not None:
+                request.methods.setdefault(name, MethodStats()).add_call(
+                    stats, seconds
+                )
+
+    def wrap(self, name: str, function):
+        """
+        Envolve uma função para que cada chamada seja contada por track.
+        :param name: Nome usado nas estatísticas.
+        :param function: Função ou método ligado.
+        :return: Função envolvida.
+        """
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with self.track(name):
+                return function(*args, **kwargs)
+
+        wrapper.__instrumented__ = True
+        return wrapper
+
+    def instrument(self, obj, _seen: set = None):
+        """
+        Instrumenta os métodos públicos de uma instância (facade ou
+        controlador) e, recursivamente, dos controladores que ela guarda em
+        atributos terminados em '_controller'. Só a instância é alterada.
+        :param obj: Instância a instrumentar.
+        :return: A própria instância.
+        """
+        seen = _seen if _seen is not None else set()
+        if id(obj) in seen:
+            return obj
+        seen.add(id(obj))
+
+        prefix = type(obj).__name__
+        for name in dir(type(obj)):
+            if name.startswith('_'):
+                continue
+            method = getattr(obj, name)
+            if not callable(method) or getattr(
+                method, '__instrumented__', False
+            ):
+                continue
+            setattr(obj, name, self.wrap(f'{prefix}.{name}', method))
+
+        for name, value in vars(obj).items():
+            if name.endswith('_controller'):
+                self.instrument(value, seen)
+        return obj
+
+    def begin_page(self, name: str, engine: Engine, *objects):
+        """
+        Abre o escopo de uma execução de página do Streamlit e instrumenta
+        os controladores usados por ela. Não faz nada se a instrumentação
+        estiver desativada.
+        :param name: Nome da página.
+        :param engine: Engine usada pela página.
+        :param objects: Facade e controladores da página.
+        :return: RequestStats da execução, ou None se desativada.
+        """
+        if not self.enabled:
+            return None
+
+        self.install(engine)
+        for obj in objects:
+            self.instrument(obj)
+        request = RequestStats(name)
+        # A thread do Streamlit é reaproveitada entre execuções: o escopo
+        # anterior (interrompido por st.rerun, por exemplo) é descartado
+        _active_scopes.set((request.totals,))
+        _current_request.set(request)
+        return request
+
+    def end_page(self, request: RequestStats) -> dict | None:
+        """
+        Fecha o escopo da página, registra o resumo no log e o mostra na
+        barra lateral.
+        :param request: Valor devolvido por begin_page.
+        :return: Resumo da execução, ou None se desativada.
+        """
+        if request is None:
+            return None
+
+        request.seconds = time.perf_counter() - request.started
+        _active_scopes.set(())
+        _current_request.set(None)
+        summary = request.summary()
+        logger.info(
+            '%s: %d instruções SQL (%.1f ms), %d linhas, %d commits',
+            request.name,
+            request.totals.statements,
+            request.totals.sql_seconds * 1000,
+            request.totals.rows,
+            request.totals.commits,
+        )
+        self.render_sidebar(summary)
+        return summary
+
+    def render_sidebar(self, summary: dict) -> None:
+        """
+        Mostra o resumo da página e o texto do Prometheus na barra lateral.
+        :param summary: Resumo devolvido por RequestStats.summary.
+        """
+        # Só as páginas usam o Streamlit; scripts e testes não precisam dele
+        import streamlit as st  # noqa: PLC0415
+
+        with st.sidebar.expander('Depuração: consultas SQL'):
+            st.metric('Instruções SQL', summary['statements'])
+            st.metric(
+                'Tempo em SQL (ms)', round(summary['sql_seconds'] * 1000, 1)
+            )
+            st.metric('Linhas', summary['rows'])
+            st.metric('Commits', summary['commits'])
+            st.dataframe(
+                [
+                    {'método': name, **stats}
+                    for name, stats in summary['methods'].items()
+                ],
+                hide_index=True,
+            )
+            st.code(self.prometheus_text(), language='text')
+
+    def snapshot(self) -> dict[str, dict]:
+        """
+        Cópia das estatísticas acumuladas no processo.
+        :return: Dicionário {método: estatísticas}.
+        """
+        with self._lock:
+            return {
+                name: asdict(stats) for name, stats in self.methods.items()
+            }
+
+    def prometheus_text(self) -> str:
+        """
+        Estatísticas acumuladas no formato de exposição em texto do
+        Prometheus, com o método no rótulo 'method'.
+        :return: Texto das métricas.
+        """
+        methods = sorted(self.snapshot().items())
+        lines = []
+        for metric, key, kind, description in PROMETHEUS_METRICS:
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} {kind}')
+            lines.extend(
+                f'{metric}{{method="{_escape_label(name)}"}} {stats[key]}'
+                for name, stats in methods
+            )
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        """
+        Zera as estatísticas acumuladas.
+        """
+        with self._lock:
+            self.methods.clear()
+
+
+# Instância compartilhada pelas páginas do processo
+instrumentation = Instrumentation(
+    enabled=os.environ.get('FRAN_INSTRUMENTATION') == '1'
+)
@@ -1,47 +1,70 @@
 # Este arquivo é responsável por enviar os dados locais ao servidor web
 import time
-import os
-from IntegrationFacade import IntegrationFacade
+
 import requests
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from models import table_registry
-from urllib.parse import urlencode
-
-data_endpoint = 'http://localhost:3000/postdata'
-
-# Configurações do banco de dados
-base_dir = os.path.dirname(os.path.abspath(__file__))
-db_path = os.path.join(base_dir, '..', 'test.db')
-engine = create_engine(f'sqlite:///{db_path}')
-table_registry.metadata.create_all(engine)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-db = SessionLocal()
 
-# Instância da classe que implementa o pattern Facade
-integrationFacade = IntegrationFacade(session=db)
+from database import get_session_factory
+from Services.Sync.HttpClient import HttpClient
+from Services.Sync.OutboxFlusher import OutboxFlusher
+from Services.Sync.Reconciler import Reconciler
+from Services.Sync.SyncEngine import SYNC_TABLES, SyncEngine
+
+server_url = 'http://localhost:3000'
+data_endpoint = '/postdata'
+sync_interval = 60  # segundos entre ciclos de sincronização
+upload_concurrency = 4  # lotes enviados ao mesmo tempo
+reconcile_every = 10  # ciclos entre reconciliações com a cópia do servidor
 
-# print(integrationFacade.list_products())
-# print("pula linha")
-# print(integrationFacade.list_products_in_dict())
+# Conexões reaproveitadas, gzip e novas tentativas com backoff
+http = HttpClient(server_url, pool_size=upload_concurrency + 1)
+
+# Mesma engine e banco usados pelas páginas do Streamlit
+SessionLocal = get_session_factory()
+db = SessionLocal()
 
-encoded_data_products = urlencode({"products": integrationFacade.list_products()})
+# Envia apenas as linhas novas desde o último ciclo (cursor salvo no banco).
+# Os eventos de vendas e estoque seguem pela outbox; as tabelas de vendas
+# também são copiadas para que a reconciliação cubra estornos e exclusões.
+syncEngine = SyncEngine(
+    session=db,
+    endpoint=data_endpoint,
+    http=http,
+    tables=SYNC_TABLES,
+    concurrency=upload_concurrency,
+)
+# Compara hashes por intervalo e reenvia só o que divergir
+reconciler = Reconciler(session=db, sync_engine=syncEngine)
+outboxFlusher = OutboxFlusher(
+    session_factory=SessionLocal, endpoint=data_endpoint, http=http
+)
 
-for i in range(5):
-    print(f'Iniciando envio de dados para {data_endpoint} em formato de lista')
-    r = requests.post(url=data_endpoint, data=encoded_data_products)
-    time.sleep(5)
-    print('status da operação: ', r.status_code)
-    print(f'envios restantes: {5 - i - 1}')
-    time.sleep(1)
 
+def main():
+    outboxFlusher.start()
+    cycle = 0
+    while True:
+        if not http.check_status():
+            print(f'Servidor {server_url} indisponível, tentando mais tarde')
+            time.sleep(sync_interval)
+            continue
 
-for i in range(5):
-    print(f'Iniciando envio de dados para {data_endpoint} em formato de dicionário')
-    r = requests.post(url=data_endpoint, data=integrationFacade.list_products_in_dict())
-    time.sleep(5)
-    print('status da operação: ', r.status_code)
-    print(f'envios restantes: {5 - i - 1}')
-    time.sleep(1)    
+        print(f'Iniciando sincronização com {server_url}')
+        try:
+            sent = syncEngine.run_once()
+            print('linhas enviadas por tabela: ', sent)
+            if cycle % reconcile_every == 0:
+                resent = reconciler.run_once()
+                print('linhas reenviadas na reconciliação: ', resent)
+        except requests.RequestException as e:
+            db.rollback()
+            print(f'Falha na sincronização, nova tentativa em breve: {e}')
+        else:
+            cycle += 1
+        # Encerra a transação de leitura: o próximo ciclo vê as gravações
+        # das páginas e o WAL pode ser consolidado enquanto espera
+        db.close()
+        time.sleep(sync_interval)
 
 
+if __name__ == '__main__':
+    main()
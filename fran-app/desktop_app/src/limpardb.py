@@ -1,21 +1,13 @@
 # Importando os controladores e configurando a sessão
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-
 from Controllers.ItemSaleController import (
     ItemSaleController,  # Certifique-se de que o ItemSaleController está importado
 )
 from Controllers.ProductController import ProductController
 from Controllers.StorageController import StorageController
+from database import get_session
 
-# Configuração do banco de dados
-engine = create_engine(
-    'sqlite:///test.db'
-)  # ou o caminho correto do seu banco de dados
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Criando a sessão
-db = SessionLocal()
+# Criando a sessão sobre o banco compartilhado pela aplicação
+db = get_session()
 
 # Criando a instância do ItemSaleController
 itemSaleController = ItemSaleController(session=db)
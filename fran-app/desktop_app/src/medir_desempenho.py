@@ -0,0 +1,78 @@
+# Mede o desempenho dos controladores, do checkout e da montagem dos lotes
+# de sincronização em bancos sintéticos de 1 mil, 10 mil e 100 mil linhas.
+# Uso: python src/medir_desempenho.py [--sizes 1000 10000] [--output r.json]
+#                                     [--compare anterior.json]
+# Cada tamanho usa um banco SQLite temporário; o banco da aplicação não é
+# alterado.
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from sqlalchemy import create_engine
+
+from database import enable_sqlite_transactions, init_db
+from Services.Benchmark.BenchmarkSuite import (
+    DEFAULT_SIZES,
+    RESULTS_VERSION,
+    BenchmarkSuite,
+    compare_results,
+    environment,
+    seed,
+)
+
+parser = argparse.ArgumentParser(
+    description='Mede o desempenho dos caminhos principais do PDV.'
+)
+parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+parser.add_argument('--repeat', type=int, default=30)
+parser.add_argument('--warmup', type=int, default=3)
+parser.add_argument('--scenarios', nargs='+', default=None)
+parser.add_argument('--output', help='arquivo JSON com os resultados')
+parser.add_argument('--compare', help='resultado anterior para comparação')
+parser.add_argument('--threshold', type=float, default=0.2)
+args = parser.parse_args()
+
+report = {'version': RESULTS_VERSION, 'environment': environment()}
+results = []
+with tempfile.TemporaryDirectory() as directory:
+    for size in args.sizes:
+        url = f'sqlite:///{os.path.join(directory, f"bench_{size}.db")}'
+        # Engine própria por tamanho (get_engine a guardaria em cache)
+        engine = create_engine(url)
+        enable_sqlite_transactions(engine)
+        init_db(engine)
+        seed(engine, size)
+        suite = BenchmarkSuite(
+            engine, size, repeat=args.repeat, warmup=args.warmup
+        )
+        for result in suite.run(args.scenarios):
+            print(
+                f'{result["name"]:<22} {size:>7} linhas  '
+                f'mediana {result["median_ms"]:>9.3f} ms  '
+                f'p95 {result["p95_ms"]:>9.3f} ms'
+            )
+            results.append(result)
+        suite.close()
+        engine.dispose()
+report['results'] = results
+
+if args.output:
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f'Resultados gravados em {args.output}')
+
+if args.compare:
+    with open(args.compare, encoding='utf-8') as file:
+        baseline = json.load(file)
+    comparison = compare_results(baseline, report, args.threshold)
+    for item in comparison:
+        flag = '  REGRESSÃO' if item['regression'] else ''
+        print(
+            f'{item["name"]:<22} {item["size"]:>7} linhas  '
+            f'{item["baseline_ms"]:>9.3f} -> {item["current_ms"]:>9.3f} ms  '
+            f'x{item["ratio"]:.2f}{flag}'
+        )
+    # Código de saída diferente de zero para uso em CI
+    sys.exit(1 if any(item['regression'] for item in comparison) else 0)
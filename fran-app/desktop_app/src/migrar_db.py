@@ -0,0 +1,13 @@
+# Atualiza o banco local para a versão mais recente do esquema
+import migrations
+from database import get_engine
+
+# get_engine já aplica as migrações pendentes ao abrir o banco
+engine = get_engine()
+
+with engine.connect() as connection:
+    version = migrations.current_version(connection)
+print(
+    f'Banco em {engine.url} na versão {version} '
+    f'de {migrations.HEAD_VERSION}'
+)
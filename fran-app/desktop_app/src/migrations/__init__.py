@@ -0,0 +1,65 @@
+# Executor das migrações do esquema do banco local.
+# A versão aplicada fica gravada no próprio arquivo SQLite (PRAGMA
+# user_version); cada migração roda em sua própria transação.
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from migrations import (
+    v0001_stock_level_and_category,
+    v0002_product_search_index,
+    v0003_secondary_indexes,
+    v0004_integer_money_and_epoch,
+    v0005_item_sale_unit_price,
+    v0006_daily_product_sales,
+    v0007_stock_reservation,
+    v0008_sale_payment_status,
+    v0009_catalog_version,
+    v0010_storage_sale_movements,
+    v0011_item_sale_unit_cost,
+)
+
+# Migrações em ordem de aplicação; a versão de cada uma é sua posição (1..n)
+MIGRATIONS = [
+    v0001_stock_level_and_category,
+    v0002_product_search_index,
+    v0003_secondary_indexes,
+    v0004_integer_money_and_epoch,
+    v0005_item_sale_unit_price,
+    v0006_daily_product_sales,
+    v0007_stock_reservation,
+    v0008_sale_payment_status,
+    v0009_catalog_version,
+    v0010_storage_sale_movements,
+    v0011_item_sale_unit_cost,
+]
+
+HEAD_VERSION = len(MIGRATIONS)
+
+
+def current_version(connection: Connection) -> int:
+    """
+    Retorna a versão do esquema gravada no banco.
+    :param connection: Conexão do SQLAlchemy.
+    :return: Versão atual (0 para bancos nunca migrados).
+    """
+    return connection.execute(text('PRAGMA user_version')).scalar()
+
+
+def upgrade(engine: Engine) -> int:
+    """
+    Aplica, em ordem, as migrações ainda não aplicadas ao banco.
+    :param engine: Engine do SQLAlchemy.
+    :return: Versão do esquema após a atualização.
+    """
+    with engine.connect() as connection:
+        version = current_version(connection)
+
+    for number, migration in enumerate(MIGRATIONS, start=1):
+        if number <= version:
+            continue
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            connection.execute(text(f'PRAGMA user_version = {number}'))
+        version = number
+
+    return version
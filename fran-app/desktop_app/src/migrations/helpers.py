@@ -0,0 +1,47 @@
+# Operações idempotentes usadas pelas migrações. Cada migração descreve o
+# esquema da sua versão em SQL próprio, sem depender dos modelos atuais.
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+
+def column_names(connection: Connection, table_name: str) -> set[str]:
+    """
+    Retorna os nomes das colunas de uma tabela do banco.
+    :param connection: Conexão do SQLAlchemy.
+    :param table_name: Nome da tabela.
+    :return: Conjunto com os nomes das colunas (vazio se a tabela não existir).
+    """
+    rows = connection.execute(text(f'PRAGMA table_info("{table_name}")'))
+    return {row.name for row in rows}
+
+
+def add_column_if_missing(
+    connection: Connection, table_name: str, column_name: str, definition: str
+) -> bool:
+    """
+    Acrescenta uma coluna a uma tabela existente, se ainda não existir.
+    :param connection: Conexão do SQLAlchemy.
+    :param table_name: Nome da tabela.
+    :param column_name: Nome da coluna.
+    :param definition: Tipo e restrições da coluna (ex.: 'INTEGER').
+    :return: True se a coluna foi criada.
+    """
+    if column_name in column_names(connection, table_name):
+        return False
+
+    connection.execute(
+        text(
+            f'ALTER TABLE {table_name} ADD COLUMN "{column_name}" {definition}'
+        )
+    )
+    return True
+
+
+def execute_all(connection: Connection, statements: list[str]) -> None:
+    """
+    Executa, em ordem, uma lista de instruções SQL.
+    :param connection: Conexão do SQLAlchemy.
+    :param statements: Instruções SQL.
+    """
+    for statement in statements:
+        connection.execute(text(statement))
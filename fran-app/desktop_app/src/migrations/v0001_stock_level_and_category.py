@@ -0,0 +1,34 @@
+# Categoria dos produtos e saldo de estoque separado do livro de entradas
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from migrations.helpers import add_column_if_missing, execute_all
+
+STOCK_LEVEL_DDL = [
+    'CREATE INDEX IF NOT EXISTS ix_product_category_price '
+    'ON product (category, price)',
+    """
+    CREATE TABLE IF NOT EXISTS stock_level (
+        product_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL,
+        PRIMARY KEY (product_id),
+        FOREIGN KEY(product_id) REFERENCES product (product_id)
+    )
+    """,
+]
+
+
+def upgrade(connection: Connection) -> None:
+    add_column_if_missing(connection, 'product', 'category', 'VARCHAR')
+    execute_all(connection, STOCK_LEVEL_DDL)
+    # Bancos antigos guardavam o saldo direto em storage.quantity
+    if not connection.execute(
+        text('SELECT 1 FROM stock_level LIMIT 1')
+    ).first():
+        connection.execute(
+            text(
+                'INSERT INTO stock_level (product_id, quantity) '
+                'SELECT product_id, SUM(quantity) FROM storage '
+                'GROUP BY product_id'
+            )
+        )
@@ -0,0 +1,54 @@
+# Índice de busca textual (FTS5) sobre nome e descrição dos produtos,
+# mantido pelos triggers a cada escrita na tabela product
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+PRODUCT_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+        name, description,
+        content='product', content_rowid='product_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product
+    BEGIN
+        INSERT INTO product_fts(rowid, name, description)
+        VALUES (new.product_id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product
+    BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description)
+        VALUES ('delete', old.product_id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS product_fts_au AFTER UPDATE ON product
+    BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description)
+        VALUES ('delete', old.product_id, old.name, old.description);
+        INSERT INTO product_fts(rowid, name, description)
+        VALUES (new.product_id, new.name, new.description);
+    END
+    """,
+]
+
+
+def fts5_available(connection: Connection) -> bool:
+    options = connection.execute(text('PRAGMA compile_options')).scalars()
+    return 'ENABLE_FTS5' in set(options)
+
+
+def upgrade(connection: Connection) -> None:
+    # SQLite compilado sem FTS5: a busca usa LIKE como alternativa
+    if not fts5_available(connection):
+        return
+
+    for statement in PRODUCT_SEARCH_DDL:
+        connection.execute(text(statement))
+    connection.execute(
+        text("INSERT INTO product_fts(product_fts) VALUES ('rebuild')")
+    )
@@ -0,0 +1,19 @@
+# Índices das chaves estrangeiras e das colunas de data, que o SQLite não
+# cria sozinho: itemsale.sale_id, itemsale.product_id, storage.product_id,
+# sale.datetime e storage.datetime
+from sqlalchemy.engine import Connection
+
+from migrations.helpers import execute_all
+
+SECONDARY_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_itemsale_sale_id ON itemsale (sale_id)',
+    'CREATE INDEX IF NOT EXISTS ix_itemsale_product_id '
+    'ON itemsale (product_id)',
+    'CREATE INDEX IF NOT EXISTS ix_sale_datetime ON sale (datetime)',
+    'CREATE INDEX IF NOT EXISTS ix_storage_product_id ON storage (product_id)',
+    'CREATE INDEX IF NOT EXISTS ix_storage_datetime ON storage (datetime)',
+]
+
+
+def upgrade(connection: Connection) -> None:
+    execute_all(connection, SECONDARY_INDEXES)
@@ -0,0 +1,168 @@
+# Dinheiro em centavos (INTEGER) e datas em segundos desde a época
+# (INTEGER) no lugar de FLOAT e texto 'AAAA-MM-DD HH:MM:SS'.
+# O SQLite não altera o tipo de uma coluna, então cada tabela afetada é
+# recriada com o esquema desta versão e os dados são convertidos na cópia.
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from migrations.helpers import execute_all
+from migrations.v0002_product_search_index import PRODUCT_SEARCH_DDL
+
+MONEY = 'CAST(ROUND({column} * 100) AS INTEGER)'
+# As datas antigas estão no horário local; 'utc' converte para UTC
+EPOCH = "CAST(strftime('%s', {column}, 'utc') AS INTEGER)"
+
+# Esquema de cada tabela recriada, como era nesta versão
+TABLES = {
+    'product': {
+        'columns': {
+            'product_id': 'INTEGER NOT NULL',
+            'name': 'VARCHAR NOT NULL',
+            'description': 'VARCHAR NOT NULL',
+            'price': 'INTEGER NOT NULL',
+            'category': 'VARCHAR',
+        },
+        'constraints': ['PRIMARY KEY (product_id)'],
+        'conversions': {'price': MONEY},
+        'indexes': [
+            'CREATE INDEX IF NOT EXISTS ix_product_category_price '
+            'ON product (category, price)',
+        ],
+    },
+    'storage': {
+        'columns': {
+            'entry_id': 'INTEGER NOT NULL',
+            'product_id': 'INTEGER NOT NULL',
+            'quantity': 'INTEGER NOT NULL',
+            'datetime': 'INTEGER NOT NULL',
+            'cost': 'INTEGER NOT NULL',
+        },
+        'constraints': [
+            'PRIMARY KEY (entry_id)',
+            'FOREIGN KEY(product_id) REFERENCES product (product_id)',
+        ],
+        'conversions': {'datetime': EPOCH, 'cost': MONEY},
+        'indexes': [
+            'CREATE INDEX IF NOT EXISTS ix_storage_product_id '
+            'ON storage (product_id)',
+            'CREATE INDEX IF NOT EXISTS ix_storage_datetime '
+            'ON storage (datetime)',
+        ],
+    },
+    'sale': {
+        'columns': {
+            'sale_id': 'INTEGER NOT NULL',
+            'datetime': 'INTEGER NOT NULL',
+            'total_sale': 'INTEGER NOT NULL',
+        },
+        'constraints': ['PRIMARY KEY (sale_id)'],
+        'conversions': {'datetime': EPOCH, 'total_sale': MONEY},
+        'indexes': [
+            'CREATE INDEX IF NOT EXISTS ix_sale_datetime ON sale (datetime)',
+        ],
+    },
+    'outbox': {
+        'columns': {
+            'outbox_id': 'INTEGER NOT NULL',
+            'event_type': 'VARCHAR NOT NULL',
+            'payload': 'VARCHAR NOT NULL',
+            'idempotency_key': 'VARCHAR NOT NULL',
+            'created_at': 'INTEGER NOT NULL',
+            'attempts': 'INTEGER NOT NULL',
+            'next_attempt_at': 'DOUBLE NOT NULL',
+        },
+        'constraints': ['PRIMARY KEY (outbox_id)', 'UNIQUE (idempotency_key)'],
+        'conversions': {'created_at': EPOCH},
+        'indexes': [],
+    },
+    'sync_cursor': {
+        'columns': {
+            'table_name': 'VARCHAR NOT NULL',
+            'last_value': 'INTEGER',
+            'last_pk': 'INTEGER NOT NULL',
+        },
+        'constraints': ['PRIMARY KEY (table_name)'],
+        'conversions': {'last_value': EPOCH},
+        'indexes': [],
+    },
+}
+
+
+def rebuild_table(connection: Connection, table_name: str) -> bool:
+    """
+    Recria a tabela com o esquema desta versão, convertendo as colunas de
+    dinheiro e data que ainda usam os tipos antigos.
+    :param connection: Conexão do SQLAlchemy.
+    :param table_name: Nome da tabela.
+    :return: True se a tabela foi recriada.
+    """
+    schema = TABLES[table_name]
+    declared = {
+        row.name: row.type.upper()
+        for row in connection.execute(
+            text(f'PRAGMA table_info("{table_name}")')
+        )
+    }
+    pending = {
+        column
+        for column in schema['conversions']
+        if column in declared and declared[column] != 'INTEGER'
+    }
+    if not pending:
+        return False
+
+    copied = [column for column in schema['columns'] if column in declared]
+    selects = [
+        schema['conversions'][column].format(column=f'"{column}"')
+        if column in pending
+        else f'"{column}"'
+        for column in copied
+    ]
+    columns = ', '.join(f'"{column}"' for column in copied)
+    definitions = [
+        f'"{column}" {definition}'
+        for column, definition in schema['columns'].items()
+    ] + schema['constraints']
+    connection.execute(
+        text(f'CREATE TABLE {table_name}_new ({", ".join(definitions)})')
+    )
+    connection.execute(
+        text(
+            f'INSERT INTO {table_name}_new '
+            f'({columns}) '
+            f'SELECT {", ".join(selects)} FROM {table_name}'
+        )
+    )
+    connection.execute(text(f'DROP TABLE {table_name}'))
+    connection.execute(
+        text(f'ALTER TABLE {table_name}_new RENAME TO {table_name}')
+    )
+    execute_all(connection, schema['indexes'])
+    return True
+
+
+def upgrade(connection: Connection) -> None:
+    for table_name in TABLES:
+        rebuilt = rebuild_table(connection, table_name)
+        # Os triggers da busca textual somem junto com a tabela antiga
+        if (
+            rebuilt
+            and table_name == 'product'
+            and has_search_index(connection)
+        ):
+            execute_all(connection, PRODUCT_SEARCH_DDL[1:])
+            connection.execute(
+                text("INSERT INTO product_fts(product_fts) VALUES ('rebuild')")
+            )
+
+
+def has_search_index(connection: Connection) -> bool:
+    return (
+        connection.execute(
+            text(
+                'SELECT 1 FROM sqlite_master '
+                "WHERE type = 'table' AND name = 'product_fts'"
+            )
+        ).first()
+        is not None
+    )
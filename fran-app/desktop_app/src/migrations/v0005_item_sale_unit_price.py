@@ -0,0 +1,17 @@
+# Preço unitário gravado em cada item vendido, usado nos relatórios de
+# faturamento e margem. Itens antigos recebem o preço atual do produto.
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from migrations.helpers import add_column_if_missing
+
+
+def upgrade(connection: Connection) -> None:
+    if add_column_if_missing(connection, 'itemsale', 'unit_price', 'INTEGER'):
+        connection.execute(
+            text(
+                'UPDATE itemsale SET unit_price = ('
+                'SELECT price FROM product '
+                'WHERE product.product_id = itemsale.product_id)'
+            )
+        )
@@ -0,0 +1,51 @@
+# Consolidado diário de vendas por produto, preenchido com o histórico.
+# O custo usa a média ponderada das entradas de estoque do produto.
+from sqlalchemy.engine import Connection
+
+from migrations.helpers import execute_all
+
+DAILY_PRODUCT_SALES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS daily_product_sales (
+        day DATE NOT NULL,
+        product_id INTEGER NOT NULL,
+        units INTEGER NOT NULL,
+        revenue INTEGER NOT NULL,
+        cost INTEGER NOT NULL,
+        PRIMARY KEY (day, product_id),
+        FOREIGN KEY(product_id) REFERENCES product (product_id)
+    )
+    """,
+    'DELETE FROM daily_product_sales',
+    """
+    INSERT INTO daily_product_sales (day, product_id, units, revenue, cost)
+    SELECT
+        date(sale.datetime, 'unixepoch', 'localtime') AS day,
+        itemsale.product_id,
+        SUM(itemsale."quantityItem"),
+        SUM(
+            itemsale."quantityItem"
+            * COALESCE(itemsale.unit_price, product.price)
+        ),
+        ROUND(
+            COALESCE(MAX(average_cost.unit_cost), 0)
+            * SUM(itemsale."quantityItem")
+        )
+    FROM itemsale
+    JOIN sale ON sale.sale_id = itemsale.sale_id
+    JOIN product ON product.product_id = itemsale.product_id
+    LEFT OUTER JOIN (
+        SELECT
+            product_id,
+            SUM(cost * quantity) * 1.0 / SUM(quantity) AS unit_cost
+        FROM storage
+        WHERE quantity > 0
+        GROUP BY product_id
+    ) AS average_cost ON average_cost.product_id = itemsale.product_id
+    GROUP BY day, itemsale.product_id
+    """,
+]
+
+
+def upgrade(connection: Connection) -> None:
+    execute_all(connection, DAILY_PRODUCT_SALES_DDL)
@@ -0,0 +1,25 @@
+# Reservas de estoque dos carrinhos em aberto (com prazo de validade)
+from sqlalchemy.engine import Connection
+
+from migrations.helpers import execute_all
+
+STOCK_RESERVATION_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS stock_reservation (
+        reservation_id INTEGER NOT NULL,
+        cart_id VARCHAR NOT NULL,
+        product_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL,
+        expires_at INTEGER NOT NULL,
+        PRIMARY KEY (reservation_id),
+        UNIQUE (cart_id, product_id),
+        FOREIGN KEY(product_id) REFERENCES product (product_id)
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS ix_stock_reservation_product_expires '
+    'ON stock_reservation (product_id, expires_at)',
+]
+
+
+def upgrade(connection: Connection) -> None:
+    execute_all(connection, STOCK_RESERVATION_DDL)
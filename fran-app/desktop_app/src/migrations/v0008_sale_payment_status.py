@@ -0,0 +1,32 @@
+# Situação do pagamento gravada com a venda (pagamentos assíncronos pelo
+# PSP). Vendas antigas foram pagas no caixa e ficam como aprovadas.
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from migrations.helpers import add_column_if_missing, execute_all
+
+PAYMENT_COLUMNS = {
+    'payment_status': "VARCHAR DEFAULT 'approved' NOT NULL",
+    'payment_method': 'VARCHAR',
+    'payment_key': 'VARCHAR',
+    'payment_message': 'VARCHAR',
+}
+
+PAYMENT_INDEXES = [
+    'CREATE UNIQUE INDEX IF NOT EXISTS ix_sale_payment_key '
+    'ON sale (payment_key)',
+    'CREATE INDEX IF NOT EXISTS ix_sale_payment_status '
+    'ON sale (payment_status)',
+]
+
+
+def upgrade(connection: Connection) -> None:
+    for column_name, definition in PAYMENT_COLUMNS.items():
+        add_column_if_missing(connection, 'sale', column_name, definition)
+    connection.execute(
+        text(
+            "UPDATE sale SET payment_status = 'approved' "
+            'WHERE payment_status IS NULL'
+        )
+    )
+    execute_all(connection, PAYMENT_INDEXES)
@@ -0,0 +1,39 @@
+# Versão do catálogo gravada no próprio banco e incrementada por triggers a
+# cada escrita na tabela product, venha ela deste processo, de outro
+# terminal ou de um script. O cache do catálogo compara essa versão com a
+# da lista carregada.
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+CATALOG_VERSION_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS catalog_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    'INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0)',
+    """
+    CREATE TRIGGER IF NOT EXISTS catalog_version_ai AFTER INSERT ON product
+    BEGIN
+        UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS catalog_version_au AFTER UPDATE ON product
+    BEGIN
+        UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS catalog_version_ad AFTER DELETE ON product
+    BEGIN
+        UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+    END
+    """,
+]
+
+
+def upgrade(connection: Connection) -> None:
+    for statement in CATALOG_VERSION_DDL:
+        connection.execute(text(statement))
@@ -0,0 +1,21 @@
+# Baixas por venda e estornos passam a ser gravados no livro de estoque,
+# ligados à venda de origem
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from migrations.helpers import add_column_if_missing
+
+
+def upgrade(connection: Connection) -> None:
+    add_column_if_missing(
+        connection,
+        'storage',
+        'sale_id',
+        'INTEGER REFERENCES sale (sale_id)',
+    )
+    connection.execute(
+        text(
+            'CREATE INDEX IF NOT EXISTS ix_storage_sale_id '
+            'ON storage (sale_id)'
+        )
+    )
@@ -0,0 +1,20 @@
+# Custo unitário gravado em cada item vendido, para que estornos e
+# exclusões desfaçam exatamente o custo lançado no consolidado. Itens
+# antigos recebem o custo médio atual das entradas do produto.
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from migrations.helpers import add_column_if_missing
+
+
+def upgrade(connection: Connection) -> None:
+    if add_column_if_missing(connection, 'itemsale', 'unit_cost', 'INTEGER'):
+        connection.execute(
+            text(
+                'UPDATE itemsale SET unit_cost = ('
+                'SELECT ROUND(SUM(cost * quantity) * 1.0 / SUM(quantity)) '
+                'FROM storage '
+                'WHERE storage.product_id = itemsale.product_id '
+                'AND quantity > 0 AND sale_id IS NULL)'
+            )
+        )
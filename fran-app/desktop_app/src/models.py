@@ -1,48 +1,228 @@
 # Este arquivo contém as classes que modelam as regras de negócios
-from datetime import datetime
+import datetime as dt
+from decimal import ROUND_HALF_UP, Decimal
 
-from sqlalchemy import ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column, registry
+from sqlalchemy import Date, ForeignKey, Index, Integer, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
+from sqlalchemy.types import TypeDecorator
 
 # Registro para mapear as tabelas
 table_registry = registry()
 
+CENT = Decimal('0.01')
+
+# Situação do pagamento de uma venda. Vendas pendentes aguardam a resposta
+# do PSP; recusadas e canceladas são estornadas (estoque e consolidado)
+PAYMENT_PENDING = 'pending'
+PAYMENT_APPROVED = 'approved'
+PAYMENT_DECLINED = 'declined'
+PAYMENT_CANCELLED = 'cancelled'
+VOIDED_PAYMENT_STATUSES = (PAYMENT_DECLINED, PAYMENT_CANCELLED)
+PAYMENT_STATUSES = (
+    PAYMENT_PENDING,
+    PAYMENT_APPROVED,
+    PAYMENT_DECLINED,
+    PAYMENT_CANCELLED,
+)
+
 
 def current_time():
-    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return dt.datetime.now().replace(microsecond=0)
+
+
+def to_money(value) -> Decimal:
+    """
+    Converte um valor (Decimal, int, float ou texto) para reais com duas casas.
+    :param value: Valor a converter.
+    :return: Decimal arredondado ao centavo.
+    """
+    if isinstance(value, float):
+        # str evita carregar o erro binário do float (ex.: 12.9 -> 12.90)
+        value = str(value)
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class Money(TypeDecorator):
+    # Valores em reais gravados como inteiro de centavos
+    impl = Integer
+    cache_ok = True
+
+    @property
+    def python_type(self):
+        return Decimal
+
+    def process_bind_param(self, value, dialect):  # noqa: PLR6301
+        if value is None:
+            return None
+        return int(to_money(value) * 100)
+
+    def process_result_value(self, value, dialect):  # noqa: PLR6301
+        if value is None:
+            return None
+        return Decimal(int(value)).scaleb(-2)
+
+
+class EpochDateTime(TypeDecorator):
+    # Data e hora locais gravadas como segundos desde a época (Unix)
+    impl = Integer
+    cache_ok = True
+
+    @property
+    def python_type(self):
+        return dt.datetime
+
+    def process_bind_param(self, value, dialect):  # noqa: PLR6301
+        if value is None:
+            return None
+        return int(value.timestamp())
+
+    def process_result_value(self, value, dialect):  # noqa: PLR6301
+        if value is None:
+            return None
+        return dt.datetime.fromtimestamp(value)
 
 
 @table_registry.mapped_as_dataclass
 class Product:
     __tablename__ = 'product'
+    __table_args__ = (Index('ix_product_category_price', 'category', 'price'),)
     product_id: Mapped[int] = mapped_column(init=False, primary_key=True)
     name: Mapped[str]
     description: Mapped[str]
-    price: Mapped[float]
+    price: Mapped[Decimal] = mapped_column(Money)
+    category: Mapped[str | None] = mapped_column(default=None)
+    # Somente leitura: os itens são gravados pelo checkout
+    item_sales: Mapped[list['ItemSale']] = relationship(
+        viewonly=True, init=False, repr=False
+    )
 
 
 @table_registry.mapped_as_dataclass
 class Storage:
     __tablename__ = 'storage'
     entry_id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey('product.product_id'), index=True
+    )
+    quantity: Mapped[int]
+    datetime: Mapped[dt.datetime] = mapped_column(
+        EpochDateTime, init=False, insert_default=current_time, index=True
+    )
+    cost: Mapped[Decimal] = mapped_column(Money)
+    # Venda que originou a baixa (ou o estorno); entradas e ajustes não têm
+    sale_id: Mapped[int | None] = mapped_column(
+        ForeignKey('sale.sale_id'), default=None, index=True
+    )
+
+
+@table_registry.mapped_as_dataclass
+class StockLevel:
+    # Saldo atual por produto, mantido a cada entrada no estoque e venda
+    __tablename__ = 'stock_level'
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey('product.product_id'), primary_key=True
+    )
+    quantity: Mapped[int] = mapped_column(default=0)
+
+
+@table_registry.mapped_as_dataclass
+class StockReservation:
+    # Quantidade separada por um carrinho em aberto até expires_at; conta
+    # como indisponível para os outros terminais enquanto não expira
+    __tablename__ = 'stock_reservation'
+    __table_args__ = (
+        UniqueConstraint('cart_id', 'product_id'),
+        Index(
+            'ix_stock_reservation_product_expires', 'product_id', 'expires_at'
+        ),
+    )
+    reservation_id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    cart_id: Mapped[str]
     product_id: Mapped[int] = mapped_column(ForeignKey('product.product_id'))
     quantity: Mapped[int]
-    datetime: Mapped[str] = mapped_column(init=False, default=current_time)
-    cost: Mapped[float]
+    expires_at: Mapped[dt.datetime] = mapped_column(EpochDateTime)
 
 
 @table_registry.mapped_as_dataclass
 class Sale:
     __tablename__ = 'sale'
     sale_id: Mapped[int] = mapped_column(init=False, primary_key=True)
-    datetime: Mapped[str] = mapped_column(init=False, default=current_time)
-    total_sale: Mapped[float]
+    datetime: Mapped[dt.datetime] = mapped_column(
+        EpochDateTime, init=False, insert_default=current_time, index=True
+    )
+    total_sale: Mapped[Decimal] = mapped_column(Money)
+    payment_status: Mapped[str] = mapped_column(
+        default=PAYMENT_APPROVED,
+        server_default=PAYMENT_APPROVED,
+        index=True,
+    )
+    payment_method: Mapped[str | None] = mapped_column(default=None)
+    # Chave de idempotência enviada ao PSP (uma por tentativa de cobrança)
+    payment_key: Mapped[str | None] = mapped_column(
+        default=None, unique=True, index=True
+    )
+    payment_message: Mapped[str | None] = mapped_column(default=None)
+    items: Mapped[list['ItemSale']] = relationship(
+        back_populates='sale',
+        cascade='all, delete-orphan',
+        default_factory=list,
+        repr=False,
+    )
 
 
 @table_registry.mapped_as_dataclass
 class ItemSale:
     __tablename__ = 'itemsale'
     itemsale_id: Mapped[int] = mapped_column(init=False, primary_key=True)
-    sale_id: Mapped[int] = mapped_column(ForeignKey('sale.sale_id'))
-    product_id: Mapped[int] = mapped_column(ForeignKey('product.product_id'))
+    sale_id: Mapped[int] = mapped_column(
+        ForeignKey('sale.sale_id'), index=True
+    )
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey('product.product_id'), index=True
+    )
     quantityItem: Mapped[int]
+    # Preço do produto no momento da venda
+    unit_price: Mapped[Decimal | None] = mapped_column(Money, default=None)
+    # Custo médio do produto no momento da venda (baixa no livro de estoque)
+    unit_cost: Mapped[Decimal | None] = mapped_column(Money, default=None)
+    sale: Mapped[Sale] = relationship(
+        back_populates='items', init=False, repr=False
+    )
+    product: Mapped[Product] = relationship(init=False, repr=False)
+
+
+@table_registry.mapped_as_dataclass
+class DailyProductSales:
+    # Vendas consolidadas por dia e produto, atualizadas a cada checkout
+    __tablename__ = 'daily_product_sales'
+    day: Mapped[dt.date] = mapped_column(Date, primary_key=True)
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey('product.product_id'), primary_key=True
+    )
+    units: Mapped[int] = mapped_column(default=0)
+    revenue: Mapped[Decimal] = mapped_column(Money, default=Decimal(0))
+    cost: Mapped[Decimal] = mapped_column(Money, default=Decimal(0))
+
+
+@table_registry.mapped_as_dataclass
+class SyncCursor:
+    __tablename__ = 'sync_cursor'
+    table_name: Mapped[str] = mapped_column(primary_key=True)
+    last_value: Mapped[dt.datetime | None] = mapped_column(
+        EpochDateTime, default=None
+    )
+    last_pk: Mapped[int] = mapped_column(default=0)
+
+
+@table_registry.mapped_as_dataclass
+class Outbox:
+    __tablename__ = 'outbox'
+    outbox_id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    event_type: Mapped[str]
+    payload: Mapped[str]
+    idempotency_key: Mapped[str] = mapped_column(unique=True)
+    created_at: Mapped[dt.datetime] = mapped_column(
+        EpochDateTime, init=False, insert_default=current_time
+    )
+    attempts: Mapped[int] = mapped_column(default=0)
+    next_attempt_at: Mapped[float] = mapped_column(default=0.0)
@@ -1,39 +1,71 @@
-import os
+import time
+import uuid
 
-import pandas as pd
 import streamlit as st
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
 from Controllers.ItemSaleController import ItemSaleController
+from Controllers.PaymentController import PaymentController
 from Controllers.ProductController import ProductController
+from Controllers.ReservationController import ReservationController
 from Controllers.SaleController import SaleController
 from Controllers.StorageController import StorageController
-from models import table_registry
+from database import (
+    get_session,
+    get_session_factory,
+    release_session,
+)
+from instrumentation import instrumentation
+from models import (
+    PAYMENT_APPROVED,
+    PAYMENT_PENDING,
+)
+from pagination import current_page, page_controls
+from Services.Payment.AsyncPaymentProcessor import AsyncPaymentProcessor
 from Services.Payment.CashPaymentStrategy import CashPaymentStrategy
-from Services.Payment.CreditCardPaymentStrategy import CreditCardPaymentStrategy
-from Services.Payment.PixPaymentStrategy import PixPaymentStrategy
+from Services.Payment.CreditCardPaymentStrategy import (
+    CreditCardPaymentStrategy,
+)
 from Services.Payment.PaymentProcessor import PaymentProcessor
-# Configurações do banco de dados
-
-# Obtém o diretório onde o arquivo Python está localizado (no caso, dentro de 'src')
-base_dir = os.path.dirname(os.path.abspath(__file__))
-
-# Subir um nível de diretório para alcançar 'src' e criar o banco de dados lá
-db_path = os.path.join(base_dir, '..', 'test.db')
-
-# Crie a conexão com o banco de dados SQLite
-engine = create_engine(f'sqlite:///{db_path}')
-
-table_registry.metadata.create_all(engine)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-db = SessionLocal()
+from Services.Payment.PixPaymentStrategy import PixPaymentStrategy
+from Services.Payment.PspPaymentStrategy import PSP_URL, PspPaymentStrategy
+
+# Forma de pagamento exibida -> forma gravada na venda e enviada ao PSP
+FORMAS_PAGAMENTO = {
+    'Dinheiro': 'cash',
+    'Cartão de Crédito': 'credit_card',
+    'Pix': 'pix',
+}
+# Estratégias síncronas, usadas no caixa (e para cartão e Pix sem PSP)
+ESTRATEGIAS_PAGAMENTO = {
+    'Dinheiro': CashPaymentStrategy,
+    'Cartão de Crédito': CreditCardPaymentStrategy,
+    'Pix': PixPaymentStrategy,
+}
+# Segundos entre remoções das reservas vencidas
+INTERVALO_LIMPEZA_RESERVAS = 60
+
+# Sessão da thread atual, sobre a engine compartilhada, descartada ao fim
+# da execução (e no início, se a anterior foi interrompida por st.rerun)
+release_session()
+db = get_session()
 productController = ProductController(session=db)
 storageController = StorageController(session=db)
 saleController = SaleController(
     session=db, storage_controller=storageController
 )  # Adiciona o storageController aqui
 itemSaleController = ItemSaleController(session=db)
+reservationController = ReservationController(session=db)
+paymentController = PaymentController(session=db)
+# Instrumentação opcional (FRAN_INSTRUMENTATION=1): consultas por método
+page_stats = instrumentation.begin_page(
+    'Pedidos',
+    db.get_bind(),
+    productController,
+    saleController,
+    itemSaleController,
+    reservationController,
+    paymentController,
+)
 
 
 # TODO: Reaproveitamento de funções semelhantes.
@@ -55,14 +87,140 @@ st.markdown("""
 if 'carrinho' not in st.session_state:
     st.session_state.carrinho = []
 
-# Inicializar st.session_state.df com dados do banco de dados, se não estiver inicializado
-if 'df' not in st.session_state or st.session_state.df.empty:
-    products = (
-        productController.list_products()
-    )  # Método para buscar produtos do banco de dados
-    st.session_state.df = pd.DataFrame(
-        products, columns=['id', 'name', 'price', 'description']
+# Identificador do carrinho desta sessão: os itens adicionados ficam
+# reservados para ele por alguns minutos, sem serem vendidos por outro caixa
+if 'cart_id' not in st.session_state:
+    st.session_state.cart_id = uuid.uuid4().hex
+
+# Reservas vencidas de carrinhos abandonados são removidas periodicamente
+ultima_limpeza = st.session_state.get('limpeza_reservas', 0.0)
+if time.monotonic() - ultima_limpeza > INTERVALO_LIMPEZA_RESERVAS:
+    reservationController.purge_expired()
+    st.session_state.limpeza_reservas = time.monotonic()
+
+# Enquanto o carrinho estiver aberto, suas reservas não vencem; as que já
+# venceram são refeitas, e os itens sem saldo são avisados ao operador
+if st.session_state.carrinho:
+    sem_reserva = reservationController.renew_cart(
+        st.session_state.cart_id,
+        {
+            product['id']: product['quantity']
+            for product in st.session_state.carrinho
+        },
+    )
+    for product in st.session_state.carrinho:
+        if product['id'] in sem_reserva:
+            st.warning(
+                f'A reserva de "{product["name"]}" venceu e o estoque não é '
+                'mais suficiente; revise o carrinho.'
+            )
+
+
+def estrategia_psp(method):
+    return PspPaymentStrategy(PSP_URL, method)
+
+
+@st.cache_resource
+def processador_pagamentos():
+    # Um processador por processo do Streamlit, compartilhado pelas sessões;
+    # ao subir, retoma as cobranças que ficaram pendentes
+    processor = AsyncPaymentProcessor(get_session_factory())
+    processor.resume_pending(estrategia_psp)
+    return processor
+
+
+if PSP_URL:
+    processador_pagamentos()
+
+
+def limpar_carrinho():
+    reservationController.release(st.session_state.cart_id)
+    st.session_state.carrinho.clear()
+
+
+def validar_estoque():
+    # Validação do estoque de todo o carrinho em uma única consulta
+    disponibilidade = storageController.check_stock_many(
+        [
+            (product['id'], product['quantity'])
+            for product in st.session_state.carrinho
+        ],
+        st.session_state.cart_id,
     )
+    for product in st.session_state.carrinho:
+        if not disponibilidade[product['id']]['sufficient']:
+            raise ValueError(
+                f'Estoque insuficiente para o produto: {product["name"]}'
+            )
+
+
+def itens_do_carrinho():
+    return [
+        {
+            'product_id': product['id'],
+            'quantityItem': product['quantity'],
+        }
+        for product in st.session_state.carrinho
+    ]
+
+
+def cobrar_no_psp(total, method):
+    # Cartão e Pix pelo PSP: a venda é gravada como pendente e a
+    # cobrança segue em segundo plano, sem travar o caixa
+    payment_key = uuid.uuid4().hex
+    sale = saleController.checkout(
+        total_sale=total,
+        item_sales=itens_do_carrinho(),
+        cart_id=st.session_state.cart_id,
+        payment_method=method,
+        payment_status=PAYMENT_PENDING,
+        payment_key=payment_key,
+    )
+    processador_pagamentos().submit(
+        sale.sale_id,
+        estrategia_psp(method),
+        sale.total_sale,
+        payment_key,
+    )
+    st.session_state.pagamento_pendente = sale.sale_id
+    st.session_state.carrinho.clear()
+    st.rerun()
+
+
+def cobrar_no_caixa(total, forma_pagamento, valor_pago):
+    # Escolher a estratégia de pagamento com base na forma de pagamento
+    strategy = ESTRATEGIAS_PAGAMENTO.get(forma_pagamento)
+    if strategy is None:
+        raise ValueError('Forma de pagamento inválida.')
+
+    # Processar o pagamento usando a estratégia escolhida
+    processor = PaymentProcessor(strategy())
+    message = processor.process(total, valor_pago=valor_pago)
+    st.success(message)
+
+    # Grava a venda, os itens e a baixa de estoque em uma única transação
+    # e consome as reservas do carrinho
+    saleController.checkout(
+        total_sale=total,
+        item_sales=itens_do_carrinho(),
+        cart_id=st.session_state.cart_id,
+        payment_method=FORMAS_PAGAMENTO[forma_pagamento],
+    )
+
+    st.success(
+        'Pedido fechado com sucesso! '
+        f'Forma de pagamento: {forma_pagamento}.'
+    )
+    st.session_state.carrinho.clear()
+    st.rerun()
+
+
+def confirmar_pedido(total, forma_pagamento, valor_pago):
+    validar_estoque()
+    if PSP_URL and forma_pagamento != 'Dinheiro':
+        cobrar_no_psp(total, FORMAS_PAGAMENTO[forma_pagamento])
+    else:
+        cobrar_no_caixa(total, forma_pagamento, valor_pago)
 
 
 @st.dialog('Fechar Pedido', width='small')
@@ -100,71 +258,75 @@ def fechar_pedido():
 
     if confirmar:
         try:
-            # Validação do estoque antes de processar o pagamento
-            for product in st.session_state.carrinho:
-                product_id = product['id']
-                quantity = product['quantity']
-                estoque_atual = storageController.get_stock(product_id)
-                if estoque_atual < quantity:
-                    raise ValueError(
-                        f'Estoque insuficiente para o produto: {product["name"]}'
-                    )
-
-            # Escolher a estratégia de pagamento com base na forma de pagamento
-            if forma_pagamento == 'Dinheiro':
-                strategy = CashPaymentStrategy()
-            elif forma_pagamento == 'Cartão de Crédito':
-                strategy = CreditCardPaymentStrategy()
-            elif forma_pagamento == 'Pix':
-                strategy = PixPaymentStrategy()
-            else:
-                raise ValueError("Forma de pagamento inválida.")
-
-            # Processar o pagamento usando a estratégia escolhida
-            processor = PaymentProcessor(strategy)
-            message = processor.process(total, valor_pago=valor_pago)
-            st.success(message)
-
-            # Criar a venda e processar os itens
-            item_sales = [
-                {
-                    'product_id': product['id'],
-                    'quantityItem': product['quantity'],
-                }
-                for product in st.session_state.carrinho
-            ]
-            saleController.create_sale(
-                total_sale=total,
-                item_sales=item_sales,
-                storage_controller=storageController,
-            )
-
-            # Atualizar o estoque (essa lógica depende de como você gerencia o estoque no DB)
-            for product in st.session_state.carrinho:
-                product_id = product['id']
-                quantity_sold = product['quantity']
-                storageController.update_stock(product_id, -quantity_sold)
-
-            st.success(f'Pedido fechado com sucesso! Forma de pagamento: {forma_pagamento}.')
-            st.session_state.carrinho.clear()
-            st.rerun()
-
+            confirmar_pedido(total, forma_pagamento, valor_pago)
         except ValueError as ve:
             st.error(str(ve))
         except Exception as e:
             st.error(f'Erro ao processar o pagamento: {str(e)}')
 
-    # Caso o carrinho esteja vazio, ou se o usuário tentar confirmar sem itens
-    elif confirmar:
-        st.error('Não há itens no carrinho para finalizar o pedido.')
-
     # Botão para cancelar o pedido
     if st.button('Cancelar'):
         st.warning('Pedido cancelado.')
-        st.session_state.carrinho.clear()  # Limpa o carrinho
+        limpar_carrinho()  # Limpa o carrinho e libera as reservas
         st.rerun()  # Atualiza a interface
 
 
+# Acompanha o pagamento enviado ao PSP, consultando a venda a cada 2 s sem
+# executar a página inteira de novo. O fragmento roda fora da execução da
+# página, então usa uma sessão própria, fechada ao final
+@st.fragment(run_every=2)
+def acompanhar_pagamento():
+    sale_id = st.session_state.get('pagamento_pendente')
+    if sale_id is None:
+        return
+
+    with get_session_factory().session_factory() as sessao:
+        mostrar_pagamento(PaymentController(session=sessao), sale_id)
+
+
+def mostrar_pagamento(payments, sale_id):
+    payment = payments.get_payment(sale_id)
+    if payment['status'] == PAYMENT_PENDING:
+        st.info(
+            f'Pagamento da venda {sale_id} em andamento. '
+            f'{payment["message"] or ""}'
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button('Reenviar cobrança', key='reenviar_pagamento'):
+                # Mesma chave: o PSP não cobra duas vezes
+                processador_pagamentos().submit(
+                    sale_id,
+                    estrategia_psp(payment['method']),
+                    payment['total_sale'],
+                    payment['key'],
+                )
+        with col2:
+            if st.button('Cancelar pagamento', key='cancelar_pagamento'):
+                # A venda só é estornada depois que o PSP confirma o
+                # cancelamento; a situação aparece na próxima consulta
+                processador_pagamentos().cancel(
+                    sale_id,
+                    estrategia_psp(payment['method']),
+                    payment['key'],
+                )
+                st.info('Cancelamento enviado ao PSP.')
+        return
+
+    # Resultado da última cobrança, exibido até o próximo pedido
+    if payment['status'] == PAYMENT_APPROVED:
+        st.success(f'Pagamento da venda {sale_id} aprovado!')
+    else:
+        st.error(
+            f'Pagamento da venda {sale_id} não concluído '
+            f'({payment["message"] or payment["status"]}). '
+            'Os itens voltaram ao estoque.'
+        )
+
+
+acompanhar_pagamento()
+
+
 # Função para mostrar os produtos no carrinho logo abaixo do título
 def mostrar_carrinho():
     if len(st.session_state.carrinho) > 0:
@@ -173,7 +335,7 @@ def mostrar_carrinho():
             st.write('### Produtos no Carrinho:')
         with col2:
             if st.button('Limpar Carrinho', key='limpar_carrinho'):
-                st.session_state.carrinho.clear()
+                limpar_carrinho()
                 st.rerun()
         with col3:
             if st.button('Fechar Pedido', key='fechar_pedido'):
@@ -186,7 +348,8 @@ def mostrar_carrinho():
         with st.container(border=True, height=150):
             for product in st.session_state.carrinho:
                 st.write(
-                    f'{product["name"]} - R$ {product["price"]:.2f} (Quantidade: {product["quantity"]})'
+                    f'{product["name"]} - R$ {product["price"]:.2f} '
+                    f'(Quantidade: {product["quantity"]})'
                 )
             st.markdown(f'### **Total: R$ {total:.2f}**')
 
@@ -198,34 +361,109 @@ def mostrar_carrinho():
 mostrar_carrinho()
 
 
+def produto_no_carrinho(product_id):
+    return next(
+        (p for p in st.session_state.carrinho if p['id'] == product_id),
+        None,
+    )
+
+
+def adicionar_ao_carrinho(product):
+    product_id = product['id']
+    # Verificar se o produto já está no carrinho
+    produto_existente = produto_no_carrinho(product_id)
+    quantidade = produto_existente['quantity'] + 1 if produto_existente else 1
+    try:
+        # Reserva a unidade antes de colocá-la no carrinho
+        reservationController.reserve(
+            st.session_state.cart_id, product_id, quantidade
+        )
+    except ValueError as ve:
+        st.error(str(ve))
+    else:
+        if produto_existente:
+            # Já está no carrinho: incrementa a quantidade
+            produto_existente['quantity'] = quantidade
+        else:
+            # Adicionar novo produto com quantidade inicial 1
+            st.session_state.carrinho.append({
+                'id': product_id,
+                'name': product['name'],
+                'price': product['price'],
+                'quantity': 1,
+            })
+        st.success(f'Produto "{product["name"]}" adicionado ao carrinho!')
+        st.rerun()
+
+
+def retirar_do_carrinho(product):
+    product_id = product['id']
+    produto_existente = produto_no_carrinho(product_id)
+    if produto_existente:
+        restante = produto_existente['quantity'] - 1
+        # Devolve a unidade aos outros caixas (0 libera tudo)
+        reservationController.reserve(
+            st.session_state.cart_id, product_id, restante
+        )
+        if restante > 0:
+            # Reduzir a quantidade
+            produto_existente['quantity'] = restante
+        else:
+            # Remover produto do carrinho se a quantidade for 1
+            st.session_state.carrinho.remove(produto_existente)
+        st.warning(f'Produto "{product["name"]}" atualizado no carrinho!')
+    else:
+        st.warning('Produto não encontrado no carrinho.')
+    st.rerun()
+
+
 def mostrar_pedido():
-    st.text_input('Pesquise o produto aqui: ')
+    busca = st.text_input('Pesquise o produto aqui: ')
+
+    # estilização do botão (injetada uma única vez por execução)
+    st.markdown(
+        """
+                    <style>
+                        .stButton>button {
+                            height: 60px;  /* Aumenta a altura do botão */
+                            font-size: 20px;  /* Ajusta o tamanho da fonte */
+                            border-radius: 12px;  /* Bordas arredondadas */
+                        }
+                        .stButton>button:hover {
+                            background-color: #white;  /* Ao passar o mouse */
+                        }
+                    </style>
+                """,
+        unsafe_allow_html=True,
+    )
+
+    # Com busca, pagina os resultados do índice por offset; sem busca,
+    # pagina o catálogo por keyset (product_id > último ID exibido)
+    if busca:
+        products, cursor, has_next = current_page(
+            'pedido',
+            lambda offset, limit: productController.search_products(
+                busca, limit, offset or 0
+            ),
+            reset_on=busca,
+        )
+        next_cursor = (cursor or 0) + len(products)
+    else:
+        products, cursor, has_next = current_page(
+            'pedido', productController.list_products
+        )
+        next_cursor = products[-1]['id'] if products else cursor
 
     with st.container(border=True, height=450):
-        for index, row in st.session_state.df.iterrows():
-            product_name = row['name']
-            product_id = row['id']
-            product_price = row['price']
+        if busca and not products:
+            st.write('Nenhum produto encontrado.')
+        for product in products:
+            product_name = product['name']
+            product_id = product['id']
+            product_price = product['price']
 
             col1, col2, col3, col4 = st.columns(4)
 
-            # estilização do botão
-            st.markdown(
-                """
-                            <style>
-                                .stButton>button {
-                                    height: 60px;  /* Aumenta a altura do botão */
-                                    font-size: 20px;  /* Ajusta o tamanho da fonte */
-                                    border-radius: 12px;  /* Bordas arredondadas */
-                                }
-                                .stButton>button:hover {
-                                    background-color: #white;  /* Cor de fundo ao passar o mouse */
-                                }
-                            </style>
-                        """,
-                unsafe_allow_html=True,
-            )
-
             # Coluna de visualização de produtos
             with col1:
                 st.write(f'{product_id} - {product_name}')
@@ -247,31 +485,7 @@ def mostrar_pedido():
                     key=f'Adicionar_{product_id}',
                     use_container_width=True,
                 ):
-                    # Verificar se o produto já está no carrinho
-                    produto_existente = next(
-                        (
-                            p
-                            for p in st.session_state.carrinho
-                            if p['id'] == product_id
-                        ),
-                        None,
-                    )
-                    if produto_existente:
-                        produto_existente['quantity'] += (
-                            1  # Incrementar a quantidade se já estiver no carrinho
-                        )
-                    else:
-                        # Adicionar novo produto com quantidade inicial 1
-                        st.session_state.carrinho.append({
-                            'id': product_id,
-                            'name': product_name,
-                            'price': product_price,
-                            'quantity': 1,
-                        })
-                    st.success(
-                        f'Produto "{product_name}" adicionado ao carrinho!'
-                    )
-                    st.rerun()
+                    adicionar_ao_carrinho(product)
 
             with col4:
                 if st.button(
@@ -280,28 +494,11 @@ def mostrar_pedido():
                     type='primary',
                     use_container_width=True,
                 ):
-                    produto_existente = next(
-                        (
-                            p
-                            for p in st.session_state.carrinho
-                            if p['id'] == product_id
-                        ),
-                        None,
-                    )
-                    if produto_existente:
-                        if produto_existente['quantity'] > 1:
-                            produto_existente['quantity'] -= (
-                                1  # Reduzir a quantidade
-                            )
-                        else:
-                            # Remover produto do carrinho se a quantidade for 1
-                            st.session_state.carrinho.remove(produto_existente)
-                        st.warning(
-                            f'Produto "{product_name}" atualizado no carrinho!'
-                        )
-                    else:
-                        st.warning('Produto não encontrado no carrinho.')
-                    st.rerun()
+                    retirar_do_carrinho(product)
+
+    page_controls('pedido', next_cursor, has_next)
 
 
 mostrar_pedido()
+instrumentation.end_page(page_stats)
+release_session()
@@ -1,34 +1,31 @@
 # Este arquivo contém a página de cadastro de produtos
-import os
-
-import pandas as pd
 import streamlit as st
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
-from Controllers.ProductController import ProductController
+from Controllers.ProductController import (
+    PRODUCT_CATEGORIES,
+    ProductController,
+)
 from Controllers.StorageController import StorageController
-from models import Storage, table_registry
-
-# Configurações do banco de dados
-
-# Obtém o diretório onde o arquivo Python está localizado (no caso, dentro de 'src')
-base_dir = os.path.dirname(os.path.abspath(__file__))
-
-# Subir um nível de diretório para alcançar 'src' e criar o banco de dados lá
-db_path = os.path.join(base_dir, '..', 'test.db')
-
-# Crie a conexão com o banco de dados SQLite
-engine = create_engine(f'sqlite:///{db_path}')
-
-table_registry.metadata.create_all(engine)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-db = SessionLocal()
+from database import get_session, release_session
+from instrumentation import instrumentation
+from models import to_money
+from pagination import current_page, page_controls
+
+# Sessão da thread atual, sobre a engine compartilhada, descartada ao fim
+# da execução (e no início, se a anterior foi interrompida por st.rerun)
+release_session()
+db = get_session()
 productController = ProductController(session=db)
 storageController = StorageController(session=db)
+# Instrumentação opcional (FRAN_INSTRUMENTATION=1): consultas por método
+page_stats = instrumentation.begin_page(
+    'Estoque', db.get_bind(), productController, storageController
+)
 
 # TODO: Reaproveitamento de funções semelhantes.
 
+PRICE_FILTER_MAX = 130
+
 st.set_page_config(
     page_title='Estoque',
     page_icon='🍰',
@@ -43,19 +40,12 @@ st.write("""
 Gerenciamento de produtos
 """)
 
-# Carregar o DataFrame no session_state se não existir
-if 'df' not in st.session_state:
-    st.session_state.df = pd.DataFrame(productController.list_products())
-
-
-def update_dataframe():
-    st.session_state.df = pd.DataFrame(productController.list_products())
-
 
 @st.dialog('Cadastro de Produto', width='small')
 def cadastro_produto():
     nome = st.text_input('Nome do Produto')
     descricao = st.text_input('Descrição do Produto')
+    categoria = st.selectbox('Categoria do Produto', PRODUCT_CATEGORIES)
     preco = st.text_input('Preço do Produto')
     qtd = st.text_input('Quantidade do Produto')
     submit_button = st.button('Cadastrar Produto')
@@ -75,16 +65,16 @@ def cadastro_produto():
             new_product = productController.create_product(
                 name=nome,
                 description=descricao,
-                price=float(preco),
+                price=to_money(preco),
+                category=categoria,
             )
             # Registrar no estoque
             storageController.create_registry(
                 product_id=new_product.product_id,
-                cost=float(preco),
+                cost=to_money(preco),
                 quantity=int(qtd),
             )
             st.success('Produto cadastrado com sucesso!')
-            update_dataframe()
             st.rerun()
         except ValueError as e:
             st.error(f'Erro: {str(e)}')
@@ -94,15 +84,26 @@ def cadastro_produto():
 def editar_produto(product_id):
     # Recupera os dados do produto a partir do ID
     product = productController.get_product_by_id(product_id)
-    storage = db.query(Storage).filter_by(product_id=product_id).first()
+    estoque_atual = storageController.get_stock_many([product_id]).get(
+        product_id
+    )
 
     nome = st.text_input('Nome do Produto', value=product.name)
     descricao = st.text_input(
         'Descrição do Produto', value=product.description
     )
+    categoria = st.selectbox(
+        'Categoria do Produto',
+        PRODUCT_CATEGORIES,
+        index=(
+            PRODUCT_CATEGORIES.index(product.category)
+            if product.category in PRODUCT_CATEGORIES
+            else 0
+        ),
+    )
     preco = st.text_input('Preço do Produto', value=str(product.price))
     quantidade = st.text_input(
-        'Quantidade', value=str(storage.quantity if storage else 0)
+        'Quantidade', value=str(estoque_atual or 0)
     )
     submit_button = st.button('Editar')
 
@@ -122,23 +123,26 @@ def editar_produto(product_id):
                 product_id=product_id,
                 name=nome,
                 description=descricao,
-                price=float(preco),
+                price=to_money(preco),
+                category=categoria,
             )
 
-            # Atualizar o registro de estoque
-            if storage:
-                storage.quantity = int(quantidade)
-                storage.cost = float(preco)
-            else:
+            # Registrar o ajuste de estoque (nova entrada com a diferença,
+            # pelo preço informado); sem diferença, o estoque fica como está
+            if estoque_atual is None:
                 storageController.create_registry(
                     product_id=product_id,
                     quantity=int(quantidade),
-                    cost=float(preco),
+                    cost=to_money(preco),
+                )
+            elif int(quantidade) != estoque_atual:
+                storageController.update_registry(
+                    product_id=product_id,
+                    quantity=int(quantidade),
+                    cost=to_money(preco),
                 )
 
-            db.commit()
             st.success('Produto editado com sucesso!')
-            update_dataframe()
             st.rerun()
         except ValueError as e:
             st.error(f'Erro: {str(e)}')
@@ -152,10 +156,12 @@ with col1:
 with col2:
     popover = st.popover('Filtros')
     per_desc = popover.selectbox(
-        'Descrições',
-        ('Sobremesa', 'Bebidas', 'Salgados'),
+        'Categorias',
+        ('Todas', *PRODUCT_CATEGORIES),
+    )
+    per_price = popover.slider(
+        'Preço', 0, PRICE_FILTER_MAX, (0, PRICE_FILTER_MAX)
     )
-    per_price = popover.slider('Preço', 0, 130, 25)
 
 
 with col3:
@@ -165,19 +171,39 @@ with col3:
 
 def delete_product(product_id):
     productController.delete_product(product_id)
-    update_dataframe()
     st.success('Produto deletado com sucesso!')
     st.rerun()
 
 
 st.subheader('Produtos cadastrados')
 
+# Filtros aplicados no banco; o topo do slider significa "sem máximo"
+filtros = {
+    'category': per_desc if per_desc != 'Todas' else None,
+    'price_min': per_price[0] or None,
+    'price_max': per_price[1] if per_price[1] < PRICE_FILTER_MAX else None,
+    'text': title or None,
+}
+
+# Pagina por keyset (product_id > último ID exibido), voltando à primeira
+# página sempre que a busca ou os filtros mudam
+products, cursor, has_next = current_page(
+    'estoque',
+    lambda after_id, limit: productController.query_products(
+        **filtros, after_id=after_id, limit=limit
+    ),
+    reset_on=tuple(filtros.values()),
+)
+next_cursor = products[-1]['id'] if products else cursor
+if not products and any(filtros.values()):
+    st.write('Nenhum produto encontrado.')
+
 # botões de exclusão
-for index, row in st.session_state.df.iterrows():
-    product_name = row['name']
-    product_id = row['id']
-    product_price = row['price']
-    product_desc = row['description']
+for product in products:
+    product_name = product['name']
+    product_id = product['id']
+    product_price = product['price']
+    product_desc = product['description']
 
     # Coluna de visualização de produtos
     col1, col2, col3, col4, col5 = st.columns([1, 2, 2, 0.5, 0.6])
@@ -208,3 +234,7 @@ for index, row in st.session_state.df.iterrows():
     with col5:
         if st.button('Deletar', key=f'Deletar_{product_id}', type='primary'):
             delete_product(product_id)
+
+page_controls('estoque', next_cursor, has_next)
+instrumentation.end_page(page_stats)
+release_session()
@@ -0,0 +1,53 @@
+# Paginação por cursor das listas de produtos nas páginas do Streamlit
+import streamlit as st
+
+PAGE_SIZE = 20
+
+
+def current_page(key: str, fetch, page_size: int = PAGE_SIZE, reset_on=None):
+    """
+    Busca a página atual de uma lista paginada por cursor.
+    :param key: Prefixo das chaves usadas no session_state.
+    :param fetch: Função (cursor, limit) -> lista; cursor é None na primeira
+        página.
+    :param page_size: Quantidade de itens por página.
+    :param reset_on: Valor que, ao mudar (ex.: texto da busca), volta à
+        primeira página.
+    :return: Tupla (itens da página, cursor atual, se existe próxima página).
+    """
+    cursors_key = f'{key}_cursors'
+    reset_key = f'{key}_reset_on'
+    if (
+        cursors_key not in st.session_state
+        or st.session_state.get(reset_key) != reset_on
+    ):
+        st.session_state[cursors_key] = [None]
+        st.session_state[reset_key] = reset_on
+
+    cursor = st.session_state[cursors_key][-1]
+    # Um item a mais indica se existe próxima página
+    items = fetch(cursor, page_size + 1)
+    return items[:page_size], cursor, len(items) > page_size
+
+
+def page_controls(key: str, next_cursor, has_next: bool) -> None:
+    """
+    Renderiza os botões de página anterior/próxima.
+    :param key: Mesmo prefixo usado em current_page.
+    :param next_cursor: Cursor da próxima página.
+    :param has_next: Se existe próxima página.
+    """
+    cursors = st.session_state[f'{key}_cursors']
+    col1, col2, col3 = st.columns([1, 1, 4])
+    with col1:
+        if st.button(
+            '◀ Anterior', key=f'{key}_anterior', disabled=len(cursors) == 1
+        ):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        if st.button('Próxima ▶', key=f'{key}_proxima', disabled=not has_next):
+            cursors.append(next_cursor)
+            st.rerun()
+    with col3:
+        st.write(f'Página {len(cursors)}')
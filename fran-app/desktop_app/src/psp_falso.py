@@ -0,0 +1,41 @@
+# Sobe um PSP falso local para testar os pagamentos por cartão e Pix com
+# latência e falhas controladas.
+# Uso: python src/psp_falso.py [--port 8081] [--latency 2] [--jitter 1]
+#                              [--decline-rate 0.1] [--error-rate 0.2]
+#                              [--pix-delay 10]
+# As páginas usam o PSP quando FRAN_PSP_URL aponta para ele, por exemplo
+# FRAN_PSP_URL=http://127.0.0.1:8081
+import argparse
+
+from Services.Payment.FakePsp import FakePspServer
+
+parser = argparse.ArgumentParser(
+    description='PSP falso para testes de pagamento.'
+)
+parser.add_argument('--host', default='127.0.0.1')
+parser.add_argument('--port', type=int, default=8081)
+parser.add_argument('--latency', type=float, default=0.5)
+parser.add_argument('--jitter', type=float, default=0.0)
+parser.add_argument('--decline-rate', type=float, default=0.0)
+parser.add_argument('--error-rate', type=float, default=0.0)
+parser.add_argument('--pix-delay', type=float, default=10.0)
+parser.add_argument('--seed', type=int, default=None)
+args = parser.parse_args()
+
+server = FakePspServer(
+    host=args.host,
+    port=args.port,
+    latency=args.latency,
+    jitter=args.jitter,
+    decline_rate=args.decline_rate,
+    error_rate=args.error_rate,
+    pix_delay=args.pix_delay,
+    seed=args.seed,
+)
+print(f'PSP falso em {server.url} (Ctrl+C para encerrar)')
+try:
+    server.serve_forever()
+except KeyboardInterrupt:
+    pass
+finally:
+    server.server_close()
@@ -0,0 +1,152 @@
+# Fixtures compartilhadas pelos testes: um banco SQLite em memória por
+# processo (cada worker do pytest-xdist tem o seu), cada teste dentro de uma
+# transação desfeita ao final e fábricas para os modelos principais (que
+# fazem commit, como os controladores, para sobreviver a um rollback deles).
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from database import enable_sqlite_transactions, init_db
+from models import ItemSale, Product, Sale, StockLevel, Storage
+
+_SAVEPOINT_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO')
+
+
+@pytest.fixture(scope='session')
+def engine():
+    engine = create_engine(
+        'sqlite://',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool,
+    )
+    # BEGIN emitido pelo SQLAlchemy: permite SAVEPOINTs dentro da transação
+    enable_sqlite_transactions(engine)
+    init_db(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    # Commits e rollbacks dos controladores só fecham SAVEPOINTs; a
+    # transação externa é desfeita ao final, deixando o banco vazio
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(
+        bind=connection,
+        autoflush=False,
+        join_transaction_mode='create_savepoint',
+    )
+    yield session
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture
+def sql_statements(session):
+    # Instruções executadas pela sessão do teste, sem os SAVEPOINTs criados
+    # pelos commits dentro da transação do teste
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if not statement.startswith(_SAVEPOINT_STATEMENTS):
+            statements.append(statement)
+
+    bind = session.get_bind()
+    event.listen(bind, 'before_cursor_execute', record)
+    yield statements
+    event.remove(bind, 'before_cursor_execute', record)
+
+
+@pytest.fixture
+def product_factory(session):
+    counter = iter(range(1, 1_000_000))
+
+    def make_product(**fields) -> Product:
+        number = next(counter)
+        product = Product(
+            name=fields.pop('name', f'Produto {number}'),
+            description=fields.pop('description', 'Produto de teste'),
+            price=fields.pop('price', Decimal('10.00')),
+            **fields,
+        )
+        session.add(product)
+        session.commit()
+        return product
+
+    return make_product
+
+
+@pytest.fixture
+def storage_factory(session, product_factory):
+    def make_storage(product: Product = None, **fields) -> Storage:
+        product = product or product_factory()
+        entry = Storage(
+            product_id=product.product_id,
+            quantity=fields.pop('quantity', 10),
+            cost=fields.pop('cost', Decimal('5.00')),
+        )
+        # datetime não entra no construtor (valor padrão na inserção)
+        if 'datetime' in fields:
+            entry.datetime = fields['datetime']
+        session.add(entry)
+        # Mantém o saldo em stock_level como create_registry
+        statement = sqlite_insert(StockLevel).values(
+            product_id=product.product_id, quantity=entry.quantity
+        )
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[StockLevel.product_id],
+                set_={
+                    'quantity': StockLevel.quantity
+                    + statement.excluded.quantity
+                },
+            )
+        )
+        session.commit()
+        return entry
+
+    return make_storage
+
+
+@pytest.fixture
+def item_sale_factory(session, product_factory):
+    def make_item_sale(sale: Sale, product: Product = None, **fields):
+        product = product or product_factory()
+        item = ItemSale(
+            sale_id=sale.sale_id,
+            product_id=product.product_id,
+            quantityItem=fields.pop('quantityItem', 1),
+            unit_price=fields.pop('unit_price', product.price),
+        )
+        # Mantém sale.items carregado sem nova consulta
+        item.sale = sale
+        session.add(item)
+        session.commit()
+        return item
+
+    return make_item_sale
+
+
+@pytest.fixture
+def sale_factory(session, item_sale_factory):
+    def make_sale(items: list[tuple[Product, int]] = (), **fields) -> Sale:
+        total = sum(
+            (product.price * quantity for product, quantity in items),
+            Decimal('0.00'),
+        )
+        sale = Sale(total_sale=fields.pop('total_sale', total))
+        if 'datetime' in fields:
+            sale.datetime = fields['datetime']
+        session.add(sale)
+        session.commit()
+        for product, quantity in items:
+            item_sale_factory(sale, product, quantityItem=quantity)
+        return sale
+
+    return make_sale
@@ -0,0 +1,86 @@
+import json
+
+from sqlalchemy import create_engine, func, select
+
+from database import enable_sqlite_transactions, init_db
+from models import ItemSale, Product, Sale
+from Services.Benchmark.BenchmarkSuite import (
+    REFERENCE_DATE,
+    BenchmarkSuite,
+    compare_results,
+    seed,
+)
+
+SIZE = 50
+REPEAT = 2
+
+
+def test_SuiteMedeTodosOsCenariosEmJson():
+    engine = create_engine('sqlite://')
+    enable_sqlite_transactions(engine)
+    init_db(engine)
+    seed(engine, SIZE)
+
+    with engine.connect() as connection:
+        assert (
+            connection.scalar(select(func.count(Product.product_id))) == SIZE
+        )
+        assert connection.scalar(select(func.count(Sale.sale_id))) == SIZE
+        assert (
+            connection.scalar(select(func.count(ItemSale.itemsale_id))) >= SIZE
+        )
+
+    suite = BenchmarkSuite(engine, SIZE, repeat=REPEAT, warmup=1)
+    results = suite.run()
+    suite.close()
+
+    assert {r['name'] for r in results} == set(suite.scenarios())
+    for result in results:
+        assert result['size'] == SIZE
+        assert result['repeat'] == REPEAT
+        assert 0 <= result['min_ms'] <= result['median_ms']
+    # Resultado serializável, para comparar entre execuções
+    json.dumps({'results': results})
+
+
+def test_ComparacaoApontaRegressaoPelaMediana():
+    baseline = {
+        'results': [
+            {'name': 'get_stock', 'size': 1000, 'median_ms': 1.0},
+            {'name': 'process_sale', 'size': 1000, 'median_ms': 4.0},
+        ]
+    }
+    current = {
+        'results': [
+            {'name': 'get_stock', 'size': 1000, 'median_ms': 1.5},
+            {'name': 'process_sale', 'size': 1000, 'median_ms': 4.2},
+            {'name': 'get_stock', 'size': 10000, 'median_ms': 2.0},
+        ]
+    }
+
+    comparison = compare_results(baseline, current, threshold=0.2)
+
+    assert [(c['name'], c['regression']) for c in comparison] == [
+        ('get_stock', True),
+        ('process_sale', False),
+    ]
+
+
+def test_SementeGeraSempreOMesmoBanco():
+    dumps = []
+    for _ in range(2):
+        engine = create_engine('sqlite://')
+        init_db(engine)
+        seed(engine, SIZE)
+        with engine.connect() as connection:
+            dumps.append(
+                connection.execute(
+                    select(Sale.datetime, Sale.total_sale).order_by(
+                        Sale.sale_id
+                    )
+                ).all()
+            )
+        engine.dispose()
+
+    assert dumps[0] == dumps[1]
+    assert max(datetime for datetime, _ in dumps[0]) <= REFERENCE_DATE
@@ -0,0 +1,85 @@
+import sqlite3
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from Controllers.ProductController import ProductController
+from database import init_db
+
+
+def test_CatalogoServidoDoCacheAteUmaEscrita(session, sql_statements):
+    productController = ProductController(session=session)
+    productController.create_product(
+        name='Bolo', description='Bolo de cenoura', price=25.0
+    )
+    sql_statements.clear()
+
+    assert [p['name'] for p in productController.list_products()] == ['Bolo']
+    # Outra sessão (outro terminal) reaproveita o catálogo carregado
+    outroTerminal = ProductController(
+        session=Session(
+            bind=session.get_bind(), join_transaction_mode='create_savepoint'
+        )
+    )
+    assert outroTerminal.list_products() == productController.list_products()
+    # Só a versão do catálogo é consultada; a lista é lida uma vez
+    assert len([s for s in sql_statements if 'FROM product' in s]) == 1
+
+    outroTerminal.create_product(
+        name='Suco', description='Suco de laranja', price=8.0
+    )
+    assert [p['name'] for p in productController.list_products()] == [
+        'Bolo',
+        'Suco',
+    ]
+
+
+def test_ListagemPaginadaPorKeyset(session):
+    productController = ProductController(session=session)
+    for i in range(7):
+        productController.create_product(
+            name=f'Produto {i}', description='teste', price=1.0
+        )
+
+    first = productController.list_products(limit=3)
+    assert [p['id'] for p in first] == [1, 2, 3]
+    second = productController.list_products(after_id=first[-1]['id'], limit=3)
+    assert [p['id'] for p in second] == [4, 5, 6]
+    assert [p['id'] for p in productController.list_products(6, 3)] == [7]
+
+
+def test_PaginasSemFiltroVemDoCatalogoEmCache(session, sql_statements):
+    productController = ProductController(session=session)
+    for i in range(5):
+        productController.create_product(
+            name=f'Produto {i}', description='teste', price=1.0
+        )
+    productController.list_products()  # carrega o catálogo
+    sql_statements.clear()
+
+    page = productController.query_products(after_id=2, limit=2)
+    assert [p['id'] for p in page] == [3, 4]
+    assert [p['id'] for p in productController.list_products(4, 2)] == [5]
+    assert not [s for s in sql_statements if 'FROM product' in s]
+
+
+def test_EscritaDeOutroProcessoInvalidaOCache(tmp_path):
+    path = tmp_path / 'loja.db'
+    engine = create_engine(f'sqlite:///{path}')
+    init_db(engine)
+    productController = ProductController(session=sessionmaker(bind=engine)())
+    productController.create_product(
+        name='Bolo', description='Bolo de cenoura', price=25.0
+    )
+    assert [p['name'] for p in productController.list_products()] == ['Bolo']
+    productController.session.commit()  # encerra a leitura em andamento
+
+    # Outro processo grava direto no arquivo, sem passar por este cache
+    with sqlite3.connect(path) as outroProcesso:
+        outroProcesso.execute(
+            "UPDATE product SET name = 'Bolo de fubá' WHERE product_id = 1"
+        )
+
+    assert [p['name'] for p in productController.list_products()] == [
+        'Bolo de fubá'
+    ]
@@ -0,0 +1,250 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, select
+
+from Controllers.PaymentController import PaymentController
+from Controllers.ProductController import ProductController
+from Controllers.ReportController import ReportController
+from Controllers.SaleController import SaleController
+from Controllers.StorageController import StorageController
+from models import (
+    PAYMENT_CANCELLED,
+    PAYMENT_PENDING,
+    ItemSale,
+    Product,
+    Sale,
+    Storage,
+)
+
+
+@pytest.fixture
+def controllers(session, product_factory, storage_factory):
+    storageController = StorageController(session=session)
+    saleController = SaleController(
+        session=session, storage_controller=storageController
+    )
+    product_ids = []
+    for i in range(3):
+        product = product_factory(name=f'Produto {i}')
+        storage_factory(product, quantity=5, cost=Decimal('4.00'))
+        product_ids.append(product.product_id)
+    return session, storageController, saleController, product_ids
+
+
+def test_CheckoutBaixaEstoqueUmaVezComUmCommit(controllers):
+    db, storageController, saleController, product_ids = controllers
+    commits = []
+
+    def count_commit(session):
+        # SAVEPOINTs liberados também disparam o evento; só conta o commit
+        if not session.in_nested_transaction():
+            commits.append(1)
+
+    event.listen(db, 'after_commit', count_commit)
+
+    sale = saleController.checkout(
+        total_sale=50.0,
+        item_sales=[
+            {'product_id': product_ids[0], 'quantityItem': 2},
+            {'product_id': product_ids[1], 'quantityItem': 1},
+            {'product_id': product_ids[0], 'quantityItem': 1},
+        ],
+    )
+
+    assert len(commits) == 1
+    assert storageController.get_stock(product_ids[0]) == 2  # noqa: PLR2004
+    assert storageController.get_stock(product_ids[1]) == 4  # noqa: PLR2004
+    assert storageController.get_stock(product_ids[2]) == 5  # noqa: PLR2004
+    items = db.query(ItemSale).filter_by(sale_id=sale.sale_id).all()
+    assert {(i.product_id, i.quantityItem) for i in items} == {
+        (product_ids[0], 3),
+        (product_ids[1], 1),
+    }
+
+
+def test_CheckoutSemEstoqueNaoGravaNada(controllers):
+    db, storageController, saleController, product_ids = controllers
+
+    with pytest.raises(ValueError, match='Estoque insuficiente'):
+        saleController.checkout(
+            total_sale=70.0,
+            item_sales=[
+                {'product_id': product_ids[0], 'quantityItem': 1},
+                {'product_id': product_ids[1], 'quantityItem': 6},
+            ],
+        )
+
+    assert storageController.get_stock(product_ids[0]) == 5  # noqa: PLR2004
+    assert db.query(Sale).count() == 0
+    assert db.query(ItemSale).count() == 0
+
+
+def test_FaltaNoSegundoProdutoApontaOProdutoCerto(controllers):
+    db, storageController, saleController, product_ids = controllers
+
+    # O primeiro produto cabe (todo o saldo); só o segundo não tem estoque
+    with pytest.raises(
+        ValueError,
+        match=(
+            f'produto ID {product_ids[1]}. '
+            'Quantidade disponível: 5, solicitada: 6'
+        ),
+    ):
+        saleController.checkout(
+            total_sale=110.0,
+            item_sales=[
+                {'product_id': product_ids[0], 'quantityItem': 5},
+                {'product_id': product_ids[1], 'quantityItem': 6},
+            ],
+        )
+
+    assert storageController.get_stock(product_ids[0]) == 5  # noqa: PLR2004
+    assert db.query(Sale).count() == 0
+
+
+def test_CarrinhoVazioEhRecusado(controllers):
+    db, _, saleController, _ = controllers
+
+    with pytest.raises(ValueError, match='ao menos um item'):
+        saleController.checkout(total_sale=0, item_sales=[])
+
+    assert db.query(Sale).count() == 0
+
+
+def test_CreateSaleUsaOControladorDeEstoqueInformado(controllers):
+    db, storageController, _, product_ids = controllers
+    calls = []
+
+    class RecordingStorage(StorageController):
+        def decrement_stock_many(self, items, cart_id=None):
+            calls.append(items)
+            super().decrement_stock_many(items, cart_id)
+
+    saleController = SaleController(session=db, storage_controller=None)
+    saleController.create_sale(
+        total_sale=10.0,
+        item_sales=[{'product_id': product_ids[0], 'quantityItem': 1}],
+        storage_controller=RecordingStorage(session=db),
+    )
+
+    assert calls == [[(product_ids[0], 1)]]
+    assert storageController.get_stock(product_ids[0]) == 4  # noqa: PLR2004
+
+
+def test_VerificacaoEBaixaDeEstoqueEmLote(controllers, sql_statements):
+    db, storageController, saleController, product_ids = controllers
+    statements = sql_statements
+    statements.clear()
+
+    status = storageController.check_stock_many([
+        (product_ids[0], 3),
+        (product_ids[1], 6),
+        (999, 1),
+    ])
+    assert len(statements) == 1
+    assert status[product_ids[0]]['sufficient']
+    assert not status[product_ids[1]]['sufficient']
+    assert status[999]['available'] is None
+
+    with pytest.raises(ValueError, match='Estoque insuficiente'):
+        storageController.remove_sold_products_many([
+            (product_ids[0], 3),
+            (product_ids[1], 6),
+        ])
+    assert storageController.get_stock(product_ids[0]) == 5  # noqa: PLR2004
+
+    storageController.remove_sold_products_many([
+        (product_ids[0], 3),
+        (product_ids[1], 5),
+    ])
+    assert storageController.get_stock_many(product_ids) == {
+        product_ids[0]: 2,
+        product_ids[1]: 0,
+        product_ids[2]: 5,
+    }
+
+
+def test_DetalhesDaVendaSemConsultasNMais1(controllers, sql_statements):
+    db, storageController, saleController, product_ids = controllers
+    for product_id in product_ids:
+        saleController.checkout(
+            total_sale=20.0,
+            item_sales=[
+                {'product_id': product_id, 'quantityItem': 1},
+                {'product_id': product_ids[-1], 'quantityItem': 1},
+            ],
+        )
+    db.expunge_all()
+
+    statements = sql_statements
+    statements.clear()
+
+    details = saleController.get_sale_details(1)
+    assert len(statements) == 2  # noqa: PLR2004
+    assert {(i['name'], i['quantity']) for i in details['items']} == {
+        ('Produto 0', 1),
+        ('Produto 2', 1),
+    }
+
+    statements.clear()
+    sales = saleController.list_sales(with_items=True)
+    names = [[i.product.name for i in sale.items] for sale in sales]
+    assert len(statements) == 2  # noqa: PLR2004
+    assert names[2] == ['Produto 2']
+
+
+def test_DetalhesDaVendaDeProdutoExcluido(
+    session, product_factory, sale_factory
+):
+    product_id = product_factory(name='Bolo').product_id
+    sale_id = sale_factory([(session.get(Product, product_id), 1)]).sale_id
+    # Sem chaves estrangeiras no SQLite, os itens da venda continuam lá
+    ProductController(session).delete_product(product_id)
+    session.expunge_all()
+
+    details = SaleController(
+        session, StorageController(session)
+    ).get_sale_details(sale_id)
+
+    assert [(i['product_id'], i['name']) for i in details['items']] == [
+        (product_id, None)
+    ]
+
+
+def test_EstornoEExclusaoDevolvemOCustoGravadoNaVenda(controllers):
+    db, storageController, saleController, product_ids = controllers
+    reports = ReportController(db)
+    sale = saleController.checkout(
+        total_sale=20.0,
+        item_sales=[{'product_id': product_ids[0], 'quantityItem': 2}],
+        payment_status=PAYMENT_PENDING,
+    )
+    day = sale.datetime.date()
+    # Uma entrada mais cara depois da venda muda o custo médio
+    storageController.create_registry(
+        product_id=product_ids[0], quantity=5, cost=10.0
+    )
+    assert db.scalar(
+        select(ItemSale.unit_cost).where(ItemSale.sale_id == sale.sale_id)
+    ) == Decimal('4.00')
+
+    assert PaymentController(db).settle(sale.sale_id, PAYMENT_CANCELLED)
+    daily = reports.daily_sales(day)
+    assert daily['units'].tolist() == [0]
+    assert daily['cost'].tolist() == [0]
+    assert storageController.get_stock(product_ids[0]) == 10  # noqa: PLR2004
+
+    other = saleController.checkout(
+        total_sale=10.0,
+        item_sales=[{'product_id': product_ids[1], 'quantityItem': 1}],
+    )
+    saleController.delete_sale(other.sale_id)
+    saleController.delete_sale(sale.sale_id)
+
+    assert storageController.get_stock(product_ids[0]) == 10  # noqa: PLR2004
+    assert storageController.get_stock(product_ids[1]) == 5  # noqa: PLR2004
+    assert reports.daily_sales(day)['units'].tolist() == [0, 0]
+    assert db.scalars(
+        select(Storage).where(Storage.sale_id.is_not(None))
+    ).all() == []
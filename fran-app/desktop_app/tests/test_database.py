@@ -0,0 +1,17 @@
+from sqlalchemy import text
+
+from database import get_engine, get_session
+
+
+def test_EngineCompartilhadaComPragmasDoSQLite(tmp_path):
+    url = f'sqlite:///{tmp_path / "loja.db"}'
+
+    engine = get_engine(url)
+    assert get_engine(url) is engine
+
+    with engine.connect() as connection:
+        assert connection.scalar(text('PRAGMA journal_mode')) == 'wal'
+        assert connection.scalar(text('PRAGMA synchronous')) == 1  # NORMAL
+
+    assert get_session(url) is get_session(url)
+    assert get_session(url).get_bind() is engine
@@ -0,0 +1,97 @@
+import csv
+import datetime as dt
+import io
+import json
+from decimal import Decimal
+
+import pytest
+
+from Controllers.ProductController import ProductController
+from Controllers.SaleController import SaleController
+from Controllers.StorageController import StorageController
+from Services.Export.DataExporter import DataExporter
+
+
+@pytest.fixture
+def exporter(session):
+    product = ProductController(session=session).create_product(
+        name='Brigadeiro', description='Doce', price=2.5
+    )
+    storageController = StorageController(session=session)
+    storageController.create_registry(product.product_id, 100, cost=1)
+    saleController = SaleController(
+        session=session, storage_controller=storageController
+    )
+    for day in range(1, 6):
+        sale = saleController.checkout(
+            total_sale=Decimal('2.50') * day,
+            item_sales=[
+                {'product_id': product.product_id, 'quantityItem': day}
+            ],
+        )
+        sale.datetime = dt.datetime(2024, 3, day, 12)
+        session.commit()
+    return DataExporter(session=session, chunk_size=2)
+
+
+def test_LeituraEmBlocosLimitados(exporter):
+
+    chunks = list(exporter.iter_chunks('item_sales'))
+
+    assert [len(rows) for rows in chunks] == [2, 2, 1]
+    assert chunks[0][0]['product_name'] == 'Brigadeiro'
+
+
+def test_ExportaCsvComFiltroDeData(exporter):
+    file = io.StringIO()
+
+    total = exporter.export(
+        'sales',
+        file,
+        'csv',
+        start=dt.datetime(2024, 3, 2),
+        end=dt.datetime(2024, 3, 4),
+    )
+
+    rows = list(csv.DictReader(io.StringIO(file.getvalue())))
+    assert total == 2  # noqa: PLR2004
+    assert rows == [
+        {
+            'sale_id': '2',
+            'datetime': '2024-03-02 12:00:00',
+            'total_sale': '5.00',
+        },
+        {
+            'sale_id': '3',
+            'datetime': '2024-03-03 12:00:00',
+            'total_sale': '7.50',
+        },
+    ]
+
+
+def test_ExportaNdjson(exporter, tmp_path):
+    path = tmp_path / 'estoque.ndjson'
+
+    # A entrada e as baixas das cinco vendas
+    assert exporter.export('storage', path, 'ndjson') == 6  # noqa: PLR2004
+    rows = [json.loads(line) for line in path.read_text('utf-8').splitlines()]
+    assert rows[0]['quantity'] == 100  # noqa: PLR2004
+    assert rows[0]['cost'] == '1.00'
+    assert rows[0]['sale_id'] is None
+    assert [row['quantity'] for row in rows[1:]] == [-1, -2, -3, -4, -5]
+    assert [row['sale_id'] for row in rows[1:]] == [1, 2, 3, 4, 5]
+
+
+def test_ExportaParquet(exporter, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = tmp_path / 'itens.parquet'
+
+    assert exporter.export('item_sales', path, 'parquet') == 5  # noqa: PLR2004
+    table = pq.read_table(path)
+    assert table.num_rows == 5  # noqa: PLR2004
+    assert table.column('unit_price').to_pylist()[0] == Decimal('2.50')
+
+
+def test_FiltroDeDataInvalidoParaProdutos(exporter):
+    with pytest.raises(ValueError, match='filtro de data'):
+        list(exporter.iter_chunks('products', start=dt.datetime(2024, 1, 1)))
@@ -0,0 +1,31 @@
+from sqlalchemy import inspect
+
+from Controllers.ProductController import ProductController
+
+
+def test_FiltrosAplicadosNoBanco(session):
+    productController = ProductController(session=session)
+    for name, description, price, category in [
+        ('Pudim', 'Pudim de leite', 12.0, 'Sobremesa'),
+        ('Torta', 'Torta de limão', 45.0, 'Sobremesa'),
+        ('Suco', 'Suco de limão', 8.0, 'Bebidas'),
+        ('Coxinha', 'Coxinha de frango', 7.0, 'Salgados'),
+    ]:
+        productController.create_product(
+            name=name, description=description, price=price, category=category
+        )
+
+    def names(**filters):
+        return [p['name'] for p in productController.query_products(**filters)]
+
+    assert names(category='Sobremesa') == ['Pudim', 'Torta']
+    assert names(category='Sobremesa', price_max=20) == ['Pudim']
+    assert names(price_min=7.5, price_max=20) == ['Pudim', 'Suco']
+    assert names(text='limão') == ['Torta', 'Suco']
+    assert names(text='limao', category='Bebidas') == ['Suco']
+    assert names(after_id=1, limit=2) == ['Torta', 'Suco']
+
+    indexes = {
+        i['name'] for i in inspect(session.connection()).get_indexes('product')
+    }
+    assert 'ix_product_category_price' in indexes
@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import func, select
+
+from Controllers.SaleController import SaleController
+from Controllers.StorageController import StorageController
+from models import Product
+
+
+# Os dois testes fazem commit e esperam o banco vazio: passam em qualquer
+# ordem, inclusive em workers diferentes do pytest-xdist
+@pytest.mark.parametrize('name', ['Bolo', 'Suco'])
+def test_CadaTesteComecaComOBancoVazio(session, product_factory, name):
+    assert session.scalar(select(func.count(Product.product_id))) == 0
+
+    product_factory(name=name)
+    session.commit()
+
+    assert session.scalar(select(func.count(Product.product_id))) == 1
+
+
+def test_FabricasAlimentamOsControladores(
+    session, product_factory, storage_factory, sale_factory
+):
+    bolo = product_factory(name='Bolo')
+    storage_factory(bolo, quantity=5)
+    sale = sale_factory([(bolo, 2)])
+
+    storageController = StorageController(session=session)
+    saleController = SaleController(
+        session=session, storage_controller=storageController
+    )
+    details = saleController.get_sale_details(sale.sale_id)
+
+    assert details['total_sale'] == bolo.price * 2
+    assert [(i['name'], i['quantity']) for i in details['items']] == [
+        ('Bolo', 2)
+    ]
+    assert storageController.get_stock(bolo.product_id) == 5  # noqa: PLR2004
+
+
+def test_RollbackDoControladorPreservaODadosDoTeste(
+    session, storage_factory
+):
+    entry = storage_factory(quantity=1)
+    storageController = StorageController(session=session)
+    saleController = SaleController(
+        session=session, storage_controller=storageController
+    )
+
+    with pytest.raises(ValueError, match='Estoque insuficiente'):
+        saleController.checkout(
+            total_sale=10.0,
+            item_sales=[{'product_id': entry.product_id, 'quantityItem': 2}],
+        )
+
+    assert storageController.get_stock(entry.product_id) == 1
@@ -0,0 +1,140 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from Controllers.ProductController import ProductController
+from Services.Sync.HttpClient import HttpClient
+from Services.Sync.SyncEngine import SyncEngine
+from Services.Sync.WireFormat import decode_batch
+
+
+class StandInServer(ThreadingHTTPServer):
+    # Servidor local no lugar do backend NestJS
+    def __init__(self, failures=0):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.failures = failures
+        self.status_failures = 0
+        self.status_calls = 0
+        self.bodies = []
+        self.connections = set()
+        self.lock = threading.Lock()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body=b'{}'):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.status_calls += 1
+            if server.status_failures > 0:
+                server.status_failures -= 1
+                self.reply(503)
+                return
+        self.reply(200 if self.path == '/status' else 404, b'STATUS: OK')
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        with server.lock:
+            server.connections.add(self.client_address)
+            if server.failures > 0:
+                server.failures -= 1
+                self.reply(503)
+                return
+            if self.headers.get('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+            server.bodies.append(json.loads(body))
+        self.reply(201)
+
+
+@pytest.fixture
+def server_factory():
+    servers = []
+
+    def start(failures=0):
+        server = StandInServer(failures)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server, f'http://127.0.0.1:{server.server_port}'
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_GzipConexaoReaproveitadaENovasTentativas(server_factory):
+    server, url = server_factory(failures=2)
+    client = HttpClient(url, backoff_factor=0, compress_min_bytes=100)
+
+    assert client.check_status()
+    for i in range(3):
+        body = json.dumps({'rows': ['x' * 200], 'i': i})
+        client.post('/postdata', data=body).raise_for_status()
+
+    assert [body['i'] for body in server.bodies] == [0, 1, 2]
+    # As duas respostas 503 foram repetidas na mesma conexão
+    assert len(server.connections) == 1
+
+
+def test_DesisteAposEsgotarAsTentativas(server_factory):
+    server, url = server_factory(failures=10)
+    client = HttpClient(url, retries=2, backoff_factor=0)
+
+    with pytest.raises(requests.RequestException):
+        client.post('/postdata', data='{}')
+    assert server.failures == 7  # noqa: PLR2004
+
+
+def test_StatusNaoRepeteAConsulta(server_factory):
+    server, url = server_factory()
+    server.status_failures = 1
+    client = HttpClient(url, backoff_factor=0)
+
+    assert not client.check_status()
+    assert server.status_calls == 1
+    assert client.check_status()
+
+
+def test_ServidorForaDoArNaoResponde():
+    client = HttpClient('http://127.0.0.1:9', timeout=0.5)
+    assert not client.check_status()
+
+
+def test_SyncEngineEnviaLotesEmParaleloNaOrdem(session, server_factory):
+    for i in range(40):
+        ProductController(session=session).create_product(
+            name=f'Produto {i}', description='x' * 50, price=1
+        )
+
+    server, url = server_factory()
+    syncEngine = SyncEngine(
+        session=session,
+        endpoint='/postdata',
+        http=HttpClient(url, pool_size=4),
+        max_batch_bytes=1024,
+        concurrency=4,
+    )
+
+    assert syncEngine.run_once()['product'] == 40  # noqa: PLR2004
+    sent = sorted(
+        row['product_id']
+        for body in server.bodies
+        for row in decode_batch(body)
+    )
+    assert sent == list(range(1, 41))
+    assert syncEngine.get_cursor('product').last_pk == 40  # noqa: PLR2004
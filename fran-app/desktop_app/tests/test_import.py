@@ -0,0 +1,119 @@
+import json
+from decimal import Decimal
+
+from sqlalchemy import event, select
+
+from Controllers.OutboxController import OutboxController
+from Controllers.ProductController import ProductController
+from Controllers.StorageController import StorageController
+from models import Product
+from Services.Import.ProductImporter import ProductImporter
+
+
+def test_ImportaCsvEmUmaTransacaoComErrosPorLinha(session, tmp_path):
+    ProductController(session=session).create_product(
+        name='Coxinha', description='Salgado', price=6.0
+    )
+    StorageController(session=session).create_registry(1, quantity=5, cost=2)
+
+    path = tmp_path / 'catalogo.csv'
+    path.write_text(
+        'name,description,price,category,quantity,cost\n'
+        'Brigadeiro,Doce de chocolate,2.50,Sobremesa,40,1.10\n'
+        'Coxinha,Salgado de frango,7.00,Salgados,10,\n'
+        ',Sem nome,3.00,,1,\n'
+        'Suco,Suco de uva,abc,Bebidas,1,\n'
+        'Brigadeiro,Repetido,2.50,,1,\n'
+        'Pudim,Pudim de leite,9.90,Sobremesa,,\n',
+        encoding='utf-8',
+    )
+    commits = []
+    event.listen(session, 'after_commit', lambda session: commits.append(1))
+
+    result = ProductImporter(session=session).import_file(str(path))
+
+    assert len(commits) == 1
+    assert result['created'] == 2  # noqa: PLR2004
+    assert result['updated'] == 1
+    # Numeração do arquivo: a linha 1 é o cabeçalho
+    assert [error['row'] for error in result['errors']] == [4, 5, 6]
+
+    products = {p.name: p for p in session.scalars(select(Product))}
+    assert products['Coxinha'].price == Decimal('7.00')
+    assert products['Brigadeiro'].category == 'Sobremesa'
+    stock = StorageController(session=session).get_stock_many([
+        p.product_id for p in products.values()
+    ])
+    assert stock == {
+        products['Coxinha'].product_id: 15,
+        products['Brigadeiro'].product_id: 40,
+    }
+    catalog = ProductController(session).list_products()
+    assert any(p['name'] == 'Pudim' for p in catalog)
+
+
+def test_ImportaJson(session, tmp_path):
+    path = tmp_path / 'catalogo.json'
+    path.write_text(
+        json.dumps([
+            {'name': f'Produto {i}', 'description': 'x', 'price': 1 + i}
+            for i in range(500)
+        ]),
+        encoding='utf-8',
+    )
+
+    result = ProductImporter(session=session).import_file(str(path))
+
+    assert result == {'created': 500, 'updated': 0, 'errors': []}
+    assert session.get(Product, 500).price == Decimal('500.00')
+
+
+def test_JsonComLinhaQueNaoEhObjetoRelataOErro(session, tmp_path):
+    path = tmp_path / 'catalogo.json'
+    path.write_text(
+        json.dumps([
+            {'name': 'Pudim', 'description': 'Doce', 'price': 9.9},
+            'Brigadeiro',
+            None,
+        ]),
+        encoding='utf-8',
+    )
+
+    result = ProductImporter(session=session).import_file(str(path))
+
+    assert result['created'] == 1
+    assert [error['row'] for error in result['errors']] == [2, 3]
+
+
+def test_NomeRepetidoNoCadastroExigeOId(session, product_factory):
+    first = product_factory(name='Bolo')
+    second = product_factory(name='Bolo')
+
+    result = ProductImporter(session=session).import_rows([
+        {'name': 'Bolo', 'description': 'Ambíguo', 'price': 12},
+        {
+            'product_id': second.product_id,
+            'name': 'Bolo de fubá',
+            'description': 'Fubá',
+            'price': 15,
+            'quantity': 3,
+        },
+        {'product_id': 999, 'name': 'X', 'description': 'X', 'price': 1},
+    ])
+
+    assert result['created'] == 0
+    assert result['updated'] == 1
+    assert [error['row'] for error in result['errors']] == [1, 3]
+    session.refresh(first)
+    session.refresh(second)
+    assert first.name == 'Bolo'
+    assert second.name == 'Bolo de fubá'
+
+    events = [
+        (event.event_type, json.loads(event.payload)['product_id'])
+        for event in OutboxController(session).list_pending()
+    ]
+    assert events == [
+        ('product.updated', second.product_id),
+        ('stock.updated', second.product_id),
+    ]
@@ -0,0 +1,96 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import init_db
+from instrumentation import Instrumentation
+from IntegrationFacade import IntegrationFacade
+
+
+def make_facade():
+    # Banco próprio: os commits contados precisam ser transações reais, e
+    # não os SAVEPOINTs da fixture session
+    engine = create_engine('sqlite://')
+    init_db(engine)
+    facade = IntegrationFacade(sessionmaker(bind=engine)())
+    product = facade.create_product('Bolo', 'Bolo de cenoura', 25.0)
+    facade.add_to_storage(product.product_id, 10, 12.0)
+    return engine, facade, product.product_id
+
+
+def test_ChamadasDaFacadeEDosControladoresSaoContadas():
+    engine, facade, product_id = make_facade()
+    instrumentation = Instrumentation()
+    instrumentation.install(engine)
+    instrumentation.instrument(facade)
+
+    sale = facade.create_sale(
+        50.0, [{'product_id': product_id, 'quantityItem': 2}]
+    )
+    facade.get_sale_details(sale.sale_id)
+
+    stats = instrumentation.snapshot()
+    checkout = stats['SaleController.checkout']
+    assert checkout['calls'] == 1
+    assert checkout['commits'] == 1
+    assert checkout['statements'] >= 1
+    # Chamadas aninhadas contam as mesmas instruções em cada nível
+    assert (
+        stats['IntegrationFacade.create_sale']['statements']
+        == (checkout['statements'])
+    )
+    assert stats['StorageController.decrement_stock_many']['commits'] == 0
+    details = stats['IntegrationFacade.get_sale_details']
+    assert details['commits'] == 0
+    # Uma linha da venda e uma do item com o produto
+    assert details['rows'] == 2  # noqa: PLR2004
+
+
+def test_InstrucoesForaDeUmEscopoNaoSaoContadas():
+    engine, facade, product_id = make_facade()
+    instrumentation = Instrumentation()
+    instrumentation.install(engine)
+
+    facade.get_storage(product_id)
+    with instrumentation.track('leitura') as stats:
+        facade.get_storage(product_id)
+
+    assert stats.statements == 1
+    assert stats.rows == 1
+    assert list(instrumentation.snapshot()) == ['leitura']
+
+
+def test_ResumoDaPaginaETextoDoPrometheus(monkeypatch):
+    engine, facade, product_id = make_facade()
+    instrumentation = Instrumentation(enabled=True)
+    monkeypatch.setattr(instrumentation, 'render_sidebar', lambda s: None)
+
+    request = instrumentation.begin_page('Pedidos', engine, facade)
+    facade.list_products()
+    facade.get_storage(product_id)
+    summary = instrumentation.end_page(request)
+
+    assert summary['name'] == 'Pedidos'
+    # Catálogo: tabela e versão verificadas, lista carregada; mais o estoque
+    assert summary['statements'] == 4  # noqa: PLR2004
+    assert summary['commits'] == 0
+    assert set(summary['methods']) >= {
+        'IntegrationFacade.list_products',
+        'StorageController.get_stock',
+    }
+    text = instrumentation.prometheus_text()
+    assert '# TYPE fran_method_calls_total counter' in text
+    assert (
+        'fran_method_calls_total{method="IntegrationFacade.get_storage"} 1'
+        in text
+    )
+
+
+def test_PaginaSemInstrumentacaoNaoAlteraNada():
+    engine, facade, _ = make_facade()
+    instrumentation = Instrumentation(enabled=False)
+
+    request = instrumentation.begin_page('Estoque', engine, facade)
+
+    assert request is None
+    assert instrumentation.end_page(request) is None
+    assert not hasattr(facade.list_products, '__instrumented__')
@@ -1,30 +1,28 @@
-import os
+from decimal import Decimal
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import pytest
 
-from src.Controllers.ProductController import ProductController
-from src.Controllers.StorageController import StorageController
-from src.models import table_registry
+from Controllers.ProductController import ProductController
+from Controllers.StorageController import StorageController
+from models import to_money
 
-# Configurações do banco de dados
-base_dir = os.path.dirname(os.path.abspath(__file__))
-db_path = os.path.join(base_dir, '..', 'test.db')
-engine = create_engine(f'sqlite:///{db_path}')
 
-table_registry.metadata.create_all(engine)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-db = SessionLocal()
-productController = ProductController(session=db)
-storageController = StorageController(session=db)
+@pytest.fixture
+def productController(session):
+    return ProductController(session=session)
 
 
-def test_CriarProdutoEmEstoque():
+@pytest.fixture
+def storageController(session):
+    return StorageController(session=session)
+
+
+def test_CriarProdutoEmEstoque(productController, storageController):
     test_product_name = 'Produto de teste 1'
-    test_product_price = 10.99
+    test_product_price = Decimal('10.99')
     test_product_description = 'Descrição do produto teste'
     test_product_quantity = 99
-    test_product_cost = test_product_price * 0.2
+    test_product_cost = to_money(test_product_price * Decimal('0.2'))
 
     test_product = productController.create_product(
         name=test_product_name,
@@ -49,12 +47,12 @@ def test_CriarProdutoEmEstoque():
     assert storage_entry.quantity == test_product_quantity
 
 
-def test_VerificarProdutoCriadoEmEstoque():
+def test_VerificarProdutoCriadoEmEstoque(productController, storageController):
     test_product_name = 'Produto de teste 1'
-    test_product_price = 10.99
+    test_product_price = Decimal('10.99')
     test_product_description = 'Descrição do produto teste'
     test_product_quantity = 99
-    test_product_cost = test_product_price * 0.2
+    test_product_cost = to_money(test_product_price * Decimal('0.2'))
 
     test_product = productController.create_product(
         name=test_product_name,
@@ -75,6 +73,9 @@ def test_VerificarProdutoCriadoEmEstoque():
     storage_entry = storageController.get_registry_by_id(
         test_product.product_id
     )
-    assert storage_entry.entry_id == test_product.product_id
+    assert storage_entry.product_id == test_product.product_id
     assert storage_entry.cost == test_product_cost
     assert storage_entry.quantity == test_product_quantity
+    assert storageController.get_stock(test_product.product_id) == (
+        test_product_quantity
+    )
@@ -0,0 +1,147 @@
+import datetime as dt
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+import migrations
+from database import enable_sqlite_transactions, init_db
+from models import Product, Storage
+
+
+def make_legacy_engine(tmp_path):
+    # Esquema como era antes das migrações: sem categoria, sem saldo e
+    # sem índices nas chaves estrangeiras
+    engine = create_engine(f'sqlite:///{tmp_path / "antigo.db"}')
+    enable_sqlite_transactions(engine)
+    with engine.begin() as connection:
+        for statement in [
+            'CREATE TABLE product (product_id INTEGER PRIMARY KEY, '
+            'name VARCHAR, description VARCHAR, price FLOAT)',
+            'CREATE TABLE storage (entry_id INTEGER PRIMARY KEY, '
+            'product_id INTEGER, quantity INTEGER, datetime VARCHAR, '
+            'cost FLOAT)',
+            'CREATE TABLE sale (sale_id INTEGER PRIMARY KEY, '
+            'datetime VARCHAR, total_sale FLOAT)',
+            'CREATE TABLE itemsale (itemsale_id INTEGER PRIMARY KEY, '
+            'sale_id INTEGER, product_id INTEGER, "quantityItem" INTEGER)',
+            "INSERT INTO product VALUES (1, 'Pudim', 'Pudim de leite', 8.5)",
+            "INSERT INTO storage VALUES (1, 1, 4, '2024-01-01 10:00:00', 3)",
+        ]:
+            connection.execute(text(statement))
+    return engine
+
+
+def test_BancoAntigoEhAtualizadoAteAUltimaVersao(tmp_path):
+    engine = make_legacy_engine(tmp_path)
+
+    init_db(engine)
+
+    with engine.connect() as connection:
+        assert migrations.current_version(connection) == (
+            migrations.HEAD_VERSION
+        )
+        assert (
+            connection.scalar(
+                text('SELECT quantity FROM stock_level WHERE product_id = 1')
+            )
+            == 4  # noqa: PLR2004
+        )
+        assert (
+            connection.scalar(
+                text(
+                    'SELECT rowid FROM product_fts '
+                    "WHERE product_fts MATCH 'pudim'"
+                )
+            )
+            == 1
+        )
+
+    inspector = inspect(engine)
+    assert 'category' in {c['name'] for c in inspector.get_columns('product')}
+    indexed = {
+        (table, tuple(index['column_names']))
+        for table in ('itemsale', 'sale', 'storage')
+        for index in inspector.get_indexes(table)
+    }
+    assert {
+        ('itemsale', ('sale_id',)),
+        ('itemsale', ('product_id',)),
+        ('sale', ('datetime',)),
+        ('storage', ('product_id',)),
+        ('storage', ('datetime',)),
+    } <= indexed
+
+
+def test_MigracoesNaoSaoReaplicadas(tmp_path):
+    engine = make_legacy_engine(tmp_path)
+    init_db(engine)
+    with engine.begin() as connection:
+        connection.execute(text('DELETE FROM stock_level'))
+
+    init_db(engine)
+
+    with engine.connect() as connection:
+        assert connection.scalar(text('SELECT COUNT(*) FROM stock_level')) == 0
+
+
+def test_DinheiroEDatasSaoConvertidosParaInteiros(tmp_path):
+    engine = make_legacy_engine(tmp_path)
+
+    init_db(engine)
+
+    with engine.connect() as connection:
+        assert connection.execute(
+            text('SELECT price, typeof(price) FROM product')
+        ).one() == (850, 'integer')
+        assert connection.execute(
+            text('SELECT cost, typeof(datetime) FROM storage')
+        ).one() == (300, 'integer')
+
+    with Session(engine) as db:
+        assert db.get(Product, 1).price == Decimal('8.50')
+        entry = db.get(Storage, 1)
+        assert entry.datetime == dt.datetime(2024, 1, 1, 10, 0, 0)
+        assert entry.cost == Decimal('3.00')
+
+
+def test_VendasAntigasFicamComoPagas(tmp_path):
+    engine = make_legacy_engine(tmp_path)
+    with engine.begin() as connection:
+        connection.execute(
+            text("INSERT INTO sale VALUES (1, '2024-01-01 10:00:00', 8.5)")
+        )
+
+    init_db(engine)
+
+    with engine.connect() as connection:
+        assert connection.execute(
+            text('SELECT payment_status, payment_key FROM sale')
+        ).one() == ('approved', None)
+
+
+def test_MigracaoComErroEhDesfeitaPorInteiro(tmp_path, monkeypatch):
+    engine = make_legacy_engine(tmp_path)
+
+    def failing_upgrade(connection):
+        connection.execute(text('CREATE TABLE parcial (id INTEGER)'))
+        connection.execute(
+            text('ALTER TABLE product ADD COLUMN extra INTEGER')
+        )
+        raise RuntimeError('falha no meio da migração')
+
+    failing = type('Migration', (), {'upgrade': staticmethod(failing_upgrade)})
+    monkeypatch.setattr(
+        migrations, 'MIGRATIONS', [*migrations.MIGRATIONS[:1], failing]
+    )
+
+    with pytest.raises(RuntimeError):
+        migrations.upgrade(engine)
+
+    # A primeira migração foi gravada; a DDL da que falhou, não
+    inspector = inspect(engine)
+    assert not inspector.has_table('parcial')
+    assert 'extra' not in {c['name'] for c in inspector.get_columns('product')}
+    with engine.connect() as connection:
+        assert migrations.current_version(connection) == 1
@@ -0,0 +1,136 @@
+import json
+import time
+
+import pytest
+import requests
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from Controllers.OutboxController import OutboxController
+from Controllers.ProductController import ProductController
+from Controllers.StorageController import StorageController
+from models import table_registry
+from Services.Sync.OutboxFlusher import OutboxFlusher
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= requests.codes.bad_request:
+            raise requests.HTTPError(f'HTTP {self.status_code}')
+
+
+class FakeHttp:
+    def __init__(self, status_code=201):
+        self.status_code = status_code
+        self.bodies = []
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.bodies.append(json.loads(data))
+        return FakeResponse(self.status_code)
+
+
+@pytest.fixture
+def SessionLocal(session):
+    # Sessões do flusher na mesma transação do teste
+    return sessionmaker(
+        bind=session.get_bind(), join_transaction_mode='create_savepoint'
+    )
+
+
+def seed_stock_update(db):
+    product = ProductController(session=db).create_product(
+        name='Bolo', description='Bolo de chocolate', price=30.0
+    )
+    storageController = StorageController(session=db)
+    storageController.create_registry(
+        product_id=product.product_id, quantity=10, cost=12.0
+    )
+    storageController.update_stock(product.product_id, -3)
+    return product
+
+
+def test_AtualizacaoDeEstoqueGeraEventoNaOutbox(session, SessionLocal):
+    product = seed_stock_update(session)
+
+    http = FakeHttp()
+    flusher = OutboxFlusher(
+        session_factory=SessionLocal, endpoint='http://x', http=http
+    )
+
+    # Entrada no estoque e baixa: um evento por escrita
+    assert flusher.flush_once() == 2  # noqa: PLR2004
+    events = http.bodies[0]['events']
+    assert [event['event_type'] for event in events] == [
+        'stock.updated',
+        'stock.updated',
+    ]
+    assert [event['payload'] for event in events] == [
+        {'product_id': product.product_id, 'delta': 10, 'quantity': 10},
+        {'product_id': product.product_id, 'delta': -3, 'quantity': 7},
+    ]
+    assert OutboxController(session=session).count_pending() == 0
+
+
+def test_FalhaNoEnvioAdiaNovaTentativa(session, SessionLocal):
+    seed_stock_update(session)
+
+    http = FakeHttp(status_code=503)
+    flusher = OutboxFlusher(
+        session_factory=SessionLocal,
+        endpoint='http://x',
+        http=http,
+        base_delay=60,
+    )
+
+    assert flusher.flush_once() == 0
+    # O evento continua na fila, mas só é reenviado após o backoff
+    assert flusher.flush_once() == 0
+    assert len(http.bodies) == 1
+    assert OutboxController(session=session).count_pending() == 2  # noqa: PLR2004
+
+
+def test_ErroNoBancoNaoEncerraOFlusher(tmp_path):
+    # Banco em arquivo: o flusher lê a outbox em outra thread
+    engine = create_engine(f'sqlite:///{tmp_path / "loja.db"}')
+    table_registry.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine)
+    db = SessionLocal()
+    seed_stock_update(db)
+
+    http = FakeHttp()
+    flusher = OutboxFlusher(
+        session_factory=SessionLocal,
+        endpoint='http://x',
+        http=http,
+        poll_interval=0.01,
+        base_delay=0.01,
+    )
+    flush_once = flusher.flush_once
+    calls = []
+
+    def locked_once():
+        # Primeira rodada falha como um banco bloqueado
+        calls.append(1)
+        if len(calls) == 1:
+            raise OperationalError(
+                'SELECT', {}, Exception('database is locked')
+            )
+        return flush_once()
+
+    flusher.flush_once = locked_once
+    flusher.start()
+    try:
+        for _ in range(200):
+            if OutboxController(session=db).count_pending() == 0:
+                break
+            time.sleep(0.01)
+    finally:
+        flusher.stop()
+
+    assert flusher.is_alive() is False
+    assert len(calls) > 1
+    assert OutboxController(session=db).count_pending() == 0
@@ -0,0 +1,305 @@
+import datetime as dt
+import uuid
+from decimal import Decimal
+
+import pytest
+import requests
+
+from Controllers.DailySalesController import DailySalesController
+from Controllers.OutboxController import OutboxController
+from Controllers.PaymentController import (
+    REFUND_REQUIRED_MESSAGE,
+    PaymentController,
+)
+from Controllers.ProductController import ProductController
+from Controllers.ReportController import ReportController
+from Controllers.SaleController import SaleController
+from Controllers.StorageController import StorageController
+from database import get_session_factory
+from models import (
+    PAYMENT_APPROVED,
+    PAYMENT_CANCELLED,
+    PAYMENT_DECLINED,
+    PAYMENT_PENDING,
+)
+from Services.Payment.AsyncPaymentProcessor import AsyncPaymentProcessor
+from Services.Payment.FakePsp import FakePspServer
+from Services.Payment.PspPaymentStrategy import PspPaymentStrategy
+
+
+@pytest.fixture
+def SessionLocal(tmp_path):
+    # Banco em arquivo: o processador grava com sessões de outras threads
+    return get_session_factory(f'sqlite:///{tmp_path / "loja.db"}')
+
+
+@pytest.fixture
+def psp():
+    server = FakePspServer(seed=1)
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def processor(SessionLocal):
+    processor = AsyncPaymentProcessor(
+        SessionLocal, timeout=0.5, attempts=2, base_delay=0, poll_interval=0.05
+    )
+    yield processor
+    processor.close()
+
+
+def pending_sale(session, quantity=2, method='credit_card'):
+    # Venda gravada como pendente, como faz a página de pedidos
+    product_id = (
+        ProductController(session)
+        .create_product(name='Bolo', description='Bolo de cenoura', price=10.0)
+        .product_id
+    )
+    storage = StorageController(session)
+    storage.create_registry(product_id=product_id, quantity=5, cost=4.0)
+    sale = SaleController(session, storage).checkout(
+        total_sale=Decimal('10.00') * quantity,
+        item_sales=[{'product_id': product_id, 'quantityItem': quantity}],
+        payment_method=method,
+        payment_status=PAYMENT_PENDING,
+        payment_key=uuid.uuid4().hex,
+    )
+    return sale, product_id
+
+
+def test_CartaoAprovadoAtualizaAVenda(SessionLocal, psp, processor):
+    session = SessionLocal()
+    sale, product_id = pending_sale(session)
+
+    result = processor.submit(
+        sale.sale_id,
+        PspPaymentStrategy(psp.url, 'credit_card'),
+        sale.total_sale,
+        sale.payment_key,
+    ).result(timeout=5)
+
+    assert result.status == PAYMENT_APPROVED
+    session.rollback()  # encerra a leitura e vê as gravações do processador
+    assert (
+        PaymentController(session).get_payment(sale.sale_id)['status']
+        == PAYMENT_APPROVED
+    )
+    assert StorageController(session).get_stock(product_id) == 3  # noqa: PLR2004
+
+
+def test_PagamentoRecusadoEstornaAVenda(SessionLocal, psp, processor):
+    psp.decline_rate = 1.0
+    session = SessionLocal()
+    sale, product_id = pending_sale(session)
+    day = sale.datetime.date()
+
+    result = processor.submit(
+        sale.sale_id,
+        PspPaymentStrategy(psp.url, 'credit_card'),
+        sale.total_sale,
+        sale.payment_key,
+    ).result(timeout=5)
+
+    assert result.status == PAYMENT_DECLINED
+    session.rollback()  # encerra a leitura e vê as gravações do processador
+    assert StorageController(session).get_stock(product_id) == 5  # noqa: PLR2004
+    assert ReportController(session).product_sales().empty
+    daily = ReportController(session).daily_sales(day)
+    assert daily['units'].tolist() == [0]
+    # O consolidado recalculado concorda com o estornado
+    DailySalesController(session).rebuild()
+    assert ReportController(session).daily_sales(day).empty
+
+
+def test_PixPendenteEhAcompanhadoAteAprovar(SessionLocal, psp, processor):
+    psp.pix_delay = 0.2
+    session = SessionLocal()
+    sale, _ = pending_sale(session, method='pix')
+
+    result = processor.submit(
+        sale.sale_id,
+        PspPaymentStrategy(psp.url, 'pix'),
+        sale.total_sale,
+        sale.payment_key,
+    ).result(timeout=5)
+
+    assert result.status == PAYMENT_APPROVED
+    assert result.message == 'Pix recebido.'
+
+
+def test_FalhaTemporariaRepeteComAMesmaChave(SessionLocal, psp, processor):
+    psp.failures = 1
+    session = SessionLocal()
+    sale, _ = pending_sale(session)
+
+    result = processor.submit(
+        sale.sale_id,
+        PspPaymentStrategy(psp.url, 'credit_card'),
+        sale.total_sale,
+        sale.payment_key,
+    ).result(timeout=5)
+
+    assert result.status == PAYMENT_APPROVED
+    assert list(psp.payments) == [sale.payment_key]
+
+
+def test_PspLentoDeixaAVendaPendenteSemCobrarDuasVezes(
+    SessionLocal, psp, processor
+):
+    psp.latency = 1.0
+    session = SessionLocal()
+    sale, _ = pending_sale(session)
+    strategy = PspPaymentStrategy(psp.url, 'credit_card')
+
+    started = dt.datetime.now()
+    result = processor.submit(
+        sale.sale_id, strategy, sale.total_sale, sale.payment_key
+    ).result(timeout=5)
+
+    # Duas tentativas de 0,5 s: a página não espera pela latência do PSP
+    assert dt.datetime.now() - started < dt.timedelta(seconds=1.5)
+    assert result.status == PAYMENT_PENDING
+    session.rollback()  # encerra a leitura e vê as gravações do processador
+    payment = PaymentController(session).get_payment(sale.sale_id)
+    assert payment['status'] == PAYMENT_PENDING
+    assert payment['message'] == 'PSP sem resposta. Tente novamente.'
+
+    # Reenviada quando o PSP volta ao normal, com a mesma chave
+    psp.latency = 0
+    futures = processor.resume_pending(
+        lambda method: PspPaymentStrategy(psp.url, method)
+    )
+    assert [future.result(timeout=5).status for future in futures] == [
+        PAYMENT_APPROVED
+    ]
+    assert len(psp.payments) == 1
+
+
+def test_CancelamentoVenceRespostaTardia(SessionLocal):
+    session = SessionLocal()
+    sale, product_id = pending_sale(session)
+    payments = PaymentController(session)
+
+    assert payments.settle(sale.sale_id, PAYMENT_CANCELLED, 'Cancelado')
+    # A aprovação que chega depois não ressuscita a venda, mas é sinalizada
+    # (uma única vez) para que a cobrança seja estornada no PSP
+    assert not payments.settle(sale.sale_id, PAYMENT_APPROVED)
+    assert not payments.settle(sale.sale_id, PAYMENT_APPROVED)
+    payment = payments.get_payment(sale.sale_id)
+    assert payment['status'] == PAYMENT_CANCELLED
+    assert payment['message'] == REFUND_REQUIRED_MESSAGE
+    events = [
+        event.event_type
+        for event in OutboxController(session).list_pending()
+    ]
+    assert events.count('sale.refund_required') == 1
+    assert StorageController(session).get_stock(product_id) == 5  # noqa: PLR2004
+    assert payments.list_pending() == []
+
+
+def test_CancelamentoSoEstornaDepoisDoPsp(SessionLocal, psp, processor):
+    session = SessionLocal()
+    sale, product_id = pending_sale(session)
+    strategy = PspPaymentStrategy(psp.url, 'credit_card')
+
+    # PSP fora do ar: a venda continua pendente e o estoque, baixado
+    psp.failures = 2
+    result = processor.cancel(
+        sale.sale_id, strategy, sale.payment_key
+    ).result(timeout=5)
+    assert result.status == PAYMENT_PENDING
+    session.rollback()  # encerra a leitura e vê as gravações do processador
+    assert StorageController(session).get_stock(product_id) == 3  # noqa: PLR2004
+
+    result = processor.cancel(
+        sale.sale_id, strategy, sale.payment_key
+    ).result(timeout=5)
+    assert result.status == PAYMENT_CANCELLED
+    session.rollback()
+    assert (
+        PaymentController(session).get_payment(sale.sale_id)['status']
+        == PAYMENT_CANCELLED
+    )
+    assert StorageController(session).get_stock(product_id) == 5  # noqa: PLR2004
+    # A cobrança que chegar depois ao PSP já está cancelada
+    result = processor.submit(
+        sale.sale_id, strategy, sale.total_sale, sale.payment_key
+    ).result(timeout=5)
+    assert result.status == PAYMENT_CANCELLED
+
+
+def test_ErroInesperadoFicaRegistradoNaVenda(SessionLocal, processor):
+    class QuebradaStrategy(PspPaymentStrategy):
+        async def authorize(  # noqa: PLR6301
+            self, total, idempotency_key, **kwargs
+        ):
+            raise KeyError('status')
+
+    session = SessionLocal()
+    sale, _ = pending_sale(session)
+
+    result = processor.submit(
+        sale.sale_id,
+        QuebradaStrategy('http://psp', 'credit_card'),
+        sale.total_sale,
+        sale.payment_key,
+    ).result(timeout=5)
+
+    assert result.status == PAYMENT_PENDING
+    session.rollback()  # encerra a leitura e vê as gravações do processador
+    payment = PaymentController(session).get_payment(sale.sale_id)
+    assert payment['status'] == PAYMENT_PENDING
+    assert payment['message'] == "Erro ao processar o pagamento: 'status'"
+
+
+class RespostaFixa:
+    # Cliente HTTP que devolve sempre a mesma resposta
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+    def request(self, *args, **kwargs):
+        response = requests.Response()
+        response.status_code = self.status_code
+        response._content = self.content
+        return response
+
+
+@pytest.mark.parametrize(
+    ('status_code', 'content'),
+    [
+        (422, b'{"message": "Valor inv\\u00e1lido."}'),
+        (200, b'{"id": "abc", "status": "em_analise"}'),
+        (200, b'<html>Gateway</html>'),
+    ],
+)
+def test_RespostaInvalidaDoPspRecusaAVenda(
+    SessionLocal, processor, status_code, content
+):
+    session = SessionLocal()
+    sale, product_id = pending_sale(session)
+    strategy = PspPaymentStrategy(
+        'http://psp', 'credit_card', http=RespostaFixa(status_code, content)
+    )
+
+    result = processor.submit(
+        sale.sale_id, strategy, sale.total_sale, sale.payment_key
+    ).result(timeout=5)
+
+    assert result.status == PAYMENT_DECLINED
+    session.rollback()  # encerra a leitura e vê as gravações do processador
+    assert (
+        PaymentController(session).get_payment(sale.sale_id)['status']
+        == PAYMENT_DECLINED
+    )
+    assert StorageController(session).get_stock(product_id) == 5  # noqa: PLR2004
+
+
+def test_SituacaoDesconhecidaNaoEhGravada(SessionLocal):
+    session = SessionLocal()
+    sale, _ = pending_sale(session)
+
+    with pytest.raises(ValueError, match='Situação final'):
+        PaymentController(session).settle(sale.sale_id, 'em_analise')
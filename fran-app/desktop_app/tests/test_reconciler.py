@@ -0,0 +1,142 @@
+import hashlib
+import json
+
+import pytest
+
+from Controllers.ProductController import ProductController
+from models import PAYMENT_CANCELLED, Product, Sale
+from Services.Sync.Reconciler import Reconciler, row_digest
+from Services.Sync.SyncEngine import SyncEngine
+
+
+class FakeResponse:
+    def __init__(self, body=None):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+class FakeBackend:
+    # Mesmo comportamento do AppService: guarda as linhas de envio por
+    # chave e responde aos hashes por intervalo
+    def __init__(self):
+        self.tables = {}
+        self.received = 0
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        batch = json.loads(data)
+        rows = self.tables.setdefault(batch['table'], {})
+        if 'range' in batch:
+            start, end = batch['range']
+            for key in [k for k in rows if start <= k <= end]:
+                del rows[key]
+        for index in range(batch['count']):
+            row = {
+                name: values[index]
+                for name, values in batch['columns'].items()
+            }
+            rows[row[batch['key']]] = row
+        self.received += batch['count']
+        return FakeResponse()
+
+    def get(self, url, params=None, timeout=None):
+        rows = self.tables.get(params['table'], {})
+        size = params['size']
+        start = params.get('from', float('-inf'))
+        end = params.get('to', float('inf'))
+        hashers = {}
+        for key in sorted(k for k in rows if start <= k <= end):
+            hasher = hashers.setdefault(key // size, hashlib.sha256())
+            hasher.update(row_digest(rows[key]).encode('ascii'))
+        return FakeResponse({
+            'digests': {
+                str(bucket): hasher.hexdigest()
+                for bucket, hasher in hashers.items()
+            }
+        })
+
+
+@pytest.fixture
+def synced(session):
+    productController = ProductController(session=session)
+    for i in range(600):
+        productController.create_product(
+            name=f'Produto {i}', description='teste', price=1 + i
+        )
+    backend = FakeBackend()
+    syncEngine = SyncEngine(
+        session=session,
+        endpoint='/postdata',
+        http=backend,
+        tables=[(Product, None)],
+    )
+    syncEngine.run_once()
+    reconciler = Reconciler(session=session, sync_engine=syncEngine)
+    return session, backend, reconciler
+
+
+def test_CopiasIguaisNaoReenviamNada(synced):
+    session, backend, reconciler = synced
+    backend.received = 0
+
+    assert reconciler.stale_ranges(Product) == []
+    assert reconciler.run_once() == {'product': 0}
+    assert backend.received == 0
+
+
+def test_ReenviaSoOsIntervalosDivergentes(synced):
+    session, backend, reconciler = synced
+    products = backend.tables['product']
+    del products[10]
+    products[300]['price'] = 1
+    products[9999] = dict(products[5], product_id=9999)
+    # Alteração local fora do fluxo normal de sincronização
+    session.get(Product, 450).name = 'Renomeado'
+    session.commit()
+    backend.received = 0
+
+    assert reconciler.stale_ranges(Product) == [
+        (0, 15),
+        (288, 303),
+        (448, 463),
+        (8192, 12287),
+    ]
+    # IDs começam em 1: o primeiro intervalo tem 15 linhas
+    assert reconciler.run_once() == {'product': 47}
+    assert backend.received == 47  # noqa: PLR2004
+    assert 9999 not in products  # noqa: PLR2004
+    assert products[10]['name'] == 'Produto 9'
+    assert products[450]['name'] == 'Renomeado'
+    assert reconciler.stale_ranges(Product) == []
+
+
+def test_ReconciliaAsVendas(session, product_factory, sale_factory):
+    product = product_factory()
+    sales = [sale_factory([(product, 1)]) for _ in range(3)]
+    backend = FakeBackend()
+    syncEngine = SyncEngine(
+        session=session, endpoint='/postdata', http=backend
+    )
+    syncEngine.run_once()
+    reconciler = Reconciler(session=session, sync_engine=syncEngine)
+
+    # Estorno e exclusão não avançam as marcas d'água das vendas
+    sales[0].payment_status = PAYMENT_CANCELLED
+    session.delete(sales[1])
+    session.commit()
+
+    assert reconciler.run_once() == {
+        'product': 0,
+        'storage': 0,
+        'sale': 2,
+        'itemsale': 2,
+    }
+    assert backend.tables['sale'][sales[0].sale_id]['payment_status'] == (
+        PAYMENT_CANCELLED
+    )
+    assert sales[1].sale_id not in backend.tables['sale']
+    assert reconciler.stale_ranges(Sale) == []
@@ -0,0 +1,136 @@
+import datetime as dt
+
+import pytest
+
+from Controllers.DailySalesController import DailySalesController
+from Controllers.ProductController import ProductController
+from Controllers.ReportController import ReportController
+from Controllers.SaleController import SaleController
+from Controllers.StorageController import StorageController
+from models import Sale
+
+
+@pytest.fixture
+def report_data(session):
+    productController = ProductController(session=session)
+    storageController = StorageController(session=session)
+    saleController = SaleController(
+        session=session, storage_controller=storageController
+    )
+
+    bolo = productController.create_product(
+        name='Bolo', description='Bolo de cenoura', price=30.0
+    )
+    suco = productController.create_product(
+        name='Suco', description='Suco de laranja', price=8.5
+    )
+    storageController.create_registry(bolo.product_id, quantity=10, cost=10)
+    storageController.create_registry(bolo.product_id, quantity=10, cost=14)
+    storageController.create_registry(suco.product_id, quantity=20, cost=3)
+
+    sales = [
+        (dt.datetime(2024, 5, 1, 9, 30), [(bolo, 2), (suco, 1)]),
+        (dt.datetime(2024, 5, 1, 15, 0), [(suco, 4)]),
+        (dt.datetime(2024, 5, 2, 10, 0), [(bolo, 1)]),
+    ]
+    for when, items in sales:
+        sale = saleController.checkout(
+            total_sale=sum(p.price * qty for p, qty in items),
+            item_sales=[
+                {'product_id': p.product_id, 'quantityItem': qty}
+                for p, qty in items
+            ],
+        )
+        session.get(Sale, sale.sale_id).datetime = when
+        session.commit()
+
+    # Mudança de preço depois das vendas não altera o faturamento
+    productController.update_product(
+        bolo.product_id, 'Bolo', 'Bolo de cenoura', price=35.0
+    )
+    return ReportController(session=session), bolo, suco
+
+
+def test_FaturamentoPorDiaEHora(report_data):
+    report, bolo, suco = report_data
+
+    by_day = report.revenue_by_period('day')
+    assert by_day.to_dict('records') == [
+        {'period': '2024-05-01', 'sales': 2, 'revenue': 102.5},
+        {'period': '2024-05-02', 'sales': 1, 'revenue': 30.0},
+    ]
+
+    by_hour = report.revenue_by_period(
+        'hour', start=dt.datetime(2024, 5, 1), end=dt.datetime(2024, 5, 2)
+    )
+    assert list(by_hour['period']) == ['2024-05-01 09:00', '2024-05-01 15:00']
+
+
+def test_ProdutosMaisVendidosEMargem(report_data):
+    report, bolo, suco = report_data
+
+    top = report.product_sales(limit=1)
+    assert top.to_dict('records') == [
+        {
+            'product_id': bolo.product_id,
+            'name': 'Bolo',
+            'units': 3,
+            'revenue': 90.0,
+        }
+    ]
+
+    margin = report.product_margin().set_index('name')
+    # Custo médio do bolo: (10 * 10 + 10 * 14) / 20 = 12
+    assert margin.loc['Bolo', 'cost'] == 36.0  # noqa: PLR2004
+    assert margin.loc['Bolo', 'margin'] == 54.0  # noqa: PLR2004
+    assert margin.loc['Suco', 'revenue'] == 42.5  # noqa: PLR2004
+    assert margin.loc['Suco', 'margin'] == 27.5  # noqa: PLR2004
+
+
+def test_RelatorioEmBlocos(report_data):
+    report, bolo, suco = report_data
+
+    chunks = list(report.revenue_by_period('hour', chunksize=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert sum(chunk['revenue'].sum() for chunk in chunks) == 132.5  # noqa: PLR2004
+
+
+def test_ConsolidadoDiarioAtualizadoNoCheckoutEIgualAoRebuild(report_data):
+    report, bolo, suco = report_data
+    session = report.session
+    # O checkout grava no dia em que ocorreu; as datas das vendas foram
+    # alteradas depois, então o rebuild redistribui pelos dias corretos
+    today = report.daily_sales()
+    assert today['units'].sum() == 8  # noqa: PLR2004
+    assert today['revenue'].sum() == 132.5  # noqa: PLR2004
+
+    rows = DailySalesController(session=session).rebuild()
+    assert rows == 3  # noqa: PLR2004
+
+    daily = report.daily_sales(start=dt.date(2024, 5, 1))
+    assert daily[['day', 'name', 'units', 'revenue', 'cost']].to_dict(
+        'records'
+    ) == [
+        {
+            'day': dt.date(2024, 5, 1),
+            'name': 'Bolo',
+            'units': 2,
+            'revenue': 60.0,
+            'cost': 24.0,
+        },
+        {
+            'day': dt.date(2024, 5, 1),
+            'name': 'Suco',
+            'units': 5,
+            'revenue': 42.5,
+            'cost': 15.0,
+        },
+        {
+            'day': dt.date(2024, 5, 2),
+            'name': 'Bolo',
+            'units': 1,
+            'revenue': 30.0,
+            'cost': 12.0,
+        },
+    ]
+    assert daily['margin'].sum() == report.product_margin()['margin'].sum()
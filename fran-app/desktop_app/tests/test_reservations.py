@@ -0,0 +1,120 @@
+import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from Controllers.ProductController import ProductController
+from Controllers.ReservationController import ReservationController
+from Controllers.SaleController import SaleController
+from Controllers.StorageController import StorageController
+from database import get_session_factory
+
+
+def make_sale_controller(session):
+    return SaleController(
+        session=session, storage_controller=StorageController(session)
+    )
+
+
+def test_ReservaBloqueiaOutrosCarrinhos(session, storage_factory):
+    product_id = storage_factory(quantity=3).product_id
+    reservations = ReservationController(session)
+
+    reservations.reserve('caixa-1', product_id, 2)
+    with pytest.raises(ValueError, match='disponível: 1, solicitada: 2'):
+        reservations.reserve('caixa-2', product_id, 2)
+    reservations.reserve('caixa-2', product_id, 1)
+    # O próprio carrinho pode mudar a quantidade dentro do que já reservou
+    reservations.reserve('caixa-1', product_id, 1)
+
+    assert reservations.cart_reservations('caixa-1') == {product_id: 1}
+    assert StorageController(session).get_available_many([product_id]) == {
+        product_id: 1
+    }
+
+
+def test_CheckoutUsaAsReservasDoCarrinhoEAsConsome(session, storage_factory):
+    product_id = storage_factory(quantity=2).product_id
+    reservations = ReservationController(session)
+    saleController = make_sale_controller(session)
+    reservations.reserve('caixa-1', product_id, 2)
+
+    # Venda sem carrinho não leva unidades reservadas
+    with pytest.raises(ValueError, match='Estoque insuficiente'):
+        saleController.checkout(
+            total_sale=10.0,
+            item_sales=[{'product_id': product_id, 'quantityItem': 1}],
+        )
+
+    saleController.checkout(
+        total_sale=20.0,
+        item_sales=[{'product_id': product_id, 'quantityItem': 2}],
+        cart_id='caixa-1',
+    )
+
+    assert StorageController(session).get_stock(product_id) == 0
+    assert reservations.cart_reservations('caixa-1') == {}
+
+
+def test_ReservaVencidaLiberaOEstoque(session, storage_factory):
+    product_id = storage_factory(quantity=1).product_id
+    vencida = ReservationController(session, ttl=dt.timedelta(seconds=-1))
+    vencida.reserve('caixa-1', product_id, 1)
+
+    reservations = ReservationController(session)
+    assert reservations.cart_reservations('caixa-1') == {}
+    assert reservations.purge_expired() == 1
+    reservations.reserve('caixa-2', product_id, 1)
+    assert reservations.release('caixa-2') == 1
+
+
+def test_TerminaisConcorrentesNaoVendemAlemDoEstoque(tmp_path):
+    SessionLocal = get_session_factory(f'sqlite:///{tmp_path / "loja.db"}')
+    setup = SessionLocal()
+    product_id = (
+        ProductController(setup)
+        .create_product(name='Bolo', description='Bolo de cenoura', price=10.0)
+        .product_id
+    )
+    StorageController(setup).create_registry(
+        product_id=product_id, quantity=5, cost=4.0
+    )
+    SessionLocal.remove()
+
+    def terminal(number):
+        session = SessionLocal()
+        cart_id = f'caixa-{number}'
+        try:
+            ReservationController(session).reserve(cart_id, product_id, 1)
+            make_sale_controller(session).checkout(
+                total_sale=10.0,
+                item_sales=[{'product_id': product_id, 'quantityItem': 1}],
+                cart_id=cart_id,
+            )
+            return True
+        except ValueError:
+            return False
+        finally:
+            SessionLocal.remove()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        sold = list(executor.map(terminal, range(12)))
+
+    assert sum(sold) == 5  # noqa: PLR2004
+    assert StorageController(SessionLocal()).get_stock(product_id) == 0
+
+
+def test_CarrinhoAbertoRenovaERefazAsReservas(session, storage_factory):
+    product_id = storage_factory(quantity=2).product_id
+    other_id = storage_factory(quantity=1).product_id
+    vencida = ReservationController(session, ttl=dt.timedelta(seconds=-1))
+    vencida.reserve('caixa-1', product_id, 2)
+    vencida.reserve('caixa-1', other_id, 1)
+    # Outro caixa reserva a unidade liberada pelo vencimento
+    reservations = ReservationController(session)
+    reservations.reserve('caixa-2', other_id, 1)
+
+    lost = reservations.renew_cart('caixa-1', {product_id: 2, other_id: 1})
+
+    assert lost == [other_id]
+    assert reservations.cart_reservations('caixa-1') == {product_id: 2}
@@ -0,0 +1,57 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from Controllers.ProductController import ProductController
+from models import table_registry
+
+
+def seed_catalog(session):
+    productController = ProductController(session=session)
+    productController.create_product(
+        name='Bolo de Cenoura', description='Cobertura de chocolate', price=30
+    )
+    productController.create_product(
+        name='Brigadeiro', description='Doce de chocolate', price=2.5
+    )
+    productController.create_product(
+        name='Coxinha', description='Salgado de frango', price=7
+    )
+    return productController
+
+
+def test_BuscaPorPrefixoOrdenadaPorRelevancia(session):
+    productController = seed_catalog(session)
+
+    results = productController.search_products('choc')
+    assert {p['name'] for p in results} == {'Bolo de Cenoura', 'Brigadeiro'}
+
+    # Nome pesa mais que a descrição e acentos são ignorados
+    productController.create_product(
+        name='Chocolate quente', description='Bebida', price=9
+    )
+    results = productController.search_products('chocolate')
+    assert results[0]['name'] == 'Chocolate quente'
+
+    assert [
+        p['name'] for p in productController.search_products('choc', 1, 1)
+    ] == [results[1]['name']]
+    assert productController.search_products('"frango') == [
+        {
+            'id': 3,
+            'name': 'Coxinha',
+            'description': 'Salgado de frango',
+            'price': 7.0,
+            'category': None,
+        }
+    ]
+
+
+def test_BuscaSemIndiceUsaLike():
+    # Banco criado sem as migrações, portanto sem o índice FTS5
+    engine = create_engine('sqlite://')
+    table_registry.metadata.create_all(engine)
+    productController = seed_catalog(sessionmaker(bind=engine)())
+
+    assert [p['name'] for p in productController.search_products('doce')] == [
+        'Brigadeiro'
+    ]
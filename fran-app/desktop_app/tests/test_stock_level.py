@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from Controllers.ProductController import ProductController
+from Controllers.SaleController import SaleController
+from Controllers.StorageController import StorageController
+from database import init_db
+from models import Storage
+
+
+def test_EntradasFormamLivroESaldoEhMantido(session):
+    product = ProductController(session=session).create_product(
+        name='Bolo', description='Bolo de milho', price=20.0
+    )
+    storageController = StorageController(session=session)
+    saleController = SaleController(
+        session=session, storage_controller=storageController
+    )
+
+    storageController.create_registry(product.product_id, 10, 8.0)
+    storageController.create_registry(product.product_id, 5, 9.0)
+    assert storageController.get_stock(product.product_id) == 15  # noqa: PLR2004
+    assert storageController.get_registry_by_id(product.product_id).cost == 9  # noqa: PLR2004
+
+    saleController.checkout(
+        total_sale=80.0,
+        item_sales=[{'product_id': product.product_id, 'quantityItem': 4}],
+    )
+    assert storageController.get_stock(product.product_id) == 11  # noqa: PLR2004
+
+    adjustment = storageController.update_registry(
+        product.product_id, quantity=20
+    )
+    assert adjustment.quantity == 9  # noqa: PLR2004
+    assert storageController.get_stock(product.product_id) == 20  # noqa: PLR2004
+    # Nenhuma entrada é alterada: o livro só cresce, com a baixa da venda
+    # pelo custo médio das entradas
+    entries = session.query(Storage).order_by(Storage.entry_id).all()
+    assert [e.quantity for e in entries] == [10, 5, -4, 9]
+    assert entries[2].sale_id is not None
+    assert entries[2].cost == Decimal('8.33')
+
+    # Só o custo mudou: é recusado em vez de descartado em silêncio
+    with pytest.raises(ValueError, match='alteração de quantidade'):
+        storageController.update_registry(
+            product.product_id, quantity=20, cost=7
+        )
+    with pytest.raises(ValueError, match='alteração de quantidade'):
+        storageController.update_registry(product.product_id, cost=7)
+    assert session.query(Storage).count() == 4  # noqa: PLR2004
+
+
+def test_BancoAntigoTemSaldoPreenchidoNaMigracao(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "antigo.session"}')
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                'CREATE TABLE storage (entry_id INTEGER PRIMARY KEY, '
+                'product_id INTEGER, quantity INTEGER, datetime VARCHAR, '
+                'cost FLOAT)'
+            )
+        )
+        connection.execute(
+            text(
+                'INSERT INTO storage '
+                "VALUES (1, 1, 7, '2024-01-01 10:00:00', 2)"
+            )
+        )
+
+    init_db(engine)
+
+    session = sessionmaker(bind=engine)()
+    assert StorageController(session=session).get_stock(1) == 7  # noqa: PLR2004
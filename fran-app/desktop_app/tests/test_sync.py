@@ -0,0 +1,64 @@
+import json
+
+from Controllers.ProductController import ProductController
+from Services.Sync.SyncEngine import SyncEngine
+from Services.Sync.WireFormat import decode_batch
+
+
+class FakeResponse:
+    def __init__(self, status_code=201):
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:  # noqa: PLR2004
+            raise RuntimeError(f'HTTP {self.status_code}')
+
+
+class FakeHttp:
+    def __init__(self):
+        self.bodies = []
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.bodies.append(json.loads(data))
+        return FakeResponse()
+
+
+def test_SincronizaSomenteLinhasNovas(session):
+    productController = ProductController(session=session)
+    for i in range(5):
+        productController.create_product(
+            name=f'Produto {i}', description='teste', price=1.5 + i
+        )
+
+    http = FakeHttp()
+    syncEngine = SyncEngine(session=session, endpoint='http://x', http=http)
+
+    assert syncEngine.run_once()['product'] == 5  # noqa: PLR2004
+    assert syncEngine.run_once()['product'] == 0
+
+    productController.create_product(
+        name='Produto novo', description='teste', price=9.9
+    )
+    assert syncEngine.run_once()['product'] == 1
+    assert decode_batch(http.bodies[-1])[0]['name'] == 'Produto novo'
+
+
+def test_LotesRespeitamLimiteDeBytes(session):
+    productController = ProductController(session=session)
+    for i in range(20):
+        productController.create_product(
+            name=f'Produto {i}', description='x' * 100, price=2.0
+        )
+
+    http = FakeHttp()
+    syncEngine = SyncEngine(
+        session=session, endpoint='http://x', http=http, max_batch_bytes=600
+    )
+    syncEngine.run_once()
+
+    sent = [row for body in http.bodies for row in decode_batch(body)]
+    assert len(sent) == 20  # noqa: PLR2004
+    assert len(http.bodies) > 1
+    assert all(
+        len(json.dumps(body['columns'])) <= 600 for body in http.bodies  # noqa: PLR2004
+    )
@@ -0,0 +1,38 @@
+import datetime as dt
+from decimal import Decimal
+
+from sqlalchemy import func, select, text
+
+from models import Sale, to_money
+
+
+def test_DinheiroEmCentavosSemErroDeArredondamento(session):
+    for total in (0.1, 0.2, Decimal('0.3'), '10.005'):
+        session.add(Sale(total_sale=total))
+    session.commit()
+
+    assert session.scalars(
+        text('SELECT total_sale FROM sale ORDER BY sale_id')
+    ).all() == [10, 20, 30, 1001]
+    total = session.scalar(select(func.sum(Sale.total_sale)))
+    assert to_money(total) == Decimal('10.61')
+    assert session.get(Sale, 1).total_sale == Decimal('0.10')
+
+
+def test_ConsultaPorPeriodoUsaInteirosDeEpoca(session):
+    session.add(Sale(total_sale=5))
+    session.commit()
+    sale = session.get(Sale, 1)
+    assert isinstance(sale.datetime, dt.datetime)
+
+    stored = session.scalar(text('SELECT datetime FROM sale'))
+    assert stored == int(sale.datetime.timestamp())
+
+    hour = dt.timedelta(hours=1)
+    in_range = select(Sale.sale_id).where(
+        Sale.datetime.between(sale.datetime - hour, sale.datetime + hour)
+    )
+    assert session.scalars(in_range).all() == [1]
+    assert session.scalars(
+        in_range.where(Sale.datetime > sale.datetime)
+    ).all() == []
@@ -0,0 +1,54 @@
+import datetime as dt
+import json
+from decimal import Decimal
+
+import pytest
+
+from models import Sale, Storage
+from Services.Sync.WireFormat import (
+    decode_batch,
+    deserialize,
+    encode_batch,
+    serialize,
+)
+
+ROWS = [
+    {
+        'entry_id': i,
+        'product_id': 7,
+        'quantity': 10 + i,
+        'datetime': dt.datetime(2024, 6, 1, 8, 0, i),
+        'cost': Decimal('12.90'),
+        'sale_id': None,
+    }
+    for i in range(1, 51)
+]
+
+
+def test_FormatoColunarIdaEVolta():
+    batch = encode_batch(Storage.__table__, ROWS)
+
+    assert batch['version'] == 1
+    assert batch['types']['cost'] == 'money'
+    assert batch['columns']['cost'][:2] == [1290, 1290]
+    assert decode_batch(json.loads(serialize(batch)[0])) == ROWS
+
+
+def test_FormatoColunarMenorQueListaDeDicionarios():
+    body, content_type = serialize(encode_batch(Storage.__table__, ROWS))
+    rows_body = json.dumps({'table': 'storage', 'rows': ROWS}, default=str)
+
+    assert content_type == 'application/json'
+    assert len(body) * 2 < len(rows_body)
+
+
+def test_MessagePackOpcional():
+    pytest.importorskip('msgpack')
+    batch = encode_batch(Sale.__table__, [])
+    body, content_type = serialize(batch, 'msgpack')
+    assert deserialize(body, content_type) == batch
+
+
+def test_VersaoDesconhecidaEhRecusada():
+    with pytest.raises(ValueError, match='Versão'):
+        decode_batch({'version': 99})